@@ -0,0 +1,233 @@
+"""
+Bible upstream fault-injection run.
+
+Starts a local stub that speaks the three upstream APIs (bible-api.com,
+the PL worker and biblia.my.to), answering a share of requests with
+429 + Retry-After and adding random latency. It then points the backend's
+BibleAPIClient at it (no corpus store) and fires concurrent chapter
+requests, reporting how many succeeded, were served stale, or failed,
+together with the upstream.* / bible_* metrics. Afterwards it checks that
+
+    requests do not keep arriving while a Retry-After is in force
+    the AIMD limit backs off under 429s and climbs back once they stop
+    on a primary outage (--outage) the fallback is tried and every
+    request is still answered (from stale entries)
+
+and exits non-zero if any check fails.
+
+    poetry run python benchmarks/bible_upstream_stub.py --requests 500 --p429 0.3
+    poetry run python benchmarks/bible_upstream_stub.py --outage   # primary down after warm-up
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Requests arriving this soon after a 429 may have been sent before the client saw it
+RETRY_AFTER_GRACE = 0.05
+
+
+class Faults:
+    p429 = 0.2
+    retry_after = 1
+    latency = (0.01, 0.2)
+    down = False
+
+
+class Seen:
+    """What the stub observed: Retry-After windows and requests arriving inside them"""
+    requests = 0
+    windows = 0
+    window_start = 0.0
+    window_until = 0.0
+    during_retry_after = 0
+
+
+def _verses(count: int = 20):
+    return [{"verse": n, "number": n, "text": f"Verse {n}", "content": f"[{n}] Verse {n}"} for n in range(1, count + 1)]
+
+
+async def _maybe_fail(request):
+    arrived = time.monotonic()
+    Seen.requests += 1
+    if Seen.window_start + RETRY_AFTER_GRACE <= arrived < Seen.window_until:
+        Seen.during_retry_after += 1
+
+    await asyncio.sleep(random.uniform(*Faults.latency))
+    if Faults.down and request.url.path.startswith("/primary"):
+        return JSONResponse({"error": "down"}, status_code=503)
+    if random.random() < Faults.p429:
+        now = time.monotonic()
+        if now >= Seen.window_until:
+            Seen.windows += 1
+            Seen.window_start = now
+        Seen.window_until = max(Seen.window_until, now + Faults.retry_after)
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": str(Faults.retry_after)})
+    return None
+
+
+async def en_chapter(request):
+    failure = await _maybe_fail(request)
+    if failure:
+        return failure
+    reference = request.path_params["reference"]
+    return JSONResponse({"reference": reference, "verses": _verses()})
+
+
+async def pl_chapter(request):
+    failure = await _maybe_fail(request)
+    if failure:
+        return failure
+    return JSONResponse({"verses": _verses()})
+
+
+async def es_verses(request):
+    failure = await _maybe_fail(request)
+    if failure:
+        return failure
+    return JSONResponse([{"number": v["number"]} for v in _verses()])
+
+
+async def es_range(request):
+    failure = await _maybe_fail(request)
+    if failure:
+        return failure
+    return JSONResponse([{"number": v["number"], "content": v["content"]} for v in _verses()])
+
+
+def build_app() -> Starlette:
+    routes = []
+    for prefix in ("/primary", "/secondary"):
+        routes += [
+            Route(prefix + "/en/{reference}", en_chapter),
+            Route(prefix + "/pl/biblia/{bible}/{book}/{chapter}", pl_chapter),
+            Route(prefix + "/es/book/{book}/chapter/{chapter}/verse", es_verses),
+            Route(prefix + "/es/book/{book}/chapter/{chapter}/verse/{range}", es_range),
+        ]
+    return Starlette(routes=routes)
+
+
+async def run(args):
+    base = f"http://127.0.0.1:{args.port}"
+    for lang in ("EN", "PL", "ES"):
+        os.environ[f"BIBLE_API_URL_{lang}"] = f"{base}/primary/{lang.lower()}"
+        os.environ[f"BIBLE_API_FALLBACK_URL_{lang}"] = f"{base}/secondary/{lang.lower()}"
+    os.environ["BIBLE_STORE_ENABLED"] = "false"
+    os.environ["BIBLE_CACHE_TTL_SECONDS"] = "1"
+    os.environ["BIBLE_CACHE_STALE_SECONDS"] = "0"
+
+    from src.utils import metrics
+    from src.utils.bible_api import UPSTREAMS, bible_api
+    from src.utils.upstream import fetcher_for
+
+    for upstream in UPSTREAMS.values():
+        upstream["rate"] = args.rate
+
+    server = uvicorn.Server(uvicorn.Config(build_app(), port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    chapters = [(lang, book, chapter) for lang in ("en", "pl", "es") for book in ("John", "Genesis") for chapter in range(1, 6)]
+    outcomes = {"ok": 0, "failed": 0}
+
+    async def one(lang, book, chapter):
+        try:
+            await bible_api.get_chapter(book, chapter, lang)
+            outcomes["ok"] += 1
+        except Exception:
+            outcomes["failed"] += 1
+
+    # Warm-up: every chapter once, so stale entries exist
+    await asyncio.gather(*(one(*key) for key in chapters))
+    # Every upstream is on the stub's host, so they share one fetcher
+    limiter = fetcher_for(base + "/", args.rate, 1).limiter
+    if args.outage:
+        Faults.down = True
+        Faults.p429 = 1.0  # secondary throttled too: only stale entries are left
+    await asyncio.sleep(1.1)  # let cache entries expire
+
+    limits = []
+
+    async def sample_limit():
+        while True:
+            limits.append(limiter.limit)
+            await asyncio.sleep(0.02)
+
+    sampler = asyncio.create_task(sample_limit())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*random.choice(chapters)) for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    main_outcomes = dict(outcomes)
+
+    recovered_limit = None
+    if not args.outage:
+        # Faults cleared: fresh chapters, so every request reaches the stub
+        Faults.p429 = 0.0
+        await asyncio.sleep(Faults.retry_after)
+        await asyncio.gather(*(
+            one(lang, "Psalms", chapter) for lang in ("en", "pl", "es") for chapter in range(1, args.recovery + 1)
+        ))
+        recovered_limit = limiter.limit
+
+    await bible_api.close()
+    server.should_exit = True
+    await server_task
+
+    counters = {name: value for name, value in metrics.snapshot().get("counters", {}).items()
+                if name.startswith(("upstream.", "bible_"))}
+    print(json.dumps({
+        "requests": args.requests + len(chapters),
+        "outcomes": main_outcomes,
+        "seconds": round(elapsed, 2),
+        "stub": {"requests": Seen.requests, "retry_after_windows": Seen.windows,
+                 "during_retry_after": Seen.during_retry_after},
+        "concurrency_limit": {"max": limiter.maximum, "lowest": min(limits, default=None), "recovered": recovered_limit},
+        "counters": counters,
+    }, indent=2))
+
+    # Stray arrivals are requests already past the pause check when the 429 was sent
+    checks = {"no 429 storm after Retry-After": Seen.during_retry_after <= Seen.windows}
+    if args.outage:
+        checks["fallback tried on primary outage"] = counters.get("bible_upstream.fallback", 0) > 0
+        checks["every request answered during outage"] = main_outcomes["failed"] == 0
+    else:
+        if Faults.retry_after and args.p429 > 0:
+            checks["AIMD backs off under 429s"] = min(limits, default=limiter.maximum) < limiter.maximum
+        checks["AIMD converges back to the maximum"] = recovered_limit == limiter.maximum
+        checks["requests answered"] = main_outcomes["failed"] <= args.requests * 0.05
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}  {name}")
+    return 0 if all(checks.values()) else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--p429", type=float, default=0.2, help="Share of stub responses that are 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=50.0, help="Client-side requests/second per host")
+    parser.add_argument("--outage", action="store_true", help="Fail every upstream after warm-up")
+    parser.add_argument("--recovery", type=int, default=100, help="Chapters per language fetched once faults stop")
+    args = parser.parse_args()
+
+    Faults.p429 = args.p429
+    Faults.retry_after = args.retry_after
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
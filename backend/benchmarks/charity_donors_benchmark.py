@@ -0,0 +1,124 @@
+"""
+Charity donors round-trip benchmark.
+
+Seeds a scratch database with users and donations to one charity, then
+calls the donors endpoint handler for several `limit` values, counting MongoDB commands with a pymongo CommandListener. The
+legacy per-donor find_one() path is run alongside for comparison; the
+current handler should issue the same number of commands for every limit.
+
+    poetry run python benchmarks/charity_donors_benchmark.py --mongo mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CHARITY_ID = "benchmark-charity"
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        if event.command_name not in ("hello", "isMaster", "ping", "endSessions"):
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def seed(db, users: int, donations: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    user_ids = [f"donor{n}" for n in range(users)]
+    await db.users.insert_many([{"_id": uid, "username": uid, "email": f"{uid}@example.com"} for uid in user_ids])
+    await db.charity_actions.insert_one({"_id": CHARITY_ID, "title": "Benchmark", "is_active": True})
+    await db.charity_donations.insert_many([
+        {"user_id": rng.choice(user_ids), "charity_id": CHARITY_ID, "tokens_spent": rng.randint(1, 100),
+         "created_at": now - timedelta(minutes=rng.randint(0, 100_000))}
+        for _ in range(donations)
+    ])
+
+
+async def legacy_donors(db, limit: int):
+    """The pre-batching handler body: one find_one() per donor"""
+    pipeline = [
+        {"$match": {"charity_id": CHARITY_ID}},
+        {"$group": {"_id": "$user_id", "total_donated": {"$sum": "$tokens_spent"},
+                    "donation_count": {"$sum": 1}, "last_donation": {"$max": "$created_at"}}},
+        {"$sort": {"total_donated": -1}},
+        {"$limit": limit}
+    ]
+    donors = []
+    for donor in await db.charity_donations.aggregate(pipeline).to_list(length=limit):
+        user = await db.users.find_one({"_id": donor["_id"]})
+        donors.append(user.get("username", "Anonymous") if user else "Anonymous")
+    return donors
+
+
+async def measure(counter: CommandCounter, call, repeats: int):
+    counter.commands.clear()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await call()
+    elapsed_ms = (time.perf_counter() - started) / repeats * 1000
+    return sum(counter.commands.values()) / repeats, elapsed_ms
+
+
+async def main_async(args):
+    os.environ["MONGODB_URL"] = args.mongo
+    os.environ["MONGO_DB_NAME"] = args.db
+
+    from src.routers.charity import get_charity_donors
+    from src.utils import mongodb, user_names
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(args.mongo, event_listeners=[counter])
+    db = client[args.db]
+    mongodb.mongodb_client = client
+    mongodb.database = db
+    await client.drop_database(args.db)
+    try:
+        await seed(db, args.users, args.donations)
+
+        print(f"{'limit':>6}{'legacy cmds':>14}{'legacy ms':>12}{'cold cmds':>12}{'warm cmds':>12}{'warm ms':>10}")
+        for limit in args.limits:
+            legacy_cmds, legacy_ms = await measure(counter, lambda: legacy_donors(db, limit), args.repeats)
+            user_names._names.clear()
+            cold_cmds, _ = await measure(counter, lambda: get_charity_donors(CHARITY_ID, limit), 1)
+            warm_cmds, warm_ms = await measure(counter, lambda: get_charity_donors(CHARITY_ID, limit), args.repeats)
+            print(f"{limit:>6}{legacy_cmds:>14.0f}{legacy_ms:>12.2f}{cold_cmds:>12.0f}{warm_cmds:>12.0f}{warm_ms:>10.2f}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="praychain_donors_benchmark")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--donations", type=int, default=20_000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
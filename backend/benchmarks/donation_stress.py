@@ -0,0 +1,135 @@
+"""
+Concurrent donation stress test.
+
+Seeds a scratch database with one user holding --balance tokens and one
+charity action, then fires --requests concurrent donations of --amount
+tokens through the donate endpoint handler. Afterwards it checks that no
+update was lost and the balance never went negative:
+
+    accepted * amount == balance - final tokens_balance
+    final tokens_balance >= 0
+    donations, ledger spend entries, charity counters and token_balances agree
+
+--legacy runs the old read/check/$set flow instead, to show the lost updates.
+
+    poetry run python benchmarks/donation_stress.py --mongo mongodb://localhost:27017 --requests 500
+    poetry run python benchmarks/donation_stress.py --transactions --mongo "mongodb://localhost:27017/?replicaSet=rs0"
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+USER_ID = "stress-user"
+CHARITY_ID = "stress-charity"
+
+
+async def seed(db, balance: int):
+    await db.users.insert_one({"_id": USER_ID, "username": USER_ID, "tokens_balance": balance, "total_earned": balance})
+    await db.token_balances.insert_one(
+        {"user_id": USER_ID, "current_balance": balance, "total_earned": balance, "total_spent": 0}
+    )
+    await db.token_transactions.insert_one(
+        {"_id": "stress-seed", "user_id": USER_ID, "type": "earn", "amount": balance, "source": "stress:seed"}
+    )
+    await db.charity_actions.insert_one({"_id": CHARITY_ID, "title": "Stress", "cost_tokens": 0, "is_active": True})
+
+
+async def legacy_donate(db, amount: int) -> bool:
+    """The pre-fix flow: read, check in Python, then $set the computed balance"""
+    user = await db.users.find_one({"_id": USER_ID})
+    if user["tokens_balance"] < amount:
+        return False
+    await asyncio.sleep(0)  # the window between the check and the write
+    await db.charity_donations.insert_one({"user_id": USER_ID, "charity_id": CHARITY_ID, "tokens_spent": amount})
+    await db.users.update_one({"_id": USER_ID}, {"$set": {"tokens_balance": user["tokens_balance"] - amount}})
+    await db.charity_actions.update_one({"_id": CHARITY_ID}, {"$inc": {"total_supported": 1, "total_tokens_raised": amount}})
+    return True
+
+
+async def main_async(args):
+    os.environ["MONGODB_URL"] = args.mongo
+    os.environ["MONGO_DB_NAME"] = args.db
+    os.environ["MONGO_TRANSACTIONS_ENABLED"] = "true" if args.transactions else "false"
+
+    from fastapi import HTTPException
+
+    from src.models.donation import DonationRequest
+    from src.routers.charity import donate_to_charity
+    from src.utils import mongodb
+
+    client = AsyncIOMotorClient(args.mongo)
+    db = client[args.db]
+    mongodb.mongodb_client = client
+    mongodb.database = db
+    await client.drop_database(args.db)
+    try:
+        await seed(db, args.balance)
+
+        async def donate() -> str:
+            if args.legacy:
+                return "ok" if await legacy_donate(db, args.amount) else "insufficient"
+            try:
+                await donate_to_charity(DonationRequest(user_id=USER_ID, charity_id=CHARITY_ID, tokens_amount=args.amount))
+                return "ok"
+            except HTTPException as e:
+                return "insufficient" if e.status_code == 400 else f"http {e.status_code}"
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(donate() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+        accepted = outcomes.count("ok")
+        user = await db.users.find_one({"_id": USER_ID})
+        balance = await db.token_balances.find_one({"user_id": USER_ID})
+        charity = await db.charity_actions.find_one({"_id": CHARITY_ID})
+        donations = await db.charity_donations.count_documents({"user_id": USER_ID})
+        spent = await db.token_transactions.aggregate([
+            {"$match": {"user_id": USER_ID, "type": "spend"}},
+            {"$group": {"_id": None, "amount": {"$sum": "$amount"}}}
+        ]).to_list(length=1)
+
+        checks = {
+            "no lost updates": args.balance - user["tokens_balance"] == accepted * args.amount,
+            "balance never negative": user["tokens_balance"] >= 0,
+            "donations recorded": donations == accepted,
+            "charity counters": charity.get("total_supported", 0) == accepted,
+        }
+        if not args.legacy:
+            checks["ledger spend total"] = (spent[0]["amount"] if spent else 0) == accepted * args.amount
+            checks["token_balances projection"] = balance["current_balance"] == user["tokens_balance"]
+
+        print(f"{args.requests} concurrent donations of {args.amount} from a balance of {args.balance} "
+              f"in {elapsed:.2f}s ({'legacy' if args.legacy else 'transaction' if args.transactions else 'guarded'})")
+        print(f"accepted={accepted} rejected={outcomes.count('insufficient')} "
+              f"other={len(outcomes) - accepted - outcomes.count('insufficient')} final tokens_balance={user['tokens_balance']}")
+        for name, passed in checks.items():
+            print(f"  {'PASS' if passed else 'FAIL'}  {name}")
+        return 0 if all(checks.values()) else 1
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="praychain_donation_stress")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--amount", type=int, default=10)
+    parser.add_argument("--balance", type=int, default=1000)
+    parser.add_argument("--transactions", action="store_true", help="Use multi-document transactions (replica set)")
+    parser.add_argument("--legacy", action="store_true", help="Run the old read/check/$set flow")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
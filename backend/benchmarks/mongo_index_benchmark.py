@@ -0,0 +1,130 @@
+"""
+MongoDB index benchmark.
+
+Seeds a scratch database on a local mongod with synthetic users, balances,
+transactions and donations, then times every query in
+src.utils.mongo_indexes.QUERY_PLAN_CHECKS without indexes and again after
+ensure_indexes(), printing latency and the winning plan stage.
+
+    poetry run python benchmarks/mongo_index_benchmark.py --mongo mongodb://localhost:27017 --docs 200000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.mongo_indexes import QUERY_PLAN_CHECKS, plan_stages, ensure_indexes  # noqa: E402
+
+
+async def seed(db, docs: int, users: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    user_ids = [f"user-{n}" for n in range(users)]
+    charity_ids = [f"charity-{n}" for n in range(50)]
+
+    await db.users.insert_many([{"_id": uid, "email": f"{uid}@example.com"} for uid in user_ids])
+    await db.token_balances.insert_many([
+        {"user_id": uid, "balance": rng.randint(0, 1000), "total_earned": rng.randint(0, 5000)} for uid in user_ids
+    ])
+    await db.charity_actions.insert_many([
+        {"_id": cid, "is_active": rng.random() < 0.8, "total_supported": rng.randint(0, 10000)} for cid in charity_ids
+    ])
+
+    batch = 10_000
+    for start in range(0, docs, batch):
+        count = min(batch, docs - start)
+        await db.token_transactions.insert_many([
+            {"user_id": rng.choice(user_ids), "amount": rng.randint(1, 50),
+             "created_at": now - timedelta(minutes=rng.randint(0, 500_000))}
+            for _ in range(count)
+        ])
+        await db.charity_donations.insert_many([
+            {"user_id": rng.choice(user_ids), "charity_id": rng.choice(charity_ids),
+             "tokens_spent": rng.randint(1, 100), "created_at": now - timedelta(minutes=rng.randint(0, 500_000))}
+            for _ in range(count)
+        ])
+        await db.transcriptions.insert_many([
+            {"created_at": now - timedelta(minutes=rng.randint(0, 500_000))} for _ in range(count)
+        ])
+    return user_ids, charity_ids
+
+
+def concrete(query, user_ids, charity_ids):
+    """Replace the plan-check placeholders with seeded values"""
+    query = dict(query)
+    if "user_id" in query:
+        query["user_id"] = user_ids[0]
+    if "charity_id" in query:
+        query["charity_id"] = charity_ids[0]
+    if "email" in query:
+        query["email"] = f"{user_ids[0]}@example.com"
+    if "created_at" in query:
+        query["created_at"] = {"$lt": datetime.utcnow() - timedelta(days=300)}
+    return query
+
+
+async def measure(db, user_ids, charity_ids, repeats: int):
+    results = []
+    for collection, query, sort in QUERY_PLAN_CHECKS:
+        query = concrete(query, user_ids, charity_ids)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            cursor = db[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            await cursor.limit(20).to_list(length=20)
+        elapsed_ms = (time.perf_counter() - started) / repeats * 1000
+
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.limit(20).explain()
+        stages = list(plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        results.append((f"{collection} {sorted(query)} sort={sort}", elapsed_ms, stages[-1] if stages else "?"))
+    return results
+
+
+async def main_async(args):
+    client = AsyncIOMotorClient(args.mongo)
+    db = client[args.db]
+    await client.drop_database(args.db)
+    try:
+        started = time.perf_counter()
+        user_ids, charity_ids = await seed(db, args.docs, args.users)
+        print(f"Seeded {args.docs} docs per collection in {time.perf_counter() - started:.1f}s")
+
+        before = await measure(db, user_ids, charity_ids, args.repeats)
+        started = time.perf_counter()
+        await ensure_indexes(db)
+        print(f"ensure_indexes: {time.perf_counter() - started:.1f}s")
+        after = await measure(db, user_ids, charity_ids, args.repeats)
+
+        print(f"\n{'query':<80}{'before ms':>10}{'plan':>10}{'after ms':>10}{'plan':>10}")
+        for (name, before_ms, before_stage), (_, after_ms, after_stage) in zip(before, after):
+            print(f"{name[:79]:<80}{before_ms:>10.2f}{before_stage:>10}{after_ms:>10.2f}{after_stage:>10}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="praychain_index_benchmark")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
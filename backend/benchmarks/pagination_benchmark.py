@@ -0,0 +1,94 @@
+"""
+Skip vs keyset pagination benchmark.
+
+Seeds one user's token transactions on a local mongod (with the registry
+indexes), then times fetching page N with .skip() and with the keyset
+cursor from src.utils.pagination, for increasing page depths.
+
+    poetry run python benchmarks/pagination_benchmark.py --mongo mongodb://localhost:27017 --docs 200000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.mongo_indexes import ensure_indexes  # noqa: E402
+from src.utils.pagination import SORT, encode_cursor, fetch_page  # noqa: E402
+
+USER_ID = "benchmark-user"
+
+
+async def seed(db, docs: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    batch = 10_000
+    for start in range(0, docs, batch):
+        await db.token_transactions.insert_many([
+            {"user_id": USER_ID, "type": "earn", "amount": rng.randint(1, 50),
+             # second resolution so that created_at ties exercise the _id tie-break
+             "created_at": now - timedelta(seconds=rng.randint(0, docs // 2))}
+            for _ in range(min(batch, docs - start))
+        ])
+    await ensure_indexes(db)
+
+
+async def timed(call, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await call()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+async def main_async(args):
+    client = AsyncIOMotorClient(args.mongo)
+    db = client[args.db]
+    await client.drop_database(args.db)
+    try:
+        await seed(db, args.docs)
+        query = {"user_id": USER_ID}
+
+        print(f"{'page':>8}{'skip ms':>12}{'cursor ms':>12}")
+        for page in args.pages:
+            offset = page * args.limit
+            if offset >= args.docs:
+                break
+            # Cursor for this page: the document just before it
+            previous = await db.token_transactions.find(query).sort(SORT).skip(offset - 1).limit(1).to_list(length=1) \
+                if offset else []
+            cursor = encode_cursor(previous[0]) if previous else None
+
+            skip_ms = await timed(lambda: fetch_page(db.token_transactions, query, args.limit, skip=offset), args.repeats)
+            cursor_ms = await timed(lambda: fetch_page(db.token_transactions, query, args.limit, cursor=cursor), args.repeats)
+
+            skip_page, _ = await fetch_page(db.token_transactions, query, args.limit, skip=offset)
+            cursor_page, _ = await fetch_page(db.token_transactions, query, args.limit, cursor=cursor)
+            assert [d["_id"] for d in skip_page] == [d["_id"] for d in cursor_page], f"page {page} differs"
+
+            print(f"{page:>8}{skip_ms:>12.2f}{cursor_ms:>12.2f}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="praychain_pagination_benchmark")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, nargs="+", default=[0, 10, 100, 1000, 4000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Static content micro-benchmark.
+
+Compares the previous per-request path for /prayers, /prayer/{id} and
+/short-quote (resolve the language from CLASSIC_PRAYERS / SHORT_BIBLE_QUOTES,
+then render JSON the way FastAPI's JSONResponse does) with the precompiled
+byte bodies from src.data.static_content.
+
+    poetry run python benchmarks/static_content_benchmark.py --iterations 200000
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.prayers import CLASSIC_PRAYERS  # noqa: E402
+from src.data.quotes import SHORT_BIBLE_QUOTES  # noqa: E402
+from src.data.static_content import PRAYER_BODIES, PRAYER_LIST_BODIES, QUOTE_BODIES  # noqa: E402
+
+
+def render(content) -> bytes:
+    # starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def legacy_prayers(lang: str) -> bytes:
+    prayers = []
+    for prayer_id, prayer_data in CLASSIC_PRAYERS.items():
+        if isinstance(prayer_data["title"], dict):
+            title = prayer_data["title"].get(lang, prayer_data["title"]["en"])
+        else:
+            title = prayer_data["title"]
+        prayers.append({"id": prayer_id, "title": title, "reference": prayer_data["reference"]})
+    return render({"prayers": prayers})
+
+
+def legacy_prayer(prayer_id: str, lang: str) -> bytes:
+    prayer_data = CLASSIC_PRAYERS[prayer_id]
+    if isinstance(prayer_data["title"], dict):
+        title = prayer_data["title"].get(lang, prayer_data["title"]["en"])
+    else:
+        title = prayer_data["title"]
+    if isinstance(prayer_data["text"], dict):
+        text = prayer_data["text"].get(lang, prayer_data["text"]["en"])
+    else:
+        text = prayer_data["text"]
+    return render({"id": prayer_id, "title": title, "text": text, "reference": prayer_data["reference"]})
+
+
+def legacy_short_quote(lang: str) -> bytes:
+    quote = random.choice(SHORT_BIBLE_QUOTES)
+    return render({
+        "text": quote.get(f"text_{lang}", quote["text_en"]),
+        "reference": quote["reference"],
+        "category": quote.get("category", "inspiration"),
+        "type": "short_quote"
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--lang", default="pl", choices=("en", "pl", "es"))
+    args = parser.parse_args()
+
+    lang = args.lang
+    prayer_id = next(iter(CLASSIC_PRAYERS))
+    assert legacy_prayers(lang) == PRAYER_LIST_BODIES[lang]
+    assert legacy_prayer(prayer_id, lang) == PRAYER_BODIES[lang][prayer_id]
+
+    cases = [
+        ("prayers", lambda: legacy_prayers(lang), lambda: PRAYER_LIST_BODIES[lang]),
+        ("prayer/{id}", lambda: legacy_prayer(prayer_id, lang), lambda: PRAYER_BODIES[lang].get(prayer_id)),
+        ("short-quote", lambda: legacy_short_quote(lang), lambda: random.choice(QUOTE_BODIES[lang])),
+    ]
+
+    print(f"{'endpoint':<14}{'legacy us/op':>14}{'precompiled us/op':>20}{'speedup':>10}")
+    for name, legacy, precompiled in cases:
+        legacy_us = timeit.timeit(legacy, number=args.iterations) / args.iterations * 1e6
+        precompiled_us = timeit.timeit(precompiled, number=args.iterations) / args.iterations * 1e6
+        print(f"{name:<14}{legacy_us:>14.3f}{precompiled_us:>20.3f}{legacy_us / precompiled_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from src.config import settings
-from src.utils.mongodb import connect_to_mongo, close_mongo_connection
-from src.routers import base, transcription, analysis, bible, prayer, tokens, charity, users
+from src.utils.http_cache import HTTPCacheMiddleware, CachePolicy
+from src.utils.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from src.utils.voice_verification import voice_client
+from src.utils.audio_storage import audio_lifecycle
+from src.utils.bible_store import bible_store
+from src.utils.bible_api import bible_api
+from src.utils.bible_prefetch import bible_prefetcher
+from src.utils.bible_search import bible_search
+from src.utils.daily_reading import daily_reading_scheduler
+from src.utils.verse_sampler import verse_sampler
+from src.utils.leaderboards import leaderboards
+from src.utils.balances import balances
+from src.routers import base, transcription, analysis, bible, prayer, tokens, charity, users, exports
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,10 +30,40 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting PrayChain API...")
     await connect_to_mongo()
+    try:
+        await leaderboards.load(get_database())
+    except Exception as e:
+        # Endpoints retry the load on first use
+        logger.error(f"Failed to load leaderboards: {e}")
+    leaderboards.start()
+    if settings.BALANCE_RECONCILER_ENABLED:
+        balances.start(get_database)
+    if settings.VOICE_VERIFICATION_ENABLED:
+        await voice_client.start()
+    audio_lifecycle.start()
+    await bible_api.start()
+    for lang in ("en", "pl", "es"):
+        chapters = await asyncio.to_thread(verse_sampler.load, lang)
+        logger.info(f"Verse sampler ({lang}): {chapters} chapters, {verse_sampler.verse_count(lang)} verses")
+        verses = await asyncio.to_thread(bible_search.load, lang)
+        logger.info(f"Bible search index ({lang}): {verses} verses")
+    daily_reading_scheduler.start()
+    if settings.BIBLE_PREFETCH_ON_STARTUP and settings.BIBLE_STORE_ENABLED:
+        bible_prefetcher.start()
     logger.info(f"Server running on {settings.BACKEND_HOST}:{settings.BACKEND_PORT}")
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await bible_prefetcher.stop()
+    await leaderboards.stop()
+    await balances.stop()
+    await daily_reading_scheduler.stop()
+    await audio_lifecycle.stop()
+    await voice_client.close()
+    await bible_api.close()
+    bible_search.save_all()
+    bible_search.close()
+    bible_store.close()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -30,6 +72,20 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Added before CORS so that cached replies still get CORS headers
+if settings.HTTP_CACHE_ENABLED:
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        policies={
+            "/api/bible/books": CachePolicy("public, max-age=86400", memory_ttl=None),
+            "/api/bible/prayers": CachePolicy("public, max-age=86400", memory_ttl=None),
+            "/api/bible/prayer/{prayer_id}": CachePolicy("public, max-age=86400", memory_ttl=None),
+            "/api/charity/categories": CachePolicy("public, max-age=86400", memory_ttl=None),
+            "/api/bible/chapter": CachePolicy("public, max-age=86400", memory_ttl=3600),
+        },
+        max_entries=settings.HTTP_CACHE_MAX_ENTRIES
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -47,6 +103,7 @@ app.include_router(prayer.router)
 app.include_router(tokens.router)
 app.include_router(charity.router)
 app.include_router(users.router)
+app.include_router(exports.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -8,6 +8,39 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str
     MONGO_DB_NAME: str = "praychain"
+    MONGO_ENSURE_INDEXES: bool = True
+    # Test/CI mode: explain() router queries at startup and refuse to start on COLLSCAN
+    MONGO_QUERY_PLAN_GUARD: bool = False
+    # Multi-document transactions (donations); requires a replica set
+    MONGO_TRANSACTIONS_ENABLED: bool = False
+    # Serve /stats endpoints from $inc-maintained documents; they are only used (and only
+    # incremented) after `python -m src.utils.stats rebuild` has run, which is safe while live
+    STATS_DOCUMENTS_ENABLED: bool = False
+    # In-process cache of user display names (donor lists, leaderboards)
+    USER_NAME_CACHE_MAX_ENTRIES: int = 10000
+    USER_NAME_CACHE_TTL_SECONDS: float = 3600
+    # In-memory leaderboards; rebuild the snapshot with `python -m src.utils.leaderboards rebuild`
+    LEADERBOARD_SNAPSHOT_PATH: str = "data/leaderboards.json"
+    LEADERBOARD_SNAPSHOT_INTERVAL_SECONDS: float = 300
+    # Older snapshots are ignored in favour of a full rebuild
+    LEADERBOARD_SNAPSHOT_MAX_AGE_SECONDS: float = 24 * 3600
+    # Catch-up after loading a snapshot starts this long before it was taken (entries are
+    # recorded after their created_at); must exceed the time between stamping and recording one
+    LEADERBOARD_CATCH_UP_OVERLAP_SECONDS: float = 60
+    # Bearer token required by /api/exports (unset: exports are disabled)
+    EXPORT_API_TOKEN: Optional[str] = None
+    # Balance projections (token_balances/users) cached per process, and the ledger reconciler
+    BALANCE_CACHE_MAX_ENTRIES: int = 10000
+    BALANCE_CACHE_TTL_SECONDS: float = 30
+    # /api/users profile cache, invalidated on wallet/balance/prayer writes
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000
+    PROFILE_CACHE_TTL_SECONDS: float = 30
+    # Before enabling run `python -m src.utils.balances backfill-donations`, then
+    # `backfill-opening-balances` (until it reports no skipped users), then a --dry-run reconcile.
+    # Until the opening balances are backfilled the reconciler never lowers a balance.
+    BALANCE_RECONCILER_ENABLED: bool = False
+    BALANCE_RECONCILE_INTERVAL_SECONDS: float = 3600
+    BALANCE_RECONCILE_BATCH_SIZE: int = 1000
     
     # Backend
     BACKEND_HOST: str = "0.0.0.0"
@@ -32,6 +65,14 @@ class Settings(BaseSettings):
     VOICE_SIMILARITY_THRESHOLD: float = 0.85
     VOICE_SIMILARITY_BONUS_MULTIPLIER: int = 10
     AI_VOICE_DETECTION_THRESHOLD: float = 0.7
+    VOICE_SERVICE_CONNECT_TIMEOUT: float = 2.0
+    VOICE_SERVICE_READ_TIMEOUT: float = 20.0
+    VOICE_SERVICE_MAX_CONNECTIONS: int = 20
+    VOICE_SERVICE_MAX_KEEPALIVE: int = 10
+    VOICE_SERVICE_HEDGE_DELAY: float = 5.0
+    VOICE_SERVICE_MAX_ATTEMPTS: int = 2
+    VOICE_SERVICE_BREAKER_FAILURES: int = 5
+    VOICE_SERVICE_BREAKER_RESET: float = 30.0
     
     # CAPTCHA
     CAPTCHA_ACCURACY_THRESHOLD: float = 0.75
@@ -46,12 +87,54 @@ class Settings(BaseSettings):
     
     # Bible API
     BIBLE_API_TIMEOUT: float = 5.0
+    BIBLE_API_URL_EN: str = "https://bible-api.com"
+    BIBLE_API_URL_PL: str = "https://bible-proxy.kikpl899.workers.dev/api"
+    BIBLE_API_URL_ES: str = "https://biblia.my.to"
+    BIBLE_API_FALLBACK_URL_EN: Optional[str] = None
+    BIBLE_API_FALLBACK_URL_PL: Optional[str] = "https://www.biblia.info.pl/api"
+    BIBLE_API_FALLBACK_URL_ES: Optional[str] = None
+    BIBLE_UPSTREAM_MAX_ATTEMPTS: int = 3
+    BIBLE_UPSTREAM_MAX_RETRY_AFTER: float = 10.0
     BIBLE_API_ENABLED: bool = True
+    BIBLE_STORE_ENABLED: bool = True
+    BIBLE_STORE_DIR: str = "data/bible"
+    BIBLE_CACHE_MAX_ENTRIES: int = 2048
+    BIBLE_CACHE_TTL_SECONDS: float = 24 * 3600
+    BIBLE_CACHE_STALE_SECONDS: float = 7 * 24 * 3600
+    BIBLE_CACHE_NEGATIVE_TTL_SECONDS: float = 300
+    BIBLE_PREFETCH_ON_STARTUP: bool = False
+    BIBLE_PREFETCH_CONCURRENCY: int = 4
+    BIBLE_PREFETCH_RATE_PER_HOST: float = 2.0
+    VERSE_SAMPLER_MIN_CHAPTERS: int = 50
+    DAILY_READING_DAYS_AHEAD: int = 7
+    DAILY_READING_RETRY_SECONDS: int = 600
+    
+    # HTTP response caching (ETag / Cache-Control for static-ish GET endpoints)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Audio replay detection
+    AUDIO_FINGERPRINT_ENABLED: bool = True
+    AUDIO_FINGERPRINT_MAX_ENTRIES: int = 20000
+    AUDIO_FINGERPRINT_TTL_HOURS: float = 72.0
+    AUDIO_FINGERPRINT_MATCH_THRESHOLD: float = 0.6
     
     # Upload Settings
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024
     ALLOWED_EXTENSIONS: set = {".mp3", ".mp4", ".mpeg", ".mpga", ".m4a", ".wav", ".webm", ".ogg"}
+    
+    # Audio lifecycle (sharding, Opus transcoding, retention)
+    AUDIO_LIFECYCLE_ENABLED: bool = True
+    AUDIO_LIFECYCLE_INTERVAL_SECONDS: int = 600
+    AUDIO_LIFECYCLE_BATCH_SIZE: int = 100
+    AUDIO_LIFECYCLE_MAX_BYTES_PER_SEC: int = 5 * 1024 * 1024
+    AUDIO_TRANSCODE_ENABLED: bool = True
+    AUDIO_TRANSCODE_BITRATE: str = "24k"
+    AUDIO_TRANSCODE_GRACE_MINUTES: int = 10
+    AUDIO_TRANSCODE_AFTER_HOURS: int = 24
+    AUDIO_RETENTION_DAYS: int = 90
+    AUDIO_ARCHIVE_DIR: Optional[str] = None
 
     class Config:
         env_file = ".env"
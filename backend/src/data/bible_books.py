@@ -0,0 +1,123 @@
+# Immutable per-language book catalog built once at import time from
+# bible_structure, with O(1) indexes and the pre-serialized /books body
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from src.data.bible_structure import (
+    BIBLE_BOOKS_ORDER,
+    BIBLE_BOOKS_ORDER_ES,
+    BIBLE_BOOKS_ORDER_PL,
+    CHAPTERS_PER_BOOK,
+)
+
+# English names -> biblia.info.pl API abbreviations
+POLISH_BOOK_CODES = {
+    # Old Testament
+    "Genesis": "rdz", "Exodus": "wj", "Leviticus": "kpl", "Numbers": "lb",
+    "Deuteronomy": "pwt", "Joshua": "joz", "Judges": "sdz", "Ruth": "rt",
+    "1 Samuel": "1sm", "2 Samuel": "2sm", "1 Kings": "1krl", "2 Kings": "2krl",
+    "1 Chronicles": "1krn", "2 Chronicles": "2krn", "Ezra": "ezd", "Nehemiah": "ne",
+    "Esther": "est", "Job": "hi", "Psalms": "ps", "Proverbs": "prz",
+    "Ecclesiastes": "koh", "Song of Solomon": "pnp", "Isaiah": "iz", "Jeremiah": "jr",
+    "Lamentations": "lm", "Ezekiel": "ez", "Daniel": "dn", "Hosea": "oz",
+    "Joel": "jl", "Amos": "am", "Obadiah": "ab", "Jonah": "jon", "Micah": "mi",
+    "Nahum": "na", "Habakkuk": "ha", "Zephaniah": "so", "Haggai": "ag",
+    "Zechariah": "za", "Malachi": "ml",
+    # New Testament
+    "Matthew": "mt", "Mark": "mk", "Luke": "lk", "John": "j", "Acts": "dz",
+    "Romans": "rz", "1 Corinthians": "1kor", "2 Corinthians": "2kor",
+    "Galatians": "ga", "Ephesians": "ef", "Philippians": "flp", "Colossians": "kol",
+    "1 Thessalonians": "1tes", "2 Thessalonians": "2tes", "1 Timothy": "1tm",
+    "2 Timothy": "2tm", "Titus": "tt", "Philemon": "flm", "Hebrews": "hbr",
+    "James": "jk", "1 Peter": "1p", "2 Peter": "2p", "1 John": "1j",
+    "2 John": "2j", "3 John": "3j", "Jude": "jud", "Revelation": "ap"
+}
+
+# English names -> biblia.my.to book ids
+SPANISH_BOOK_CODES = {
+    "Genesis": "GEN", "Exodus": "EXO", "Leviticus": "LEV",
+    "Numbers": "NUM", "Deuteronomy": "DEU",
+    "Joshua": "JOS", "Judges": "JDG", "Ruth": "RUT",
+    "1 Samuel": "1SA", "2 Samuel": "2SA",
+    "1 Kings": "1KI", "2 Kings": "2KI",
+    "1 Chronicles": "1CH", "2 Chronicles": "2CH",
+    "Ezra": "EZR", "Nehemiah": "NEH", "Esther": "EST",
+    "Job": "JOB", "Psalms": "PSA", "Proverbs": "PRO",
+    "Ecclesiastes": "ECC", "Song of Solomon": "SNG",
+    "Isaiah": "ISA", "Jeremiah": "JER", "Lamentations": "LAM",
+    "Ezekiel": "EZK", "Daniel": "DAN",
+    "Hosea": "HOS", "Joel": "JOL", "Amos": "AMO",
+    "Obadiah": "OBA", "Jonah": "JON", "Micah": "MIC",
+    "Nahum": "NAM", "Habakkuk": "HAB", "Zephaniah": "ZEP",
+    "Haggai": "HAG", "Zechariah": "ZEC", "Malachi": "MAL",
+    "Matthew": "MAT", "Mark": "MRK", "Luke": "LUK", "John": "JHN",
+    "Acts": "ACT", "Romans": "ROM",
+    "1 Corinthians": "1CO", "2 Corinthians": "2CO",
+    "Galatians": "GAL", "Ephesians": "EPH",
+    "Philippians": "PHP", "Colossians": "COL",
+    "1 Thessalonians": "1TH", "2 Thessalonians": "2TH",
+    "1 Timothy": "1TI", "2 Timothy": "2TI",
+    "Titus": "TIT", "Philemon": "PHM", "Hebrews": "HEB",
+    "James": "JAS", "1 Peter": "1PE", "2 Peter": "2PE",
+    "1 John": "1JN", "2 John": "2JN", "3 John": "3JN",
+    "Jude": "JUD", "Revelation": "REV"
+}
+
+class BibleBook(NamedTuple):
+    id: str             # English name, used as the book id across the API
+    name: str           # Localized display name
+    abbreviation: str
+    chapters: int
+    upstream_code: str  # Book code used by the upstream API for this language
+    position: int
+
+class BookCatalog:
+    """Books of one language in canonical order with lookup indexes"""
+
+    def __init__(self, lang: str, names, upstream_codes: Optional[Dict[str, str]] = None):
+        self.lang = lang
+        self.books: Tuple[BibleBook, ...] = tuple(
+            BibleBook(
+                id=english_book,
+                name=name,
+                abbreviation=name[:3],
+                chapters=CHAPTERS_PER_BOOK.get(english_book, 1),
+                upstream_code=(upstream_codes or {}).get(english_book, english_book),
+                position=position
+            )
+            for position, (english_book, name) in enumerate(zip(BIBLE_BOOKS_ORDER, names))
+        )
+        self.by_id: Mapping[str, BibleBook] = MappingProxyType({b.id: b for b in self.books})
+        self.by_name: Mapping[str, BibleBook] = MappingProxyType({b.name.casefold(): b for b in self.books})
+        self.by_upstream_code: Mapping[str, BibleBook] = MappingProxyType(
+            {b.upstream_code.casefold(): b for b in self.books}
+        )
+
+        # Same shape get_books() always returned; served as-is by /api/bible/books
+        self.payload: Tuple[Dict, ...] = tuple(
+            {"id": b.id, "name": b.name, "abbreviation": b.abbreviation, "chapters": b.chapters}
+            for b in self.books
+        )
+        self.books_body: bytes = json.dumps(
+            {"books": list(self.payload)}, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.books_etag: str = f'"{hashlib.sha256(self.books_body).hexdigest()[:32]}"'
+
+    def resolve(self, book: str) -> Optional[BibleBook]:
+        """Book by English id, localized name or upstream code (case-insensitive for the latter two)"""
+        found = self.by_id.get(book)
+        if found is not None:
+            return found
+        key = book.casefold()
+        return self.by_name.get(key) or self.by_upstream_code.get(key)
+
+BOOK_CATALOGS: Mapping[str, BookCatalog] = MappingProxyType({
+    "en": BookCatalog("en", BIBLE_BOOKS_ORDER),
+    "pl": BookCatalog("pl", BIBLE_BOOKS_ORDER_PL, POLISH_BOOK_CODES),
+    "es": BookCatalog("es", BIBLE_BOOKS_ORDER_ES, SPANISH_BOOK_CODES),
+})
+
+def get_catalog(lang: str) -> BookCatalog:
+    return BOOK_CATALOGS.get(lang, BOOK_CATALOGS["en"])
@@ -0,0 +1,67 @@
+# Prayers and short quotes compiled once at import time into per-language,
+# pre-encoded JSON bodies (same bytes FastAPI's JSONResponse would render)
+import json
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+from src.data.prayers import CLASSIC_PRAYERS
+from src.data.quotes import SHORT_BIBLE_QUOTES
+
+LANGUAGES = ("en", "pl", "es")
+
+def encode(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def _localized(value, lang: str):
+    if isinstance(value, dict):
+        return value.get(lang, value["en"])
+    return value
+
+def _compile_prayers():
+    list_bodies: Dict[str, bytes] = {}
+    prayer_bodies: Dict[str, Mapping[str, bytes]] = {}
+    for lang in LANGUAGES:
+        summaries = []
+        bodies = {}
+        for prayer_id, prayer_data in CLASSIC_PRAYERS.items():
+            title = _localized(prayer_data["title"], lang)
+            summaries.append({
+                "id": prayer_id,
+                "title": title,
+                "reference": prayer_data["reference"]
+            })
+            bodies[prayer_id] = encode({
+                "id": prayer_id,
+                "title": title,
+                "text": _localized(prayer_data["text"], lang),
+                "reference": prayer_data["reference"]
+            })
+        list_bodies[lang] = encode({"prayers": summaries})
+        prayer_bodies[lang] = MappingProxyType(bodies)
+    return MappingProxyType(list_bodies), MappingProxyType(prayer_bodies)
+
+def _compile_quotes():
+    quote_bodies: Dict[str, Tuple[bytes, ...]] = {}
+    by_category: Dict[str, Mapping[str, Tuple[bytes, ...]]] = {}
+    for lang in LANGUAGES:
+        bodies = []
+        categories: Dict[str, list] = {}
+        for quote in SHORT_BIBLE_QUOTES:
+            category = quote.get("category", "inspiration")
+            body = encode({
+                "text": quote.get(f"text_{lang}", quote["text_en"]),
+                "reference": quote["reference"],
+                "category": category,
+                "type": "short_quote"
+            })
+            bodies.append(body)
+            categories.setdefault(category, []).append(body)
+        quote_bodies[lang] = tuple(bodies)
+        by_category[lang] = MappingProxyType({category: tuple(items) for category, items in categories.items()})
+    return MappingProxyType(quote_bodies), MappingProxyType(by_category)
+
+# lang -> {"prayers": [...]} body; lang -> prayer_id -> prayer body
+PRAYER_LIST_BODIES, PRAYER_BODIES = _compile_prayers()
+
+# lang -> all quote bodies; lang -> category -> quote bodies
+QUOTE_BODIES, QUOTE_BODIES_BY_CATEGORY = _compile_quotes()
@@ -1,11 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
 class DonationRequest(BaseModel):
     user_id: str
     charity_id: str
-    tokens_amount: int
+    tokens_amount: int = Field(gt=0)
 
 class DonationResponse(BaseModel):
     donation_id: str
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class TranscriptionResponse(BaseModel):
     id: str
@@ -7,7 +8,7 @@ class TranscriptionResponse(BaseModel):
     language: str
     duration: float
     created_at: datetime
-    file_path: str
+    file_path: Optional[str] = None
 
 class AudioUploadResponse(BaseModel):
     transcription: TranscriptionResponse
@@ -8,6 +8,7 @@ import httpx
 
 from src.config import settings
 from src.utils.mongodb import get_database
+from src.utils import stats
 from src.models.analysis import AnalysisResponse, AnalysisMetrics, TokenBreakdown
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
@@ -145,6 +146,7 @@ async def analyze_with_reference(transcription_id: str, reference_text: str):
     }
     
     await db.analyses.insert_one(analysis_data)
+    await stats.record_analysis(db, analysis_data)
     
     return AnalysisResponse(
         transcription_id=transcription_id,
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from src.utils import metrics
+
 router = APIRouter()
 
 @router.get("/")
@@ -24,3 +26,8 @@ async def health_check():
 async def api_health_check():
     """Health check endpoint under /api prefix"""
     return {"status": "ok", "service": "praychain-backend"}
+
+@router.get("/api/metrics")
+async def get_metrics():
+    """In-process latency histograms and counters"""
+    return metrics.snapshot()
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+import asyncio
+import httpx
 import logging
 import random
 from datetime import datetime
+from typing import Optional
 
-from src.data.prayers import CLASSIC_PRAYERS
-from src.data.quotes import SHORT_BIBLE_QUOTES
+from src.data.bible_books import get_catalog
+from src.data.static_content import PRAYER_BODIES, PRAYER_LIST_BODIES, QUOTE_BODIES, QUOTE_BODIES_BY_CATEGORY
 from src.utils.bible_api import bible_api
+from src.utils.bible_search import bible_search
+from src.utils.bible_store import bible_store
+from src.utils.daily_reading import daily_reading_scheduler
+from src.utils.http_cache import etag_matches
 
 router = APIRouter(prefix="/api/bible", tags=["bible"])
 logger = logging.getLogger(__name__)
@@ -23,19 +30,21 @@ async def get_random_bible_quote(lang: str = Query("en", regex="^(en|pl|es)$")):
         raise HTTPException(status_code=500, detail="Failed to fetch random quote")
 
 @router.get("/short-quote")
-async def get_short_quote(lang: str = Query("en", regex="^(en|pl|es)$")):
+async def get_short_quote(
+    lang: str = Query("en", regex="^(en|pl|es)$"),
+    category: Optional[str] = Query(None, description="Quote category (e.g. 'hope', 'peace')")
+):
     """
     Zwraca krótki cytat biblijny (ZAWSZE z lokalnych danych)
     """
-    quote = random.choice(SHORT_BIBLE_QUOTES)
-    text_key = f"text_{lang}"
+    if category is None:
+        quotes = QUOTE_BODIES[lang]
+    else:
+        quotes = QUOTE_BODIES_BY_CATEGORY[lang].get(category)
+        if not quotes:
+            raise HTTPException(status_code=404, detail="Category not found")
     
-    return {
-        "text": quote.get(text_key, quote["text_en"]),
-        "reference": quote["reference"],
-        "category": quote.get("category", "inspiration"),
-        "type": "short_quote"
-    }
+    return Response(content=random.choice(quotes), media_type="application/json")
 
 @router.get("/daily-reading")
 async def get_daily_reading(lang: str = Query("en", regex="^(en|pl|es)$")):
@@ -44,37 +53,30 @@ async def get_daily_reading(lang: str = Query("en", regex="^(en|pl|es)$")):
     """
     try:
         today = datetime.now().date()
-        seed = int(today.strftime('%Y%m%d'))
-        random.seed(seed)
         
-        books = bible_api.get_books(lang)
-        book = random.choice(books)
+        # Served from the precomputed plan; built on demand if not planned yet
+        reading = daily_reading_scheduler.get(lang, today)
+        if reading is None:
+            reading = await daily_reading_scheduler.build(lang, today)
         
-        max_chapter = book.get("chapters", 30)
-        chapter_num = random.randint(1, min(max_chapter, 30))
-        
-        chapter_data = await bible_api.get_chapter(book["id"], chapter_num, lang)
-        
-        return {
-            **chapter_data,
-            "date": today.isoformat()
-        }
+        return reading
         
     except Exception as e:
         logger.error(f"Error fetching daily reading: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch daily reading: {str(e)}")
 
 @router.get("/books")
-async def list_bible_books(lang: str = Query("en", regex="^(en|pl|es)$")):
+async def list_bible_books(request: Request, lang: str = Query("en", regex="^(en|pl|es)$")):
     """
     Zwraca listę ksiąg Biblii w wybranym języku
     """
-    try:
-        books = bible_api.get_books(lang)
-        return {"books": books}
-    except Exception as e:
-        logger.error(f"Error fetching books: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch books")
+    # Body and ETag are computed once at import time. HTTPCacheMiddleware normally
+    # answers first; the 304 here keeps working with HTTP_CACHE_ENABLED=False
+    catalog = get_catalog(lang)
+    headers = {"ETag": catalog.books_etag, "Cache-Control": "public, max-age=86400"}
+    if etag_matches(request.headers.get("if-none-match", ""), catalog.books_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.books_body, media_type="application/json", headers=headers)
 
 @router.get("/chapter")
 async def get_bible_chapter(
@@ -88,10 +90,63 @@ async def get_bible_chapter(
     try:
         chapter_data = await bible_api.get_chapter(book, chapter, lang)
         return chapter_data
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Error fetching chapter: {e}")
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        raise HTTPException(status_code=503, detail="Bible source temporarily unavailable")
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching chapter: {e}")
+        raise HTTPException(status_code=503, detail="Bible source temporarily unavailable")
     except Exception as e:
         logger.error(f"Error fetching chapter: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch chapter: {str(e)}")
 
+def _search_chapters(q: str, lang: str, skip: int, limit: int):
+    """Index lookup plus the hit chapters from the store (blocking, run in a thread)"""
+    total, hits = bible_search.search(q, lang, skip=skip, limit=limit)
+    chapters = {}
+    for _, book_id, chapter_num, _ in hits:
+        if (book_id, chapter_num) not in chapters:
+            chapters[(book_id, chapter_num)] = bible_store.get(lang, book_id, chapter_num) or {}
+    return total, hits, chapters
+
+@router.get("/search")
+async def search_bible(
+    q: str = Query(..., min_length=2, max_length=200, description="Search query"),
+    lang: str = Query("en", regex="^(en|pl|es)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Wyszukuje wersety w lokalnie zapisanych rozdziałach (ranking BM25)
+    """
+    total, hits, chapters = await asyncio.to_thread(_search_chapters, q, lang, skip, limit)
+    
+    results = []
+    for score, book_id, chapter_num, verse in hits:
+        chapter_data = chapters[(book_id, chapter_num)]
+        text = next((v["text"] for v in chapter_data.get("verses", []) if v.get("verse") == verse), "")
+        book_name = chapter_data.get("book_name", book_id)
+        
+        results.append({
+            "book": book_id,
+            "book_name": book_name,
+            "chapter": chapter_num,
+            "verse": verse,
+            "text": text,
+            "reference": f"{book_name} {chapter_num}:{verse}",
+            "score": round(score, 4)
+        })
+    
+    return {
+        "query": q,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "results": results
+    }
+
 # ========================================
 # PRAYER ENDPOINTS
 # ========================================
@@ -101,44 +156,15 @@ async def get_available_prayers(lang: str = Query("en", regex="^(en|pl|es)$")):
     """
     Zwraca listę dostępnych modlitw
     """
-    prayers = []
-    for prayer_id, prayer_data in CLASSIC_PRAYERS.items():
-        if isinstance(prayer_data["title"], dict):
-            title = prayer_data["title"].get(lang, prayer_data["title"]["en"])
-        else:
-            title = prayer_data["title"]
-        
-        prayers.append({
-            "id": prayer_id,
-            "title": title,
-            "reference": prayer_data["reference"]
-        })
-    
-    return {"prayers": prayers}
+    return Response(content=PRAYER_LIST_BODIES[lang], media_type="application/json")
 
 @router.get("/prayer/{prayer_id}")
 async def get_prayer_by_id(prayer_id: str, lang: str = Query("en", regex="^(en|pl|es)$")):
     """
     Zwraca szczegóły modlitwy w wybranym języku
     """
-    if prayer_id not in CLASSIC_PRAYERS:
+    body = PRAYER_BODIES[lang].get(prayer_id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Prayer not found")
     
-    prayer_data = CLASSIC_PRAYERS[prayer_id]
-    
-    if isinstance(prayer_data["title"], dict):
-        title = prayer_data["title"].get(lang, prayer_data["title"]["en"])
-    else:
-        title = prayer_data["title"]
-    
-    if isinstance(prayer_data["text"], dict):
-        text = prayer_data["text"].get(lang, prayer_data["text"]["en"])
-    else:
-        text = prayer_data["text"]
-    
-    return {
-        "id": prayer_id,
-        "title": title,
-        "text": text,
-        "reference": prayer_data["reference"]
-    }
+    return Response(content=body, media_type="application/json")
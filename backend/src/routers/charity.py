@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from datetime import datetime
+import asyncio
 import logging
 import uuid
 
+from src.config import settings
 from src.utils.celo import send_pray_back_to_treasury
 from src.utils.mongodb import get_database
+from src.utils import stats
+from src.utils import donation_rollups
+from src.utils.leaderboards import leaderboards
+from src.utils.balances import balances, InsufficientBalance
+from src.utils.user_names import get_display_names
+from src.utils.pagination import fetch_page
 from src.models.donation import DonationRequest, DonationResponse
 
 router = APIRouter(prefix="/api/charity", tags=["charity"])
@@ -68,6 +76,84 @@ async def get_charity_action(charity_id: str, lang: str = Query("en", regex="^(e
         logger.error(f"Error fetching charity action: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch charity action")
 
+def _debit_donor(db, donation: dict, charity_title: str, session=None):
+    amount = donation["tokens_spent"]
+    return balances.debit(
+        db,
+        donation["user_id"],
+        amount,
+        source=f"donation:{donation['charity_id']}",
+        description=f"Donation to {charity_title}",
+        transaction_id=f"donation:{donation['_id']}",
+        session=session,
+        user_inc={"total_tokens_donated": amount}
+    )
+
+def _update_charity_counters(db, donation: dict, session=None):
+    return db.charity_actions.update_one(
+        {"_id": donation["charity_id"]},
+        {"$inc": {"total_supported": 1, "total_tokens_raised": donation["tokens_spent"]}},
+        session=session
+    )
+
+async def _write_donation(db, donation: dict, charity_title: str, session) -> dict:
+    marker = await donation_rollups.prepare_donation(db, donation, session=session)
+    transaction = await _debit_donor(db, donation, charity_title, session=session)
+    await db.charity_donations.insert_one(donation, session=session)
+    await _update_charity_counters(db, donation, session=session)
+    await donation_rollups.record_donation(db, donation, session=session, marker=marker)
+    return transaction
+
+async def execute_donation(db, donation: dict, charity_title: str) -> dict:
+    """
+    Debits the user and records the donation, then updates the charity,
+    rollup and stats counters. With MONGO_TRANSACTIONS_ENABLED (replica set
+    required) the donation writes commit or abort together; otherwise the
+    debit is still atomic and guarded, and is reverted if the donation insert
+    fails. Raises InsufficientBalance when the balance does not cover it.
+    """
+    if settings.MONGO_TRANSACTIONS_ENABLED:
+        async with await db.client.start_session() as session:
+            try:
+                transaction = await session.with_transaction(
+                    lambda s: _write_donation(db, donation, charity_title, s)
+                )
+            except Exception:
+                # The debit may have cached a projection that was rolled back
+                balances.invalidate(donation["user_id"])
+                raise
+        await stats.record_donation(db, donation["tokens_spent"], donation["created_at"])
+        return transaction
+
+    # Without a session independent writes overlap: the marker read with the
+    # guarded debit, the ledger entry with token_balances (inside debit()),
+    # and the derived counters with each other, one write per collection
+    marker, transaction = await asyncio.gather(
+        donation_rollups.prepare_donation(db, donation),
+        _debit_donor(db, donation, charity_title),
+        return_exceptions=True
+    )
+    if isinstance(transaction, Exception):
+        raise transaction
+    try:
+        if isinstance(marker, Exception):
+            raise marker
+        await db.charity_donations.insert_one(donation)
+    except Exception:
+        await balances.revert_debit(db, transaction, user_inc={"total_tokens_donated": donation["tokens_spent"]})
+        raise
+    # A failure here must not undo a completed donation
+    results = await asyncio.gather(
+        _update_charity_counters(db, donation),
+        donation_rollups.record_donation(db, donation, marker=marker),
+        stats.record_donation(db, donation["tokens_spent"], donation["created_at"]),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Failed to update donation counters for {donation['_id']}: {result}")
+    return transaction
+
 @router.post("/donate", response_model=DonationResponse)
 async def donate_to_charity(request: DonationRequest):
     try:
@@ -85,19 +171,6 @@ async def donate_to_charity(request: DonationRequest):
                 detail=f"Minimum {charity.get('cost_tokens')} tokens required"
             )
         
-        # Check user balance
-        user = await db.users.find_one({"_id": request.user_id})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        current_balance = user.get("tokens_balance", 0)
-        if current_balance < request.tokens_amount:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient token balance. You have {current_balance} tokens"
-            )
-        
-        # Execute donation
         donation_id = str(uuid.uuid4())
         donation = {
             "_id": donation_id,
@@ -108,32 +181,18 @@ async def donate_to_charity(request: DonationRequest):
             "status": "completed"
         }
         
-        await db.charity_donations.insert_one(donation)
-        
-        # Update user balance
-        new_balance = current_balance - request.tokens_amount
-        await db.users.update_one(
-            {"_id": request.user_id},
-            {
-                "$set": {
-                    "tokens_balance": new_balance
-                },
-                "$inc": {
-                    "total_tokens_donated": request.tokens_amount
-                }
-            }
-        )
+        try:
+            transaction = await execute_donation(db, donation, charity.get("title", request.charity_id))
+        except InsufficientBalance as e:
+            if e.balance is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Insufficient token balance. You have {e.balance} tokens"
+            )
+        new_balance = transaction["tokens_balance"]
         
-        # Zaktualizuj statystyki akcji
-        await db.charity_actions.update_one(
-            {"_id": request.charity_id},
-            {
-                "$inc": {
-                    "total_supported": 1,
-                    "total_tokens_raised": request.tokens_amount
-                }
-            }
-        )
+        leaderboards.record_donation(request.user_id, request.tokens_amount, donation["created_at"], donation_id)
         
         tx_hash = None
         try:
@@ -166,22 +225,32 @@ async def donate_to_charity(request: DonationRequest):
         raise HTTPException(status_code=500, detail=f"Failed to process donation: {str(e)}")
 
 @router.get("/donations/{user_id}")
-async def get_user_donations(user_id: str, skip: int = 0, limit: int = 20):
+async def get_user_donations(
+    user_id: str,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
     """
-    Get user donation history
+    Get user donation history, newest first (pass `next_cursor` back as `cursor`)
     """
     db = get_database()
-    donations = await db.charity_donations.find(
-        {"user_id": user_id}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    try:
+        donations, next_cursor = await fetch_page(
+            db.charity_donations, {"user_id": user_id}, limit, cursor=cursor, skip=skip,
+            projection={"rollup_pending": 0}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    total = await db.charity_donations.count_documents({"user_id": user_id})
-    total_tokens_donated = sum(d.get("tokens_spent", 0) for d in donations)
+    # Totals over all of the user's donations, not just this page
+    rollup = await donation_rollups.get_user_rollup(db, user_id)
     
     return {
-        "total": total,
-        "total_tokens_donated": total_tokens_donated,
-        "donations": donations
+        "total": rollup["total_donations"],
+        "total_tokens_donated": rollup["total_tokens_donated"],
+        "donations": donations,
+        "next_cursor": next_cursor
     }
 
 @router.get("/categories")
@@ -207,17 +276,15 @@ async def get_charity_stats():
     """
     db = get_database()
     
-    total_donations = await db.charity_donations.count_documents({})
-    donations = await db.charity_donations.find().to_list(length=None)
-    total_tokens_donated = sum(d.get("tokens_spent", 0) for d in donations)
+    totals = await stats.get_charity_stats(db)
     
     top_actions = await db.charity_actions.find(
         {"is_active": True}
     ).sort("total_supported", -1).limit(5).to_list(length=5)
     
     return {
-        "total_donations": total_donations,
-        "total_tokens_donated": total_tokens_donated,
+        "total_donations": totals["total_donations"],
+        "total_tokens_donated": totals["total_tokens_donated"],
         "top_actions": [
             {
                 "title": action.get("title"),
@@ -239,15 +306,13 @@ async def get_charity_action_stats(charity_id: str):
     if not charity:
         raise HTTPException(status_code=404, detail="Charity action not found")
     
-    donations = await db.charity_donations.find({"charity_id": charity_id}).to_list(length=None)
-    total_donations = len(donations)
-    total_raised = sum(d.get("tokens_spent", 0) for d in donations)
+    rollup = await donation_rollups.get_charity_rollup(db, charity_id)
     
     return {
         "charity_id": charity_id,
         "title": charity.get("title"),
-        "total_donations": total_donations,
-        "total_raised": total_raised,
+        "total_donations": rollup["total_donations"],
+        "total_raised": rollup["total_raised"],
         "total_supported": charity.get("total_supported", 0)
     }
 
@@ -257,40 +322,74 @@ async def get_user_charity_stats(user_id: str):
     Get user donation statistics
     """
     db = get_database()
-    donations = await db.charity_donations.find({"user_id": user_id}).to_list(length=None)
-    
-    total_donated = sum(d.get("tokens_spent", 0) for d in donations)
-    total_charities = len(set(d.get("charity_id") for d in donations))
+    rollup = await donation_rollups.get_user_rollup(db, user_id)
     
     return {
         "user_id": user_id,
-        "total_donations": len(donations),
-        "total_tokens_donated": total_donated,
-        "charities_supported": total_charities
+        **rollup
     }
 
 @router.get("/leaderboard")
-async def get_charity_leaderboard(limit: int = 10):
+async def get_charity_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    period: str = Query("all_time", regex="^(daily|weekly|all_time)$")
+):
     """
     Get top donors ranking
     """
     db = get_database()
+    await leaderboards.ensure_loaded(db)
+    
+    entries = leaderboards.board("donations", period).top(limit)
+    names = await get_display_names(db, [entry["user_id"] for entry in entries])
     
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$user_id",
-                "total_donated": {"$sum": "$tokens_spent"},
-                "donation_count": {"$sum": 1}
+    return {
+        "period": period,
+        "leaderboard": [
+            {
+                "_id": entry["user_id"],
+                "rank": entry["rank"],
+                "username": names[entry["user_id"]],
+                "total_donated": entry["score"],
+                "donation_count": entry["count"]
             }
-        },
-        {"$sort": {"total_donated": -1}},
-        {"$limit": limit}
-    ]
+            for entry in entries
+        ]
+    }
+
+@router.get("/leaderboard/{user_id}")
+async def get_charity_leaderboard_rank(
+    user_id: str,
+    window: int = Query(5, ge=0, le=50),
+    period: str = Query("all_time", regex="^(daily|weekly|all_time)$")
+):
+    """
+    Donor rank of one user plus the donors `window` places above and below
+    """
+    db = get_database()
+    await leaderboards.ensure_loaded(db)
     
-    leaderboard = await db.charity_donations.aggregate(pipeline).to_list(length=limit)
+    board = leaderboards.board("donations", period)
+    entries = board.around(user_id, window)
+    names = await get_display_names(db, [entry["user_id"] for entry in entries])
     
-    return {"leaderboard": leaderboard}
+    return {
+        "period": period,
+        "user_id": user_id,
+        "rank": board.rank(user_id),
+        "total_donated": board.score(user_id) or 0,
+        "total_donors": len(board),
+        "around": [
+            {
+                "_id": entry["user_id"],
+                "rank": entry["rank"],
+                "username": names[entry["user_id"]],
+                "total_donated": entry["score"],
+                "donation_count": entry["count"]
+            }
+            for entry in entries
+        ]
+    }
 
 @router.get("/actions/{charity_id}/donors")
 async def get_charity_donors(charity_id: str, limit: int = 50):
@@ -322,13 +421,13 @@ async def get_charity_donors(charity_id: str, limit: int = 50):
         
         donors_agg = await db.charity_donations.aggregate(pipeline).to_list(length=limit)
         
-        # Get user information
+        # One batched lookup for all donors (cached names need none)
+        names = await get_display_names(db, [donor["_id"] for donor in donors_agg])
         donors = []
         for donor in donors_agg:
-            user = await db.users.find_one({"_id": donor["_id"]})
             donors.append({
                 "user_id": donor["_id"],
-                "username": user.get("username", "Anonymous") if user else "Anonymous",
+                "username": names[donor["_id"]],
                 "total_donated": donor["total_donated"],
                 "donation_count": donor["donation_count"],
                 "last_donation": donor["last_donation"].isoformat()
@@ -0,0 +1,163 @@
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+from datetime import datetime
+import csv
+import io
+import json
+import logging
+import secrets
+
+from bson import ObjectId
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.mongodb import get_database
+from src.utils.pagination import after_cursor, encode_cursor
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+logger = logging.getLogger(__name__)
+
+class ExportSpec(NamedTuple):
+    time_field: str
+    csv_fields: List[str]
+
+EXPORTS: Dict[str, ExportSpec] = {
+    "token_transactions": ExportSpec("created_at", [
+        "_id", "id", "user_id", "type", "amount", "source", "description", "created_at",
+        "captcha_failed", "on_chain", "tx_hash", "recipient_wallet", "breakdown"
+    ]),
+    "analyses": ExportSpec("created_at", [
+        "_id", "transcription_id", "focus_score", "engagement_score", "text_accuracy", "emotional_stability",
+        "speech_fluency", "tokens_earned", "sentiment", "created_at", "emotions", "breakdown"
+    ]),
+    "charity_donations": ExportSpec("created_at", [
+        "_id", "user_id", "charity_id", "tokens_spent", "status", "created_at"
+    ]),
+    "fraud_logs": ExportSpec("timestamp", [
+        "_id", "user_id", "type", "timestamp", "failure_reasons", "audio_type", "matched_transcription_id",
+        "matched_user_id", "similarity", "scope", "exact", "prayer_transcription_id", "captcha_transcription_id"
+    ]),
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return value
+
+class _NDJSONWriter:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def header(self) -> str:
+        return ""
+
+    def row(self, doc: Dict) -> str:
+        return json.dumps(doc, ensure_ascii=False, separators=(",", ":"), default=_json_default) + "\n"
+
+class _CSVWriter:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields + ["_resume"]
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self._writer.writerow(self.fields)
+        return self._flush()
+
+    def row(self, doc: Dict) -> str:
+        self._writer.writerow([_csv_value(doc.get(field)) for field in self.fields])
+        return self._flush()
+
+async def _stream(collection: str, query: Dict, writer, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Documents in (time field, _id) order, one chunk per batch, so memory
+    stays at one batch whatever the export size. Every record carries a
+    `_resume` token; passing the last one received as `resume` continues
+    the export right after that record.
+    """
+    spec = EXPORTS[collection]
+    db = get_database()
+    cursor = db[collection].find(query).sort([(spec.time_field, 1), ("_id", 1)]).batch_size(batch_size)
+    exported = 0
+    chunk = [writer.header()]
+    try:
+        async for doc in cursor:
+            doc["_resume"] = encode_cursor(doc, spec.time_field)
+            chunk.append(writer.row(doc))
+            exported += 1
+            if exported % batch_size == 0:
+                yield "".join(chunk).encode("utf-8")
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode("utf-8")
+    finally:
+        # Also reached when the client disconnects mid-stream
+        await cursor.close()
+        metrics.counter(f"exports.{collection}.documents").inc(exported)
+        logger.info(f"Exported {exported} {collection} documents")
+
+@router.get("/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    resume: Optional[str] = None,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Streams a full dump of a ledger/analytics collection as NDJSON or CSV,
+    oldest first, optionally limited to [since, until). Documents without a
+    date in the time field cannot be ordered or resumed and are left out.
+    """
+    if not settings.EXPORT_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Exports are disabled (EXPORT_API_TOKEN is not set)")
+    expected = f"Bearer {settings.EXPORT_API_TOKEN}".encode("utf-8")
+    if not secrets.compare_digest((authorization or "").encode("utf-8"), expected):
+        raise HTTPException(status_code=401, detail="Invalid export token")
+
+    spec = EXPORTS.get(collection)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {collection}. Choose from: {', '.join(EXPORTS)}")
+
+    time_range = {"$type": "date"}
+    if since is not None:
+        time_range["$gte"] = since
+    if until is not None:
+        time_range["$lt"] = until
+    query = {spec.time_field: time_range}
+    if resume:
+        try:
+            query = after_cursor(query, resume, time_field=spec.time_field, descending=False)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    writer = _CSVWriter(spec.csv_fields) if format == "csv" else _NDJSONWriter()
+    filename = f"{collection}-{datetime.utcnow():%Y%m%dT%H%M%S}.{writer.extension}"
+    return StreamingResponse(
+        _stream(collection, query, writer, batch_size),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
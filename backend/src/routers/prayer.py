@@ -10,6 +10,8 @@ from src.utils.mongodb import get_database
 from src.models.prayer import PrayerAnalysisRequest, DualAnalysisRequest, DualAnalysisResponse
 from src.config import settings
 from src.utils.voice_verification import verify_recording_session
+from src.utils import stats, profiles
+from src.utils.pagination import fetch_page, count_total
 
 router = APIRouter(prefix="/api/prayer", tags=["prayer"])
 logger = logging.getLogger(__name__)
@@ -54,6 +56,7 @@ async def analyze_prayer_reading(
         }
         
         await db.analyses.insert_one(analysis)
+        await stats.record_analysis(db, analysis)
         
         return analysis
         
@@ -64,10 +67,22 @@ async def analyze_prayer_reading(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/history")
-async def get_prayer_history(skip: int = 0, limit: int = 10):
+async def get_prayer_history(
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True
+):
+    """
+    Prayer history, newest first. Pass `next_cursor` back as `cursor` for the
+    next page; `total` is only computed for the first page.
+    """
     db = get_database()
     
-    analyses = await db.analyses.find().skip(skip).limit(limit).to_list(length=limit)
+    try:
+        analyses, next_cursor = await fetch_page(db.analyses, {}, limit, cursor=cursor, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     history = []
     for analysis in analyses:
@@ -79,29 +94,24 @@ async def get_prayer_history(skip: int = 0, limit: int = 10):
         })
     
     return {
-        "total": await db.analyses.count_documents({}),
-        "prayers": history
+        "total": await count_total(db.analyses, {}) if include_total and not cursor else None,
+        "prayers": history,
+        "next_cursor": next_cursor
     }
 
 @router.get("/stats")
 async def get_prayer_stats():
     db = get_database()
     
-    total_prayers = await db.analyses.count_documents({})
+    totals = await stats.get_prayer_stats(db)
+    total_prayers = totals["total_prayers"]
     
-    analyses = await db.analyses.find().to_list(length=None)
-    total_tokens = sum(
-        10 + int(a.get("focus_score", 0) * 20) + int(a.get("engagement_score", 0) * 15) + 
-        (5 if a.get("sentiment") == "positive" else 0)
-        for a in analyses
-    )
-    
-    avg_focus = sum(a.get("focus_score", 0) for a in analyses) / len(analyses) if analyses else 0
-    avg_engagement = sum(a.get("engagement_score", 0) for a in analyses) / len(analyses) if analyses else 0
+    avg_focus = totals["sum_focus_score"] / total_prayers if total_prayers else 0
+    avg_engagement = totals["sum_engagement_score"] / total_prayers if total_prayers else 0
     
     return {
         "total_prayers": total_prayers,
-        "total_tokens_earned": total_tokens,
+        "total_tokens_earned": totals["total_tokens_earned"],
         "average_focus_score": round(avg_focus, 2),
         "average_engagement_score": round(avg_engagement, 2)
     }
@@ -174,7 +184,14 @@ async def analyze_dual_transcription(request: DualAnalysisRequest, lang: str = Q
         voice_verification = await verify_recording_session(
             prayer_transcription_id=request.prayer_transcription_id,
             captcha_transcription_id=request.captcha_transcription_id,
-            min_similarity=settings.VOICE_SIMILARITY_THRESHOLD
+            min_similarity=settings.VOICE_SIMILARITY_THRESHOLD,
+            user_id=request.user_id
+        )
+        
+        # Recordings are no longer needed in their original format
+        await db.transcriptions.update_many(
+            {"_id": {"$in": [request.prayer_transcription_id, request.captcha_transcription_id]}},
+            {"$set": {"processed_at": datetime.utcnow()}}
         )
         
         if not voice_verification.get("passed", False):
@@ -193,6 +210,8 @@ async def analyze_dual_transcription(request: DualAnalysisRequest, lang: str = Q
                     "ai_detection_model": voice_verification.get("details", {}).get("ai_detection_model", ""),
                     "voice_matching_model": voice_verification.get("details", {}).get("voice_matching_model", ""),
                     "threshold": float(voice_verification.get("details", {}).get("threshold", 0.0)),
+                    "cross_account_matches": voice_verification.get("details", {}).get("cross_account_matches", []),
+                    "replay_detected": bool(voice_verification.get("details", {}).get("replay_detected", False)),
                     "ai_detection_details": {
                         k: float(v) if isinstance(v, (np.number, np.floating, np.integer)) else v
                         for k, v in voice_verification.get("details", {}).get("ai_detection_details", {}).items()
@@ -273,6 +292,7 @@ async def analyze_dual_transcription(request: DualAnalysisRequest, lang: str = Q
                     "$set": {"updated_at": datetime.utcnow()}
                 }
             )
+            profiles.invalidate(request.user_id)
             
             logger.info(f"Awarded {tokens_earned} tokens to user {request.user_id}")
             message = f"Success! You earned {tokens_earned} tokens (Voice verified ✓, Human: {voice_verification['human_confidence']*100:.0f}%)"
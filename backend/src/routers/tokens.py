@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel
-import uuid
 import logging
 
 from src.utils.celo import send_pray_to_user_wallet, get_pray_balance
 from src.utils.mongodb import get_database
+from src.utils.leaderboards import leaderboards
+from src.utils.balances import balances
+from src.utils.user_names import get_display_names
+from src.utils.pagination import fetch_page, count_total
 from src.models.token import TokenBalance, AddTokensRequest, AwardTokensRequest
 
 router = APIRouter(prefix="/api/tokens", tags=["tokens"])
@@ -34,19 +37,8 @@ async def get_user_wallet_address(db, user_id: str) -> Optional[str]:
 async def get_token_balance(user_id: str):
     try:
         db = get_database()
-        balance = await db.token_balances.find_one({"user_id": user_id})
-        
-        if not balance:
-            return TokenBalance(
-                user_id=user_id,
-                total_earned=0,
-                total_spent=0,
-                current_balance=0,
-                last_updated=datetime.utcnow()
-            )
-        
-        balance["_id"] = str(balance["_id"])
-        return balance
+        balance = await balances.get_balance(db, user_id)
+        return {**balance, "last_updated": balance["last_updated"] or datetime.utcnow()}
         
     except Exception as e:
         logger.error(f"Error fetching token balance: {e}")
@@ -89,49 +81,18 @@ async def add_tokens_manually(request: AddTokensRequest):
     try:
         db = get_database()
         
-        balance_doc = await db.token_balances.find_one({"user_id": request.user_id})
-        
-        if not balance_doc:
-            balance_doc = {
-                "user_id": request.user_id,
-                "total_earned": request.amount,
-                "total_spent": 0,
-                "current_balance": request.amount,
-                "last_updated": datetime.utcnow()
-            }
-            await db.token_balances.insert_one(balance_doc)
-        else:
-            new_total_earned = balance_doc["total_earned"] + request.amount
-            new_current_balance = balance_doc["current_balance"] + request.amount
-            
-            await db.token_balances.update_one(
-                {"user_id": request.user_id},
-                {
-                    "$set": {
-                        "total_earned": new_total_earned,
-                        "current_balance": new_current_balance,
-                        "last_updated": datetime.utcnow()
-                    }
-                }
-            )
-        
-        transaction = {
-            "id": str(uuid.uuid4()),
-            "user_id": request.user_id,
-            "type": "earn",
-            "amount": request.amount,
-            "source": request.source,
-            "description": request.description or f"Admin added {request.amount} tokens",
-            "created_at": datetime.utcnow()
-        }
-        await db.token_transactions.insert_one(transaction)
-        
-        updated_balance = await db.token_balances.find_one({"user_id": request.user_id})
+        transaction = await balances.credit(
+            db,
+            request.user_id,
+            request.amount,
+            source=request.source,
+            description=request.description or f"Admin added {request.amount} tokens"
+        )
         
         return {
             "success": True,
             "message": f"Added {request.amount} tokens to user {request.user_id}",
-            "new_balance": updated_balance["current_balance"],
+            "new_balance": transaction["balance"]["current_balance"],
             "transaction_id": transaction["id"]
         }
         
@@ -141,46 +102,108 @@ async def add_tokens_manually(request: AddTokensRequest):
 
 
 @router.get("/transactions/{user_id}")
-async def get_transactions(user_id: str, skip: int = 0, limit: int = 20):
+async def get_transactions(
+    user_id: str,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True
+):
+    """
+    Transactions newest first. Pass `next_cursor` back as `cursor` for the
+    next page; `total` is only computed for the first page.
+    """
     try:
         db = get_database()
         
-        transactions = await db.token_transactions.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+        query = {"user_id": user_id}
+        transactions, next_cursor = await fetch_page(db.token_transactions, query, limit, cursor=cursor, skip=skip)
         
         for transaction in transactions:
             transaction["_id"] = str(transaction["_id"])
         
         return {
             "transactions": transactions,
-            "total": await db.token_transactions.count_documents({"user_id": user_id})
+            "total": await count_total(db.token_transactions, query) if include_total and not cursor else None,
+            "next_cursor": next_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching transactions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/leaderboard")
-async def get_leaderboard(limit: int = 10):
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    period: str = Query("all_time", regex="^(daily|weekly|all_time)$")
+):
     try:
         db = get_database()
+        await leaderboards.ensure_loaded(db)
         
-        top_users = await db.token_balances.find().sort(
-            "total_earned", -1
-        ).limit(limit).to_list(length=limit)
-        
-        for user in top_users:
-            user["_id"] = str(user["_id"])
+        entries = leaderboards.board("tokens", period).top(limit)
+        names = await get_display_names(db, [entry["user_id"] for entry in entries])
         
-        return {"leaderboard": top_users}
+        return {
+            "period": period,
+            "leaderboard": [
+                {
+                    "rank": entry["rank"],
+                    "user_id": entry["user_id"],
+                    "username": names[entry["user_id"]],
+                    "total_earned": entry["score"]
+                }
+                for entry in entries
+            ]
+        }
         
     except Exception as e:
         logger.error(f"Error fetching leaderboard: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/leaderboard/{user_id}")
+async def get_leaderboard_rank(
+    user_id: str,
+    window: int = Query(5, ge=0, le=50),
+    period: str = Query("all_time", regex="^(daily|weekly|all_time)$")
+):
+    """
+    Rank of one user plus the users `window` places above and below
+    """
+    try:
+        db = get_database()
+        await leaderboards.ensure_loaded(db)
+        
+        board = leaderboards.board("tokens", period)
+        entries = board.around(user_id, window)
+        names = await get_display_names(db, [entry["user_id"] for entry in entries])
+        
+        return {
+            "period": period,
+            "user_id": user_id,
+            "rank": board.rank(user_id),
+            "total_earned": board.score(user_id) or 0,
+            "total_users": len(board),
+            "around": [
+                {
+                    "rank": entry["rank"],
+                    "user_id": entry["user_id"],
+                    "username": names[entry["user_id"]],
+                    "total_earned": entry["score"]
+                }
+                for entry in entries
+            ]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard rank: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/award")
 async def award_tokens_for_prayer(request: AwardTokensRequest):
     try:
@@ -189,20 +212,15 @@ async def award_tokens_for_prayer(request: AwardTokensRequest):
         if request.captcha_accuracy < 0.5:
             logger.warning(f"CAPTCHA failed for user {request.user_id}: {request.captcha_accuracy}")
             
-            transaction = {
-                "id": str(uuid.uuid4()),
-                "user_id": request.user_id,
-                "type": "earn",
-                "amount": 0,
-                "source": f"prayer:{request.transcription_id}",
-                "description": f"CAPTCHA failed (accuracy: {request.captcha_accuracy * 100:.0f}%)",
-                "created_at": datetime.utcnow(),
-                "captcha_failed": True
-            }
-            await db.token_transactions.insert_one(transaction)
-            
-            balance_doc = await db.token_balances.find_one({"user_id": request.user_id})
-            current_balance = balance_doc["current_balance"] if balance_doc else 0
+            transaction = await balances.credit(
+                db,
+                request.user_id,
+                0,
+                source=f"prayer:{request.transcription_id}",
+                description=f"CAPTCHA failed (accuracy: {request.captcha_accuracy * 100:.0f}%)",
+                extra={"captcha_failed": True}
+            )
+            current_balance = transaction["balance"]["current_balance"]
             
             return {
                 "success": False,
@@ -225,59 +243,30 @@ async def award_tokens_for_prayer(request: AwardTokensRequest):
         
         total_tokens = max(0, min(100, total_tokens))
         
-        balance_doc = await db.token_balances.find_one({"user_id": request.user_id})
-        
-        if not balance_doc:
-            balance_doc = {
-                "user_id": request.user_id,
-                "total_earned": total_tokens,
-                "total_spent": 0,
-                "current_balance": total_tokens,
-                "last_updated": datetime.utcnow()
-            }
-            await db.token_balances.insert_one(balance_doc)
-        else:
-            new_total_earned = balance_doc["total_earned"] + total_tokens
-            new_current_balance = balance_doc["current_balance"] + total_tokens
-            
-            await db.token_balances.update_one(
-                {"user_id": request.user_id},
-                {
-                    "$set": {
-                        "total_earned": new_total_earned,
-                        "current_balance": new_current_balance,
-                        "last_updated": datetime.utcnow()
-                    }
+        transaction = await balances.credit(
+            db,
+            request.user_id,
+            total_tokens,
+            source=f"prayer:{request.transcription_id}",
+            description=f"Prayer reading (accuracy: {request.text_accuracy * 100:.0f}%, captcha: {request.captcha_accuracy * 100:.0f}%)",
+            extra={
+                "breakdown": {
+                    "accuracy_points": round(accuracy_points, 1),
+                    "stability_points": round(stability_points, 1),
+                    "fluency_points": round(fluency_points, 1),
+                    "focus_points": round(focus_points, 1),
+                    "penalty_applied": penalty_applied,
+                    "captcha_accuracy": request.captcha_accuracy
                 }
-            )
-        
-        transaction = {
-            "id": str(uuid.uuid4()),
-            "user_id": request.user_id,
-            "type": "earn",
-            "amount": total_tokens,
-            "source": f"prayer:{request.transcription_id}",
-            "description": f"Prayer reading (accuracy: {request.text_accuracy * 100:.0f}%, captcha: {request.captcha_accuracy * 100:.0f}%)",
-            "created_at": datetime.utcnow(),
-            "breakdown": {
-                "accuracy_points": round(accuracy_points, 1),
-                "stability_points": round(stability_points, 1),
-                "fluency_points": round(fluency_points, 1),
-                "focus_points": round(focus_points, 1),
-                "penalty_applied": penalty_applied,
-                "captcha_accuracy": request.captcha_accuracy
             }
-        }
-        await db.token_transactions.insert_one(transaction)
-        
-        updated_balance = await db.token_balances.find_one({"user_id": request.user_id})
+        )
         
         logger.info(f"Awarded {total_tokens} tokens to user {request.user_id} (captcha: {request.captcha_accuracy * 100:.0f}%)")
         
         return {
             "success": True,
             "tokens_earned": total_tokens,
-            "new_balance": updated_balance["current_balance"],
+            "new_balance": transaction["balance"]["current_balance"],
             "transaction_id": transaction["id"],
             "breakdown": transaction["breakdown"]
         }
@@ -312,69 +301,32 @@ async def award_tokens_internal(
         else:
             logger.info(f"User {user_id} wallet_address: {user_wallet_address}")
         
-        # Update user off-chain balance in Mongo
-        balance = await db.token_balances.find_one({"user_id": user_id})
-        
-        if balance:
-            await db.token_balances.update_one(
-                {"user_id": user_id},
-                {
-                    "$inc": {
-                        "total_earned": tokens_earned,
-                        "current_balance": tokens_earned
-                    },
-                    "$set": {"last_updated": datetime.utcnow()}
-                }
-            )
-        else:
-            await db.token_balances.insert_one({
-                "user_id": user_id,
-                "total_earned": tokens_earned,
-                "total_spent": 0,
-                "current_balance": tokens_earned,
-                "last_updated": datetime.utcnow()
-            })
-        
-        # Also update tokens_balance in users collection
-        await db.users.update_one(
-            {"_id": user_id},
-            {
-                "$inc": {
-                    "tokens_balance": tokens_earned,
-                    "total_earned": tokens_earned
-                },
-                "$set": {"updated_at": datetime.utcnow()}
-            }
-        )
-        
-        # Wyliczenie breakdown'u do historii
+        # Ledger entry + off-chain balance projections in Mongo
         accuracy_points = text_accuracy * 50
         stability_points = emotional_stability * 25
         fluency_points = speech_fluency * 15
         focus_points = focus_score * 10
         
-        transaction = {
-            "_id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "type": "earn",
-            "amount": tokens_earned,
-            "source": f"prayer:{transcription_id}",
-            "description": (
+        transaction = await balances.credit(
+            db,
+            user_id,
+            tokens_earned,
+            source=f"prayer:{transcription_id}",
+            description=(
                 f"Prayer reading (accuracy: {int(text_accuracy * 100)}%, "
                 f"captcha: {int(captcha_accuracy * 100)}%)"
             ),
-            "created_at": datetime.utcnow(),
-            "breakdown": {
-                "accuracy_points": round(accuracy_points, 1),
-                "stability_points": round(stability_points, 1),
-                "fluency_points": round(fluency_points, 1),
-                "focus_points": round(focus_points, 1),
-                "penalty_applied": text_accuracy < 0.3,
-                "captcha_accuracy": round(captcha_accuracy, 2)
+            extra={
+                "breakdown": {
+                    "accuracy_points": round(accuracy_points, 1),
+                    "stability_points": round(stability_points, 1),
+                    "fluency_points": round(fluency_points, 1),
+                    "focus_points": round(focus_points, 1),
+                    "penalty_applied": text_accuracy < 0.3,
+                    "captcha_accuracy": round(captcha_accuracy, 2)
+                }
             }
-        }
-        
-        await db.token_transactions.insert_one(transaction)
+        )
 
         # Send PRAY on-chain to user wallet from database
         tx_hash = None
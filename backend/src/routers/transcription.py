@@ -1,19 +1,26 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from typing import Optional
 from datetime import datetime
+import asyncio
 import uuid
 import os
+import hashlib
 import logging
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
 from pathlib import Path
 
 from src.config import settings
 from src.utils.mongodb import get_database
+from src.utils.audio_fingerprint import compute_fingerprint, fingerprint_index
+from src.utils.audio_storage import sharded_path, TIER_ORIGINAL
+from src.utils.pagination import fetch_page, count_total
 from src.models.transcription import TranscriptionResponse, AudioUploadResponse
 
 router = APIRouter(prefix="/api", tags=["transcription"])
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 logger.info("Loading Whisper model...")
 whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
 logger.info("Whisper model loaded on CPU")
@@ -22,7 +29,8 @@ logger.info("Whisper model loaded on CPU")
 async def transcribe_audio(
     file: UploadFile = File(...),
     audio_type: Optional[str] = Query("prayer", regex="^(prayer|captcha)$"),
-    lang: Optional[str] = Query("en", regex="^(en|pl|es)$")
+    lang: Optional[str] = Query("en", regex="^(en|pl|es)$"),
+    user_id: Optional[str] = Query(None)
 ):
     db = get_database()
     
@@ -34,27 +42,71 @@ async def transcribe_audio(
             detail=f"Invalid file type. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
+    # Zapisz plik strumieniowo (walidacja rozmiaru + skrót SHA-256 w locie)
+    file_id = str(uuid.uuid4())
+    file_path = sharded_path(file_id, file_ext)
+    
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    
     # Walidacja rozmiaru
-    contents = await file.read()
-    if len(contents) > settings.MAX_FILE_SIZE:
+    if size > settings.MAX_FILE_SIZE:
+        os.remove(file_path)
         raise HTTPException(
             status_code=413,
             detail=f"File too large. Max size: {settings.MAX_FILE_SIZE / (1024*1024)}MB"
         )
     
-    # Zapisz plik
-    file_id = str(uuid.uuid4())
-    file_path = Path(settings.UPLOAD_DIR) / f"{file_id}{file_ext}"
-    
-    with open(file_path, "wb") as f:
-        f.write(contents)
-    
+    fingerprinted = False
     try:
+        # CPU-bound: decode and fingerprint off the event loop
+        audio = await asyncio.to_thread(decode_audio, str(file_path), sampling_rate=16000)
+        
+        # Replay check before any model inference
+        if settings.AUDIO_FINGERPRINT_ENABLED:
+            fingerprint = await asyncio.to_thread(compute_fingerprint, audio)
+            owner = user_id or "anonymous"
+            match = fingerprint_index.find_match(digest.hexdigest(), fingerprint, owner)
+            
+            if match:
+                logger.warning(
+                    f"Replayed {audio_type} rejected: matches {match.transcription_id} "
+                    f"({match.scope}, similarity {match.similarity:.2f}, exact={match.exact})"
+                )
+                try:
+                    await db.fraud_logs.insert_one({
+                        "_id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "audio_type": audio_type,
+                        "matched_transcription_id": match.transcription_id,
+                        "matched_user_id": match.user_id,
+                        "similarity": match.similarity,
+                        "scope": match.scope,
+                        "exact": match.exact,
+                        "timestamp": datetime.now(),
+                        "type": "audio_replay_detected"
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to log replay attempt: {e}")
+                raise HTTPException(status_code=409, detail="Duplicate recording detected")
+            
+            # Registered right after the check (no await in between) so concurrent
+            # duplicates are caught; dropped again below if this upload fails
+            fingerprint_index.add(file_id, digest.hexdigest(), fingerprint, owner)
+            fingerprinted = True
+        
         logger.info(f"Transcribing {audio_type}: {file_path} (lang: {lang})")
         
         if lang == "auto":
             segments, info = whisper_model.transcribe(
-                str(file_path), 
+                audio, 
                 beam_size=5,
                 vad_filter=True,
                 vad_parameters=dict(min_silence_duration_ms=500)
@@ -63,7 +115,7 @@ async def transcribe_audio(
             logger.info(f"Detected language: {detected_language}")
         else:
             segments, info = whisper_model.transcribe(
-                str(file_path), 
+                audio, 
                 language=lang,
                 beam_size=5,
                 vad_filter=True,
@@ -80,7 +132,9 @@ async def transcribe_audio(
             "language": detected_language,
             "duration": info.duration,
             "file_path": str(file_path),
+            "storage_tier": TIER_ORIGINAL,
             "audio_type": audio_type,
+            "user_id": user_id,
             "created_at": datetime.utcnow()
         }
         
@@ -100,9 +154,16 @@ async def transcribe_audio(
         )
         
     except HTTPException:
+        if fingerprinted:
+            fingerprint_index.discard(file_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
         raise
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
+        # Let the user retry the same recording
+        if fingerprinted:
+            fingerprint_index.discard(file_id)
         if os.path.exists(file_path):
             os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
@@ -125,12 +186,25 @@ async def get_transcription(transcription_id: str):
     )
 
 @router.get("/transcriptions")
-async def list_transcriptions(skip: int = 0, limit: int = 10):
+async def list_transcriptions(
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True
+):
+    """
+    Transcriptions, newest first. Pass `next_cursor` back as `cursor` for the
+    next page; `total` is only computed for the first page.
+    """
     db = get_database()
-    transcriptions = await db.transcriptions.find().skip(skip).limit(limit).to_list(length=limit)
+    try:
+        transcriptions, next_cursor = await fetch_page(db.transcriptions, {}, limit, cursor=cursor, skip=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "total": await db.transcriptions.count_documents({}),
+        "total": await count_total(db.transcriptions, {}) if include_total and not cursor else None,
+        "next_cursor": next_cursor,
         "transcriptions": [
             TranscriptionResponse(
                 id=t["_id"],
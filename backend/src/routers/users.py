@@ -1,38 +1,17 @@
 from fastapi import APIRouter, HTTPException, Body
 from typing import Optional
 from datetime import datetime
-import math
+
+from pymongo import ReturnDocument
 
 from src.utils.mongodb import get_database
+from src.utils.balances import balances
+from src.utils.levels import calculate_level
+from src.utils import profiles
 from src.models.user import UserBase, UserCreate, UserResponse
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
-def calculate_level(total_earned: int):
-    """
-    Calculate user level based on total earned tokens
-    """
-    base_xp = 100
-    multiplier = 1.5
-    
-    level = 1
-    xp_for_current_level = 0
-    xp_for_next_level = base_xp
-    
-    while total_earned >= xp_for_next_level:
-        level += 1
-        xp_for_current_level = xp_for_next_level
-        xp_for_next_level += int(base_xp * math.pow(multiplier, level - 1))
-    
-    current_level_xp = total_earned - xp_for_current_level
-    xp_needed_for_next = xp_for_next_level - xp_for_current_level
-    
-    return {
-        "level": level,
-        "experience": current_level_xp,
-        "experience_to_next_level": xp_needed_for_next
-    }
-
 def extract_username(email: str) -> str:
     """Extract username from email (part before @)"""
     return email.split('@')[0].lower()
@@ -67,6 +46,8 @@ async def create_user(user: UserCreate):
     }
     
     await db.users.insert_one(user_data)
+    # A lookup before registration may have cached "not found"
+    profiles.invalidate(username)
     
     return {
         "id": user_data["_id"],
@@ -92,33 +73,12 @@ async def get_user_by_email(email: str):
     Get user by email (without auto-create)
     """
     db = get_database()
-    email_lower = email.lower()
+    profile = await profiles.get_profile_by_email(db, email.lower())
     
-    user = await db.users.find_one({"email": email_lower})
-    
-    if not user:
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
     
-    total_earned = user.get("total_earned", 0)
-    level_data = calculate_level(total_earned)
-    
-    return {
-        "id": user["_id"],
-        "username": user.get("username"),
-        "email": user.get("email"),
-        "wallet_address": user.get("wallet_address"),
-        "created_at": user.get("created_at"),
-        "updated_at": user.get("updated_at"),
-        "is_active": user.get("is_active", True),
-        "tokens_balance": user.get("tokens_balance", 0),
-        "total_earned": total_earned,
-        "total_donated": user.get("total_donated", 0),
-        "prayers_count": user.get("prayers_count", 0),
-        "streak_days": user.get("streak_days", 0),
-        "level": level_data["level"],
-        "experience": level_data["experience"],
-        "experience_to_next_level": level_data["experience_to_next_level"]
-    }
+    return profile
 
 @router.get("/{user_id}")
 async def get_user(user_id: str):
@@ -126,31 +86,12 @@ async def get_user(user_id: str):
     Get user by ID with calculated level
     """
     db = get_database()
-    user = await db.users.find_one({"_id": user_id})
+    profile = await profiles.get_profile(db, user_id)
     
-    if not user:
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
     
-    total_earned = user.get("total_earned", 0)
-    level_data = calculate_level(total_earned)
-    
-    return {
-        "id": user["_id"],
-        "username": user.get("username"),
-        "email": user.get("email"),
-        "wallet_address": user.get("wallet_address"),
-        "created_at": user.get("created_at"),
-        "updated_at": user.get("updated_at"),
-        "is_active": user.get("is_active", True),
-        "tokens_balance": user.get("tokens_balance", 0),
-        "total_earned": total_earned,
-        "total_donated": user.get("total_donated", 0),
-        "prayers_count": user.get("prayers_count", 0),
-        "streak_days": user.get("streak_days", 0),
-        "level": level_data["level"],
-        "experience": level_data["experience"],
-        "experience_to_next_level": level_data["experience_to_next_level"]
-    }
+    return profile
 
 @router.patch("/{user_id}/wallet")
 async def update_wallet_address(
@@ -179,6 +120,7 @@ async def update_wallet_address(
             }
         }
     )
+    profiles.invalidate(user_id)
     
     return {
         "success": True,
@@ -192,33 +134,26 @@ async def add_tokens_to_user(user_id: str, tokens: int):
     """
     db = get_database()
     
-    user = await db.users.find_one({"_id": user_id})
+    user = await db.users.find_one({"_id": user_id}, {"_id": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    new_balance = user.get("tokens_balance", 0) + tokens
-    new_total_earned = user.get("total_earned", 0) + tokens
-    new_prayers_count = user.get("prayers_count", 0) + 1
-    
-    await db.users.update_one(
+    await balances.credit(db, user_id, tokens, source="prayer:app", description=f"Prayer completed (+{tokens} tokens)")
+    user = await db.users.find_one_and_update(
         {"_id": user_id},
-        {
-            "$set": {
-                "tokens_balance": new_balance,
-                "total_earned": new_total_earned,
-                "prayers_count": new_prayers_count,
-                "updated_at": datetime.utcnow()
-            }
-        }
+        {"$inc": {"prayers_count": 1}},
+        return_document=ReturnDocument.AFTER
     )
+    profiles.invalidate(user_id)
     
+    new_total_earned = user.get("total_earned", 0)
     level_data = calculate_level(new_total_earned)
     
     return {
         "success": True,
-        "tokens_balance": new_balance,
+        "tokens_balance": user.get("tokens_balance", 0),
         "total_earned": new_total_earned,
-        "prayers_count": new_prayers_count,
+        "prayers_count": user.get("prayers_count", 0),
         "level": level_data["level"],
         "experience": level_data["experience"],
         "experience_to_next_level": level_data["experience_to_next_level"]
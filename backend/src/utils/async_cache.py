@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Entry:
+    value: Any
+    error: Optional[Exception]
+    expires_at: float
+    stale_until: float
+
+class AsyncTTLCache:
+    """
+    Size-bounded LRU cache with TTL for async loaders.
+
+    - single-flight: concurrent misses for one key share one loader call,
+    - stale-while-revalidate: an expired entry is still served for
+      `stale_ttl` seconds while one background refresh runs,
+    - negative caching: errors accepted by `is_negative` (e.g. upstream 404)
+      are remembered for `negative_ttl` seconds and re-raised.
+    Hit/miss/coalesced/stale counters are reported under `<name>.*` in metrics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        negative_ttl: float = 0.0,
+        is_negative: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.is_negative = is_negative or (lambda e: False)
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def _count(self, event: str):
+        metrics.counter(f"{self.name}.{event}").inc()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh or stale value without loading (None when absent or negative)"""
+        entry = self._entries.get(key)
+        if entry is None or entry.error is not None or entry.stale_until <= time.monotonic():
+            return None
+        return entry.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Last loaded value regardless of age (last-resort fallback when loading fails)"""
+        entry = self._entries.get(key)
+        if entry is None or entry.error is not None:
+            return None
+        return entry.value
+
+    def set(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, None, now + self.ttl, now + self.ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._count("evicted")
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.expires_at > now:
+                if entry.error is not None:
+                    self._count("negative_hit")
+                    raise entry.error
+                self._count("hit")
+                return entry.value
+            if entry.error is None and entry.stale_until > now:
+                self._count("stale_hit")
+                if key not in self._inflight:
+                    task = self._start_load(key, loader)
+                    task.add_done_callback(self._log_refresh_failure)
+                return entry.value
+
+        if key in self._inflight:
+            self._count("coalesced")
+            return await asyncio.shield(self._inflight[key])
+
+        self._count("miss")
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        # Mark the outcome as retrieved even if every waiter was cancelled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception as e:
+            if self.negative_ttl > 0 and self.is_negative(e):
+                now = time.monotonic()
+                self._entries[key] = _Entry(None, e, now + self.negative_ttl, now + self.negative_ttl)
+                self._entries.move_to_end(key)
+                self._evict()
+            raise
+        else:
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _log_refresh_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self._count("refresh_error")
+            logger.warning(f"{self.name}: background refresh failed: {task.exception()}")
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "maxsize": self.maxsize
+        }
@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+N_FFT = 1024
+HOP_LENGTH = 256
+PEAKS_PER_FRAME = 3
+FAN_OUT = 4
+MAX_TIME_DELTA = 48
+SKETCH_SIZE = 256
+
+def _spectrogram(samples: np.ndarray) -> np.ndarray:
+    """Log-magnitude STFT, shape (frames, bins)"""
+    if len(samples) < N_FFT:
+        samples = np.pad(samples, (0, N_FFT - len(samples)))
+    frames = 1 + (len(samples) - N_FFT) // HOP_LENGTH
+    strides = (samples.strides[0] * HOP_LENGTH, samples.strides[0])
+    windows = np.lib.stride_tricks.as_strided(samples, shape=(frames, N_FFT), strides=strides)
+    spectrum = np.abs(np.fft.rfft(windows * np.hanning(N_FFT).astype(np.float32), axis=1))
+    return np.log1p(spectrum)
+
+def _peaks(spectrogram: np.ndarray):
+    """Strongest local maxima per frame (3x3 neighbourhood), as (frame, bin) pairs"""
+    padded = np.pad(spectrogram, 1, mode="constant", constant_values=-np.inf)
+    neighbourhood = np.full_like(spectrogram, -np.inf)
+    for dt in (0, 1, 2):
+        for df in (0, 1, 2):
+            if dt == 1 and df == 1:
+                continue
+            neighbourhood = np.maximum(
+                neighbourhood,
+                padded[dt:dt + spectrogram.shape[0], df:df + spectrogram.shape[1]]
+            )
+    is_peak = (spectrogram > neighbourhood) & (spectrogram > spectrogram.mean())
+    masked = np.where(is_peak, spectrogram, -np.inf)
+
+    count = min(PEAKS_PER_FRAME, spectrogram.shape[1])
+    top_bins = np.argpartition(-masked, count - 1, axis=1)[:, :count]
+    frames = np.repeat(np.arange(spectrogram.shape[0]), count)
+    bins = top_bins.reshape(-1)
+    valid = np.isfinite(masked[frames, bins])
+    return frames[valid], bins[valid]
+
+def compute_fingerprint(samples: np.ndarray) -> np.ndarray:
+    """
+    Spectral-peak pair hashes (anchor bin, target bin, frame delta) reduced to
+    a bottom-k sketch, so near-identical audio yields mostly the same values
+    regardless of container or re-encoding.
+    """
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    frames, bins = _peaks(_spectrogram(samples))
+    if len(frames) == 0:
+        return np.empty(0, dtype=np.uint32)
+
+    hashes = []
+    for offset in range(1, FAN_OUT + 1):
+        dt = frames[offset:] - frames[:-offset]
+        valid = (dt > 0) & (dt <= MAX_TIME_DELTA)
+        keys = (
+            (bins[:-offset][valid].astype(np.uint64) << 16)
+            | (bins[offset:][valid].astype(np.uint64) << 6)
+            | dt[valid].astype(np.uint64)
+        )
+        hashes.append(keys)
+
+    keys = np.unique(np.concatenate(hashes))
+    # Multiplicative mixing so the bottom-k sketch is a uniform sample of keys
+    mixed = ((keys * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    return np.sort(np.unique(mixed))[:SKETCH_SIZE]
+
+@dataclass
+class FingerprintEntry:
+    user_id: str
+    digest: str
+    hashes: Tuple[int, ...]
+    created_at: float
+
+@dataclass
+class FingerprintMatch:
+    transcription_id: str
+    user_id: str
+    similarity: float
+    scope: str  # "user" (same account) or "global" (another account)
+    exact: bool
+
+class FingerprintIndex:
+    """
+    Bounded in-memory index of recent upload fingerprints.
+    Entries expire after `ttl_seconds` and the oldest are evicted past
+    `max_entries`; an inverted hash -> ids map makes lookups proportional to
+    the sketch size rather than to the number of stored recordings.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, FingerprintEntry]" = OrderedDict()
+        self._postings: Dict[int, Set[str]] = {}
+        self._digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id)
+        for value in entry.hashes:
+            ids = self._postings.get(value)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._postings[value]
+        if self._digests.get(entry.digest) == entry_id:
+            del self._digests[entry.digest]
+
+    def _evict(self, now: float):
+        while self._entries:
+            oldest_id, oldest = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_entries or now - oldest.created_at > self.ttl_seconds:
+                self._remove(oldest_id)
+            else:
+                break
+
+    def find_match(self, digest: str, hashes: np.ndarray, user_id: str) -> Optional[FingerprintMatch]:
+        with self._lock:
+            self._evict(time.time())
+
+            exact_id = self._digests.get(digest)
+            if exact_id is not None:
+                entry = self._entries[exact_id]
+                return FingerprintMatch(
+                    transcription_id=exact_id,
+                    user_id=entry.user_id,
+                    similarity=1.0,
+                    scope="user" if entry.user_id == user_id else "global",
+                    exact=True
+                )
+
+            if len(hashes) == 0:
+                return None
+
+            hits: Dict[str, int] = {}
+            for value in hashes.tolist():
+                for entry_id in self._postings.get(value, ()):
+                    hits[entry_id] = hits.get(entry_id, 0) + 1
+            if not hits:
+                return None
+
+            best_id, best_hits = max(hits.items(), key=lambda item: item[1])
+            entry = self._entries[best_id]
+            similarity = best_hits / max(1, min(len(hashes), len(entry.hashes)))
+            if similarity < self.threshold:
+                return None
+
+            return FingerprintMatch(
+                transcription_id=best_id,
+                user_id=entry.user_id,
+                similarity=round(similarity, 4),
+                scope="user" if entry.user_id == user_id else "global",
+                exact=False
+            )
+
+    def discard(self, entry_id: str):
+        """Forget an entry (no-op if unknown), e.g. when its upload failed"""
+        with self._lock:
+            if entry_id in self._entries:
+                self._remove(entry_id)
+
+    def add(self, entry_id: str, digest: str, hashes: np.ndarray, user_id: str):
+        now = time.time()
+        with self._lock:
+            if entry_id in self._entries:
+                self._remove(entry_id)
+            entry = FingerprintEntry(
+                user_id=user_id,
+                digest=digest,
+                hashes=tuple(hashes.tolist()),
+                created_at=now
+            )
+            self._entries[entry_id] = entry
+            self._digests[digest] = entry_id
+            for value in entry.hashes:
+                self._postings.setdefault(value, set()).add(entry_id)
+            self._evict(now)
+
+fingerprint_index = FingerprintIndex(
+    max_entries=settings.AUDIO_FINGERPRINT_MAX_ENTRIES,
+    ttl_seconds=settings.AUDIO_FINGERPRINT_TTL_HOURS * 3600,
+    threshold=settings.AUDIO_FINGERPRINT_MATCH_THRESHOLD
+)
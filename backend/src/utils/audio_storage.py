@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Set
+
+from src.config import settings
+from src.utils.mongodb import get_database
+
+logger = logging.getLogger(__name__)
+
+# Storage tiers recorded on transcriptions.storage_tier
+TIER_ORIGINAL = "original"
+TIER_OPUS = "opus"
+TIER_ARCHIVED = "archived"
+TIER_DELETED = "deleted"
+
+def sharded_path(file_id: str, file_ext: str, root: Optional[str] = None) -> Path:
+    """
+    uploads/ab/cd/<file_id><ext> - two levels of hashed subdirectories keep
+    every directory small no matter how many recordings are stored.
+    """
+    digest = hashlib.sha1(file_id.encode()).hexdigest()
+    directory = Path(root or settings.UPLOAD_DIR) / digest[:2] / digest[2:4]
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{file_id}{file_ext}"
+
+class AudioLifecycleManager:
+    """
+    Background maintenance of settings.UPLOAD_DIR:
+    - moves legacy flat uploads into hashed shards,
+    - transcodes processed recordings to mono Opus,
+    - archives or deletes recordings past the retention window.
+    Every file move is followed by a conditional update of
+    transcriptions.file_path, so the database never points at a missing file.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._ffmpeg = shutil.which("ffmpeg")
+        # Flat files with no transcription pointing at them; not looked up again
+        self._orphans: Set[str] = set()
+
+    def start(self):
+        if self._task is None and settings.AUDIO_LIFECYCLE_ENABLED:
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("Audio lifecycle manager started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Audio lifecycle manager stopped")
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audio lifecycle cycle failed: {e}")
+            await asyncio.sleep(settings.AUDIO_LIFECYCLE_INTERVAL_SECONDS)
+
+    async def _throttle(self, size_bytes: int):
+        """Keep disk I/O under AUDIO_LIFECYCLE_MAX_BYTES_PER_SEC"""
+        rate = settings.AUDIO_LIFECYCLE_MAX_BYTES_PER_SEC
+        await asyncio.sleep(size_bytes / rate if rate > 0 else 0)
+
+    async def _relink(self, db, transcription_id: str, old_path: str, new_path: Optional[str], tier: str) -> bool:
+        """Point the transcription at its new file only if nobody changed it meanwhile"""
+        result = await db.transcriptions.update_one(
+            {"_id": transcription_id, "file_path": old_path},
+            {"$set": {
+                "file_path": new_path,
+                "storage_tier": tier,
+                "storage_updated_at": datetime.utcnow()
+            }}
+        )
+        return result.modified_count == 1
+
+    async def run_once(self):
+        db = get_database()
+        if db is None:
+            return
+
+        started = time.perf_counter()
+        expired = await self._apply_retention(db)
+        transcoded = await self._transcode_processed(db)
+        sharded = await self._shard_legacy(db)
+
+        if expired or transcoded or sharded:
+            logger.info(
+                f"Audio lifecycle: {transcoded} transcoded, {sharded} resharded, "
+                f"{expired} expired in {time.perf_counter() - started:.1f}s"
+            )
+
+    async def _apply_retention(self, db) -> int:
+        if settings.AUDIO_RETENTION_DAYS <= 0:
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=settings.AUDIO_RETENTION_DAYS)
+        cursor = db.transcriptions.find(
+            {
+                "created_at": {"$lt": cutoff},
+                "storage_tier": {"$nin": [TIER_ARCHIVED, TIER_DELETED]}
+            },
+            {"file_path": 1}
+        ).limit(settings.AUDIO_LIFECYCLE_BATCH_SIZE)
+
+        processed = 0
+        async for doc in cursor:
+            old_path = doc.get("file_path")
+            size = os.path.getsize(old_path) if old_path and os.path.exists(old_path) else 0
+
+            if settings.AUDIO_ARCHIVE_DIR and size:
+                new_path = str(sharded_path(doc["_id"], Path(old_path).suffix, settings.AUDIO_ARCHIVE_DIR))
+                await asyncio.to_thread(shutil.move, old_path, new_path)
+                if not await self._relink(db, doc["_id"], old_path, new_path, TIER_ARCHIVED):
+                    await asyncio.to_thread(shutil.move, new_path, old_path)
+                    continue
+            else:
+                if not await self._relink(db, doc["_id"], old_path, None, TIER_DELETED):
+                    continue
+                if size:
+                    await asyncio.to_thread(os.remove, old_path)
+
+            processed += 1
+            await self._throttle(size)
+
+        return processed
+
+    async def _transcode(self, source: str, target: str) -> bool:
+        process = await asyncio.create_subprocess_exec(
+            self._ffmpeg, "-nostdin", "-y", "-loglevel", "error", "-threads", "1",
+            "-i", source, "-vn", "-ac", "1", "-c:a", "libopus",
+            "-b:a", settings.AUDIO_TRANSCODE_BITRATE, target,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.error(f"ffmpeg failed for {source}: {stderr.decode(errors='ignore')[:300]}")
+            if os.path.exists(target):
+                os.remove(target)
+            return False
+        return True
+
+    async def _transcode_processed(self, db) -> int:
+        if not settings.AUDIO_TRANSCODE_ENABLED or not self._ffmpeg:
+            return 0
+
+        now = datetime.utcnow()
+        cursor = db.transcriptions.find(
+            {
+                "storage_tier": {"$nin": [TIER_OPUS, TIER_ARCHIVED, TIER_DELETED]},
+                "file_path": {"$ne": None},
+                "$or": [
+                    {"processed_at": {"$lt": now - timedelta(minutes=settings.AUDIO_TRANSCODE_GRACE_MINUTES)}},
+                    {"created_at": {"$lt": now - timedelta(hours=settings.AUDIO_TRANSCODE_AFTER_HOURS)}}
+                ]
+            },
+            {"file_path": 1}
+        ).limit(settings.AUDIO_LIFECYCLE_BATCH_SIZE)
+
+        processed = 0
+        async for doc in cursor:
+            old_path = doc["file_path"]
+            if not os.path.exists(old_path):
+                continue
+
+            new_path = str(sharded_path(doc["_id"], ".opus"))
+            size = os.path.getsize(old_path)
+            if not await self._transcode(old_path, new_path):
+                continue
+
+            if await self._relink(db, doc["_id"], old_path, new_path, TIER_OPUS):
+                await asyncio.to_thread(os.remove, old_path)
+                processed += 1
+            else:
+                await asyncio.to_thread(os.remove, new_path)
+
+            await self._throttle(size)
+
+        return processed
+
+    def _legacy_files(self, upload_dir: Path) -> List[str]:
+        with os.scandir(upload_dir) as entries:
+            return [
+                entry.path for entry in entries
+                if entry.is_file() and Path(entry.name).suffix.lower() in settings.ALLOWED_EXTENSIONS
+                and entry.path not in self._orphans
+            ]
+
+    async def _shard_legacy(self, db) -> int:
+        """
+        Move files still stored flat in UPLOAD_DIR into their shard, up to
+        AUDIO_LIFECYCLE_BATCH_SIZE moves per cycle. Files are checked against
+        the transcriptions a batch at a time; orphans are skipped (and left in
+        place) so they cannot hold the migration back.
+        """
+        batch_size = settings.AUDIO_LIFECYCLE_BATCH_SIZE
+        legacy = await asyncio.to_thread(self._legacy_files, Path(settings.UPLOAD_DIR))
+        processed = 0
+        orphans = len(self._orphans)
+
+        for offset in range(0, len(legacy), batch_size):
+            paths = {Path(path).stem: path for path in legacy[offset:offset + batch_size]}
+            linked = set()
+            async for doc in db.transcriptions.find({"_id": {"$in": list(paths)}}, {"file_path": 1}):
+                if doc.get("file_path") == paths[doc["_id"]]:
+                    linked.add(doc["_id"])
+
+            for file_id, old_path in paths.items():
+                if file_id not in linked:
+                    self._orphans.add(old_path)
+                    continue
+                if processed >= batch_size:
+                    break
+
+                new_path = str(sharded_path(file_id, Path(old_path).suffix))
+                size = os.path.getsize(old_path)
+                await asyncio.to_thread(shutil.move, old_path, new_path)
+                if await self._relink(db, file_id, old_path, new_path, TIER_ORIGINAL):
+                    processed += 1
+                else:
+                    await asyncio.to_thread(shutil.move, new_path, old_path)
+
+                await self._throttle(size)
+
+            if processed >= batch_size:
+                break
+
+        if len(self._orphans) > orphans:
+            logger.info(f"Skipping {len(self._orphans) - orphans} legacy audio files with no transcription")
+        return processed
+
+audio_lifecycle = AudioLifecycleManager()
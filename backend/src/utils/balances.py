@@ -0,0 +1,596 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+
+from src.config import settings
+from src.utils import metrics, profiles
+from src.utils.async_cache import AsyncTTLCache
+from src.utils.leaderboards import leaderboards
+
+logger = logging.getLogger(__name__)
+
+# The `token_transactions` ledger is the source of truth for balances:
+#   earned = sum of "earn" amounts, spent = sum of "spend" amounts.
+# token_balances (current_balance/total_earned/total_spent) and
+# users (tokens_balance/total_earned) are projections of it, updated after
+# every ledger insert and repaired by the reconciler when they drift.
+# Tokens granted before the ledger existed (e.g. PATCH /users/{id}/add-tokens
+# used to only $inc users.tokens_balance) have no entries: backfill-opening-balances
+# writes one "opening:<user_id>" earn entry per user for that gap. Until it has
+# run, the reconciler never lowers a projection, it only reports that drift.
+
+EARN = "earn"
+SPEND = "spend"
+
+# `migrations` document written once backfill-opening-balances covered every user
+OPENING_BALANCES_MIGRATION = "balances:opening"
+
+class InsufficientBalance(Exception):
+    """A guarded debit found less than the requested amount (balance is None for unknown users)"""
+
+    def __init__(self, user_id: str, balance: Optional[int]):
+        super().__init__(f"Insufficient balance for {user_id}: {balance}")
+        self.user_id = user_id
+        self.balance = balance
+
+def _empty_balance(user_id: str) -> Dict:
+    return {"user_id": user_id, "current_balance": 0, "total_earned": 0, "total_spent": 0, "last_updated": None}
+
+def _projection(doc: Optional[Dict], user_id: str) -> Dict:
+    if doc is None:
+        return _empty_balance(user_id)
+    return {
+        "user_id": user_id,
+        "current_balance": doc.get("current_balance", 0),
+        "total_earned": doc.get("total_earned", 0),
+        "total_spent": doc.get("total_spent", 0),
+        "last_updated": doc.get("last_updated")
+    }
+
+class BalanceService:
+    """
+    Every balance change goes through credit()/debit(). credit() writes the
+    ledger entry first, then $inc's both projections; debit() first takes
+    the amount from users.tokens_balance with a guarded $inc (that is what
+    makes it race-free), then writes the ledger entry and updates
+    token_balances. A failure part-way leaves drift that the reconciler
+    repairs from the ledger. The token_balances projection is cached
+    briefly per process.
+    """
+
+    def __init__(self):
+        self._cache = AsyncTTLCache(
+            "balances",
+            maxsize=settings.BALANCE_CACHE_MAX_ENTRIES,
+            ttl=settings.BALANCE_CACHE_TTL_SECONDS
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_balance(self, db, user_id: str) -> Dict:
+        return await self._cache.get_or_load(
+            user_id, lambda: self._load_balance(db, user_id)
+        )
+
+    async def _load_balance(self, db, user_id: str) -> Dict:
+        return _projection(await db.token_balances.find_one({"user_id": user_id}), user_id)
+
+    def invalidate(self, user_id: str):
+        self._cache.invalidate(user_id)
+        profiles.invalidate(user_id)
+
+    async def _apply_token_balance(self, db, user_id: str, earned: int, spent: int, session=None) -> Dict:
+        balance = await db.token_balances.find_one_and_update(
+            {"user_id": user_id},
+            {
+                "$inc": {"current_balance": earned - spent, "total_earned": earned, "total_spent": spent},
+                "$set": {"last_updated": datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        projection = _projection(balance, user_id)
+        self._cache.set(user_id, projection)
+        return projection
+
+    async def _apply(self, db, user_id: str, earned: int, spent: int, session=None) -> Dict:
+        projection = await self._apply_token_balance(db, user_id, earned, spent, session=session)
+        await db.users.update_one(
+            {"_id": user_id},
+            {
+                "$inc": {"tokens_balance": earned - spent, "total_earned": earned},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            session=session
+        )
+        profiles.invalidate(user_id)
+        return projection
+
+    async def credit(
+        self,
+        db,
+        user_id: str,
+        amount: int,
+        source: str,
+        description: str,
+        extra: Optional[Dict] = None,
+        transaction_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Record an earn entry and update the projections. Returns the ledger
+        entry with the new balance under "balance". Zero-amount entries
+        (e.g. failed CAPTCHA) are recorded without touching the projections.
+        """
+        transaction_id = transaction_id or str(uuid.uuid4())
+        transaction = {
+            "_id": transaction_id,
+            "id": transaction_id,
+            "user_id": user_id,
+            "type": EARN,
+            "amount": amount,
+            "source": source,
+            "description": description,
+            "created_at": datetime.utcnow(),
+            **(extra or {})
+        }
+        await db.token_transactions.insert_one(transaction)
+        metrics.counter("balances.credits").inc()
+
+        if amount:
+            balance = await self._apply(db, user_id, amount, 0)
+            leaderboards.record_tokens(user_id, amount, transaction["created_at"], transaction_id)
+        else:
+            balance = await self.get_balance(db, user_id)
+        return {**transaction, "balance": balance}
+
+    async def debit(
+        self,
+        db,
+        user_id: str,
+        amount: int,
+        source: str,
+        description: str,
+        transaction_id: Optional[str] = None,
+        session=None,
+        user_inc: Optional[Dict[str, int]] = None
+    ) -> Dict:
+        """
+        Atomically take `amount` from users.tokens_balance, guarded by
+        $gte so concurrent debits can neither overdraw nor overwrite each
+        other (raises InsufficientBalance), then record the spend entry and
+        update token_balances (concurrently, outside a session). `user_inc`
+        adds extra $inc fields to the same user update. Pass a session to
+        make it part of a transaction.
+        """
+        user = await db.users.find_one_and_update(
+            {"_id": user_id, "tokens_balance": {"$gte": amount}},
+            {
+                "$inc": {"tokens_balance": -amount, **(user_inc or {})},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            projection={"tokens_balance": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        profiles.invalidate(user_id)
+        if user is None:
+            metrics.counter("balances.debits_rejected").inc()
+            current = await db.users.find_one({"_id": user_id}, {"tokens_balance": 1}, session=session)
+            raise InsufficientBalance(user_id, current.get("tokens_balance", 0) if current else None)
+
+        transaction_id = transaction_id or str(uuid.uuid4())
+        transaction = {
+            "_id": transaction_id,
+            "id": transaction_id,
+            "user_id": user_id,
+            "type": SPEND,
+            "amount": amount,
+            "source": source,
+            "description": description,
+            "created_at": datetime.utcnow()
+        }
+        if session is None:
+            # Independent writes: overlap the round trips
+            _, balance = await asyncio.gather(
+                db.token_transactions.insert_one(transaction),
+                self._apply_token_balance(db, user_id, 0, amount)
+            )
+        else:
+            # A session runs one operation at a time
+            await db.token_transactions.insert_one(transaction, session=session)
+            balance = await self._apply_token_balance(db, user_id, 0, amount, session=session)
+        metrics.counter("balances.debits").inc()
+        return {**transaction, "balance": balance, "tokens_balance": user["tokens_balance"]}
+
+    async def revert_debit(self, db, transaction: Dict, user_inc: Optional[Dict[str, int]] = None):
+        """Undo a debit() whose follow-up writes failed (without a transaction to abort)"""
+        user_id, amount = transaction["user_id"], transaction["amount"]
+        await db.token_transactions.delete_one({"_id": transaction["_id"]})
+        await db.users.update_one(
+            {"_id": user_id},
+            {"$inc": {"tokens_balance": amount, **{field: -value for field, value in (user_inc or {}).items()}}}
+        )
+        await self._apply_token_balance(db, user_id, 0, -amount)
+        profiles.invalidate(user_id)
+        metrics.counter("balances.debits_reverted").inc()
+
+    async def _check_users(
+        self,
+        db,
+        ledger: Dict[str, Dict],
+        started_at: datetime,
+        repair: bool,
+        allow_decrease: bool = True,
+        held: Optional[Set[str]] = None
+    ) -> int:
+        """
+        Compare one batch of ledger totals with both projections; returns the
+        number of drifted users. Without `allow_decrease`, repairs that would
+        lower a projection are not applied and the user is added to `held`.
+        """
+        user_ids = list(ledger)
+        balances = {
+            doc["user_id"]: doc
+            async for doc in db.token_balances.find({"user_id": {"$in": user_ids}})
+        }
+        users = {
+            doc["_id"]: doc
+            async for doc in db.users.find(
+                {"_id": {"$in": user_ids}}, {"tokens_balance": 1, "total_earned": 1, "updated_at": 1}
+            )
+        }
+
+        balance_fixes: List[UpdateOne] = []
+        user_fixes: List[UpdateOne] = []
+        drifted = set()
+        for user_id, totals in ledger.items():
+            expected = {
+                "current_balance": totals["earned"] - totals["spent"],
+                "total_earned": totals["earned"],
+                "total_spent": totals["spent"]
+            }
+            balance = balances.get(user_id)
+            user = users.get(user_id)
+            # Changed since the scan started: the ledger totals may be behind, check next run
+            if (balance and balance.get("last_updated", datetime.min) >= started_at) or \
+                    (user and user.get("updated_at", datetime.min) >= started_at):
+                metrics.counter("balances.reconciler.skipped").inc()
+                continue
+
+            if balance is None or any(balance.get(field, 0) != value for field, value in expected.items()):
+                metrics.counter("balances.drift.token_balances").inc()
+                drifted.add(user_id)
+                logger.warning(f"Balance drift for {user_id}: token_balances {_projection(balance, user_id)} != ledger {expected}")
+                lowers = balance is not None and (
+                    expected["current_balance"] < balance.get("current_balance", 0) or
+                    expected["total_earned"] < balance.get("total_earned", 0)
+                )
+                if lowers and not allow_decrease:
+                    self._hold(user_id, held)
+                else:
+                    balance_fixes.append(UpdateOne(
+                        {"user_id": user_id}, {"$set": {**expected, "last_updated": datetime.utcnow()}}, upsert=True
+                    ))
+            if user is not None and (
+                user.get("tokens_balance", 0) != expected["current_balance"] or
+                user.get("total_earned", 0) != expected["total_earned"]
+            ):
+                metrics.counter("balances.drift.users").inc()
+                drifted.add(user_id)
+                logger.warning(
+                    f"Balance drift for {user_id}: users {user.get('tokens_balance', 0)}/{user.get('total_earned', 0)} "
+                    f"!= ledger {expected['current_balance']}/{expected['total_earned']}"
+                )
+                lowers = expected["current_balance"] < user.get("tokens_balance", 0) or \
+                    expected["total_earned"] < user.get("total_earned", 0)
+                if lowers and not allow_decrease:
+                    self._hold(user_id, held)
+                else:
+                    user_fixes.append(UpdateOne(
+                        {"_id": user_id},
+                        {"$set": {"tokens_balance": expected["current_balance"], "total_earned": expected["total_earned"]}}
+                    ))
+
+        if repair:
+            if balance_fixes:
+                await db.token_balances.bulk_write(balance_fixes, ordered=False)
+            if user_fixes:
+                await db.users.bulk_write(user_fixes, ordered=False)
+            for user_id in ledger:
+                self.invalidate(user_id)
+            metrics.counter("balances.repairs").inc(len(balance_fixes) + len(user_fixes))
+        return len(drifted)
+
+    @staticmethod
+    def _hold(user_id: str, held: Optional[Set[str]]):
+        metrics.counter("balances.drift.held").inc()
+        if held is not None:
+            held.add(user_id)
+        logger.warning(f"Not lowering {user_id}'s balance: run backfill-opening-balances first")
+
+    async def _check_unledgered(
+        self,
+        db,
+        user_ids: List[str],
+        started_at: datetime,
+        repair: bool,
+        allow_decrease: bool,
+        held: Set[str]
+    ) -> Tuple[List[str], int]:
+        """Check the users in `user_ids` that have no ledger entry against zero totals"""
+        ledgered = set(await db.token_transactions.distinct(
+            "user_id", {"user_id": {"$in": user_ids}, "created_at": {"$lt": started_at}}
+        ))
+        empty = {user_id: {"earned": 0, "spent": 0} for user_id in user_ids if user_id not in ledgered}
+        if not empty:
+            return [], 0
+        return list(empty), await self._check_users(db, empty, started_at, repair, allow_decrease, held)
+
+    async def _reconcile_unledgered(
+        self,
+        db,
+        started_at: datetime,
+        batch_size: int,
+        repair: bool,
+        allow_decrease: bool,
+        held: Set[str]
+    ) -> Tuple[int, int]:
+        """
+        The ledger scan never visits users without entries: find projections
+        holding tokens for them (their ledger totals are zero). Returns
+        (users checked, users drifted).
+        """
+        checked = set()
+        drifted = 0
+        for collection, id_field, fields in (
+            (db.token_balances, "user_id", ("current_balance", "total_earned", "total_spent")),
+            (db.users, "_id", ("tokens_balance", "total_earned")),
+        ):
+            cursor = collection.find(
+                {"$or": [{field: {"$nin": [0, None]}} for field in fields]}, {id_field: 1}
+            ).batch_size(batch_size)
+            batch: List[str] = []
+            async for doc in cursor:
+                if doc[id_field] not in checked:
+                    batch.append(doc[id_field])
+                if len(batch) >= batch_size:
+                    found, count = await self._check_unledgered(db, batch, started_at, repair, allow_decrease, held)
+                    checked.update(found)
+                    drifted += count
+                    batch = []
+            if batch:
+                found, count = await self._check_unledgered(db, batch, started_at, repair, allow_decrease, held)
+                checked.update(found)
+                drifted += count
+        return len(checked), drifted
+
+    async def reconcile(self, db, batch_size: int = 1000, repair: bool = True) -> Dict[str, int]:
+        """
+        Stream the ledger in user_id order (index-backed), total it per user
+        and compare each batch of users with the projections, then check
+        non-zero projections of users that have no ledger entry at all.
+        Users whose projections changed while the scan ran are skipped until
+        next time. Until backfill-opening-balances has completed, drift that
+        would lower a balance is reported ("held") but not repaired.
+        """
+        started = time.perf_counter()
+        started_at = datetime.utcnow()
+        allow_decrease = await self.opening_balances_backfilled(db)
+        held: Set[str] = set()
+        entries = 0
+        checked = 0
+        drifted = 0
+        batch: Dict[str, Dict] = {}
+        current_user = None
+
+        cursor = db.token_transactions.find(
+            {"created_at": {"$lt": started_at}}, {"user_id": 1, "type": 1, "amount": 1}
+        ).sort("user_id", 1).batch_size(batch_size)
+        async for entry in cursor:
+            entries += 1
+            user_id = entry["user_id"]
+            if user_id != current_user:
+                # A user's entries are contiguous: flush only between users
+                if len(batch) >= batch_size:
+                    drifted += await self._check_users(db, batch, started_at, repair, allow_decrease, held)
+                    checked += len(batch)
+                    batch = {}
+                current_user = user_id
+            totals = batch.setdefault(user_id, {"earned": 0, "spent": 0})
+            if entry.get("type") == SPEND:
+                totals["spent"] += entry.get("amount", 0)
+            else:
+                totals["earned"] += entry.get("amount", 0)
+        if batch:
+            drifted += await self._check_users(db, batch, started_at, repair, allow_decrease, held)
+            checked += len(batch)
+
+        unledgered, unledgered_drifted = await self._reconcile_unledgered(
+            db, started_at, batch_size, repair, allow_decrease, held
+        )
+        checked += unledgered
+        drifted += unledgered_drifted
+
+        elapsed = time.perf_counter() - started
+        metrics.counter("balances.reconciler.entries").inc(entries)
+        metrics.counter("balances.reconciler.users").inc(checked)
+        metrics.histogram("balances.reconciler.run").observe(elapsed)
+        result = {
+            "entries": entries, "users": checked, "unledgered": unledgered, "drifted": drifted,
+            "held": len(held), "seconds": round(elapsed, 2)
+        }
+        logger.info(f"Balance reconciliation: {result} ({entries / elapsed if elapsed else 0:.0f} entries/s)")
+        return result
+
+    async def opening_balances_backfilled(self, db) -> bool:
+        return await db.migrations.find_one({"_id": OPENING_BALANCES_MIGRATION}) is not None
+
+    async def _ledger_totals(self, db, user_ids: List[str]) -> Dict[str, Dict]:
+        pipeline = [
+            {"$match": {"user_id": {"$in": user_ids}}},
+            {"$group": {
+                "_id": "$user_id",
+                "earned": {"$sum": {"$cond": [{"$eq": ["$type", SPEND]}, 0, "$amount"]}},
+                "spent": {"$sum": {"$cond": [{"$eq": ["$type", SPEND]}, "$amount", 0]}}
+            }}
+        ]
+        return {row["_id"]: row async for row in db.token_transactions.aggregate(pipeline)}
+
+    async def _backfill_opening_batch(self, db, users: List[Dict], started_at: datetime) -> Tuple[int, int]:
+        """Returns (entries written, users skipped because they changed during the run)"""
+        totals = await self._ledger_totals(db, [user["_id"] for user in users])
+        ops: List[UpdateOne] = []
+        skipped = 0
+        for user in users:
+            if user.get("updated_at", datetime.min) >= started_at:
+                skipped += 1
+                continue
+            ledger = totals.get(user["_id"], {"earned": 0, "spent": 0})
+            gap = user.get("tokens_balance", 0) - (ledger["earned"] - ledger["spent"])
+            if gap < 0:
+                logger.warning(f"{user['_id']} holds {-gap} tokens less than its ledger; left to the reconciler")
+            if gap <= 0:
+                continue
+            transaction_id = f"opening:{user['_id']}"
+            ops.append(UpdateOne(
+                {"_id": transaction_id},
+                {"$setOnInsert": {
+                    "id": transaction_id,
+                    "user_id": user["_id"],
+                    "type": EARN,
+                    "amount": gap,
+                    "source": "opening_balance",
+                    "description": "Balance before the token ledger",
+                    "created_at": user.get("created_at") or started_at
+                }},
+                upsert=True
+            ))
+        if not ops:
+            return 0, skipped
+        return (await db.token_transactions.bulk_write(ops, ordered=False)).upserted_count, skipped
+
+    async def backfill_opening_balances(self, db, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Write one earn entry per user for tokens their users projection holds
+        beyond the ledger (granted before the ledger existed). Ids are derived
+        from the user, so re-running is a no-op for users already covered.
+        Users updated while it runs are skipped; once a run skips none, it is
+        recorded as done and the reconciler may lower balances. Run after
+        backfill-donations.
+        """
+        started_at = datetime.utcnow()
+        written = skipped = scanned = 0
+        batch: List[Dict] = []
+        cursor = db.users.find(
+            {}, {"tokens_balance": 1, "updated_at": 1, "created_at": 1}
+        ).batch_size(batch_size)
+        async for user in cursor:
+            batch.append(user)
+            if len(batch) >= batch_size:
+                count, held_back = await self._backfill_opening_batch(db, batch, started_at)
+                written, skipped, scanned = written + count, skipped + held_back, scanned + len(batch)
+                batch = []
+        if batch:
+            count, held_back = await self._backfill_opening_batch(db, batch, started_at)
+            written, skipped, scanned = written + count, skipped + held_back, scanned + len(batch)
+
+        if skipped == 0:
+            await db.migrations.update_one(
+                {"_id": OPENING_BALANCES_MIGRATION},
+                {"$set": {"completed_at": datetime.utcnow(), "users": scanned}},
+                upsert=True
+            )
+        return {"users": scanned, "written": written, "skipped": skipped}
+
+    async def backfill_donations(self, db, batch_size: int = 1000) -> int:
+        """
+        Write the spend entries for donations made before donations went
+        through debit(); ids are derived from the donation, so re-running is
+        a no-op. Must run once before the reconciler is enabled.
+        """
+        written = 0
+        ops: List[UpdateOne] = []
+        async for donation in db.charity_donations.find({}).batch_size(batch_size):
+            transaction_id = f"donation:{donation['_id']}"
+            ops.append(UpdateOne(
+                {"_id": transaction_id},
+                {"$setOnInsert": {
+                    "id": transaction_id,
+                    "user_id": donation["user_id"],
+                    "type": SPEND,
+                    "amount": donation.get("tokens_spent", 0),
+                    "source": f"donation:{donation.get('charity_id')}",
+                    "description": "Charity donation",
+                    "created_at": donation.get("created_at") or datetime.utcnow()
+                }},
+                upsert=True
+            ))
+            if len(ops) >= batch_size:
+                written += (await db.token_transactions.bulk_write(ops, ordered=False)).upserted_count
+                ops = []
+        if ops:
+            written += (await db.token_transactions.bulk_write(ops, ordered=False)).upserted_count
+        return written
+
+    async def _run_forever(self, db_getter):
+        while True:
+            await asyncio.sleep(settings.BALANCE_RECONCILE_INTERVAL_SECONDS)
+            try:
+                await self.reconcile(db_getter(), batch_size=settings.BALANCE_RECONCILE_BATCH_SIZE)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.counter("balances.reconciler.failures").inc()
+                logger.error(f"Balance reconciliation failed: {e}")
+
+    def start(self, db_getter):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever(db_getter))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+balances = BalanceService()
+
+async def _main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.MONGO_DB_NAME]
+    try:
+        if args.command == "backfill-donations":
+            print(f"Wrote {await balances.backfill_donations(db, args.batch_size)} donation ledger entries")
+        elif args.command == "backfill-opening-balances":
+            result = await balances.backfill_opening_balances(db, args.batch_size)
+            print(json.dumps(result))
+            if result["skipped"]:
+                print("Some users changed during the run; run it again to finish")
+        else:
+            result = await balances.reconcile(db, batch_size=args.batch_size, repair=not args.dry_run)
+            print(json.dumps(result))
+    finally:
+        client.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Ledger-backed balance maintenance")
+    parser.add_argument("command", choices=("reconcile", "backfill-donations", "backfill-opening-balances"))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it")
+    asyncio.run(_main(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import settings
+from src.data.bible_structure import BIBLE_BOOKS_ORDER, CHAPTERS_PER_BOOK
+from src.utils import metrics
+from src.utils.bible_api import bible_api
+from src.utils.bible_store import bible_store
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("en", "pl", "es")
+
+# Upstream requests needed per chapter (ES needs the verse list before the range)
+REQUESTS_PER_CHAPTER = {"en": 1, "pl": 1, "es": 2}
+
+class BiblePrefetcher:
+    """
+    Walks BIBLE_BOOKS_ORDER x CHAPTERS_PER_BOOK for each language and fills the
+    Bible store, with bounded concurrency and a token bucket per upstream host.
+    Progress is checkpointed to a JSON file, so an interrupted run resumes
+    where it stopped; chapters already in the store are skipped as well.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = None,
+        rate_per_host: float = None,
+        checkpoint_path: str = None
+    ):
+        self.concurrency = concurrency or settings.BIBLE_PREFETCH_CONCURRENCY
+        self.rate_per_host = rate_per_host or settings.BIBLE_PREFETCH_RATE_PER_HOST
+        self.checkpoint_path = checkpoint_path or os.path.join(settings.BIBLE_STORE_DIR, "prefetch_checkpoint.json")
+        self._checkpoint: Dict[str, Dict] = self._load_checkpoint()
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _all_chapters() -> List[Tuple[str, int]]:
+        return [
+            (book_id, chapter_num)
+            for book_id in BIBLE_BOOKS_ORDER
+            for chapter_num in range(1, CHAPTERS_PER_BOOK.get(book_id, 1) + 1)
+        ]
+
+    def pending(self, lang: str) -> List[Tuple[str, int]]:
+        completed = set(self._checkpoint.get(lang, {}).get("completed", []))
+        return [
+            (book_id, chapter_num)
+            for book_id, chapter_num in self._all_chapters()
+            if f"{book_id}:{chapter_num}" not in completed and not bible_store.has(lang, book_id, chapter_num)
+        ]
+
+    async def prefetch_language(self, lang: str) -> Dict:
+        state = self._checkpoint.setdefault(lang, {"completed": [], "failed": {}})
+        pending = self.pending(lang)
+        total = len(pending)
+        if not total:
+            logger.info(f"Bible prefetch ({lang}): nothing to do")
+            return {"lang": lang, "fetched": 0, "failed": 0, "seconds": 0.0}
+
+        bucket = TokenBucket(self.rate_per_host)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        cost = REQUESTS_PER_CHAPTER.get(lang, 1)
+        started = time.perf_counter()
+        fetched = failed = 0
+        last_report = started
+
+        async def fetch(book_id: str, chapter_num: int):
+            nonlocal fetched, failed, last_report
+            key = f"{book_id}:{chapter_num}"
+            async with semaphore:
+                await bucket.acquire(cost)
+                request_started = time.perf_counter()
+                try:
+                    await bible_api.prefetch_chapter(book_id, chapter_num, lang)
+                    state["completed"].append(key)
+                    state["failed"].pop(key, None)
+                    fetched += 1
+                    metrics.counter("bible_prefetch.fetched").inc()
+                except Exception as e:
+                    state["failed"][key] = str(e)[:200]
+                    failed += 1
+                    metrics.counter("bible_prefetch.failed").inc()
+                    logger.warning(f"Bible prefetch ({lang}) {key} failed: {e}")
+                finally:
+                    metrics.histogram("bible_prefetch.chapter_seconds").observe(time.perf_counter() - request_started)
+
+            now = time.perf_counter()
+            if now - last_report >= 10:
+                last_report = now
+                done = fetched + failed
+                logger.info(
+                    f"Bible prefetch ({lang}): {done}/{total} "
+                    f"({fetched / (now - started):.2f} chapters/s, {failed} failed)"
+                )
+                self._save_checkpoint()
+
+        try:
+            await asyncio.gather(*(fetch(book_id, chapter_num) for book_id, chapter_num in pending))
+        finally:
+            self._save_checkpoint()
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Bible prefetch ({lang}) finished: {fetched} fetched, {failed} failed "
+            f"in {elapsed:.1f}s ({fetched / elapsed if elapsed else 0:.2f} chapters/s)"
+        )
+        return {"lang": lang, "fetched": fetched, "failed": failed, "seconds": round(elapsed, 1)}
+
+    async def run(self, languages: Iterable[str] = LANGUAGES) -> List[Dict]:
+        # Each language is served by a different host, so they run side by side
+        return await asyncio.gather(*(self.prefetch_language(lang) for lang in languages))
+
+    def start(self):
+        """Background warm-up after startup"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_background())
+
+    async def _run_background(self):
+        try:
+            await self.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Bible prefetch failed: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+bible_prefetcher = BiblePrefetcher()
+
+async def _main(args):
+    prefetcher = BiblePrefetcher(
+        concurrency=args.concurrency,
+        rate_per_host=args.rate,
+        checkpoint_path=args.checkpoint
+    )
+    try:
+        results = await prefetcher.run(args.lang or LANGUAGES)
+    finally:
+        await bible_api.close()
+        bible_store.close()
+    for result in results:
+        print(json.dumps(result))
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Prefetch the whole Bible into the local store")
+    parser.add_argument("--lang", action="append", choices=LANGUAGES, help="Language (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent requests per host")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second per host")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file path")
+    asyncio.run(_main(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
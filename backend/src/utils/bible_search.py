@@ -0,0 +1,367 @@
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.utils.bible_store import bible_store
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"PCSIDX1\n"
+_WORD = re.compile(r"\w+")
+_FOLD = str.maketrans({"ł": "l", "Ł": "l"})
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+STOPWORDS = {
+    "en": frozenset(
+        "a an and are as at be but by for from he her him his i in into is it its me my "
+        "not of on or our shall she so that the their them then there they this thou thy "
+        "to unto was we were which who will with ye you your".split()
+    ),
+    "pl": frozenset(
+        "a aby ale bo by byl byla bylo go i ich im jak jako je jego jej jest ku lecz mi "
+        "mnie na nad nie niech o od on ona oni po pod przez przy sie ta tak te tego to "
+        "tu w we z za ze zas".split()
+    ),
+    "es": frozenset(
+        "a al con de del el en es esta la las le les lo los mas me mi no os para pero "
+        "por que se si su sus te tu un una y ya".split()
+    ),
+}
+
+# Inflectional endings stripped by the Polish light stemmer (after diacritic folding)
+_PL_SUFFIXES = (
+    "ami", "ach", "owi", "ego", "emu", "ych", "ymi", "iem", "om", "ow", "em",
+    "ie", "ia", "y", "a", "u", "i", "e", "o",
+)
+
+def _fold(text: str) -> str:
+    """Lowercase and strip diacritics so "Łaska"/"laska" and "Señor"/"senor" match"""
+    text = unicodedata.normalize("NFKD", text.translate(_FOLD).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def _stem(token: str, lang: str) -> str:
+    if lang == "en":
+        # S-stemmer: plural forms only
+        if token.endswith("ies") and len(token) > 4 and not token.endswith(("eies", "aies")):
+            return token[:-3] + "y"
+        if token.endswith("es") and len(token) > 3 and not token.endswith(("aes", "ees", "oes")):
+            return token[:-1]
+        if token.endswith("s") and len(token) > 3 and not token.endswith(("us", "ss")):
+            return token[:-1]
+        return token
+    if lang == "es":
+        if token.endswith("es") and len(token) > 4:
+            return token[:-2]
+        if token.endswith("s") and len(token) > 3:
+            return token[:-1]
+        return token
+    if lang == "pl":
+        for suffix in _PL_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                return token[:-len(suffix)]
+        return token
+    return token
+
+def tokenize(text: str, lang: str) -> List[str]:
+    stopwords = STOPWORDS.get(lang, frozenset())
+    return [
+        _stem(token, lang)
+        for token in _WORD.findall(_fold(text))
+        if token not in stopwords and not token.isdigit()
+    ]
+
+class _Segment:
+    """Read-only index file mapped into memory; postings are zero-copy views"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a search index")
+
+        offset = len(_MAGIC)
+        (header_len,) = struct.unpack_from("<I", self._mm, offset)
+        offset += 4
+        header = json.loads(self._mm[offset:offset + header_len])
+        offset += header_len
+
+        self.docs: List[Tuple[str, int, str]] = [tuple(doc) for doc in header["docs"]]
+        self.terms: Dict[str, Tuple[int, int]] = header["terms"]
+        n_docs = len(self.docs)
+        n_postings = header["postings"]
+
+        view = memoryview(self._mm)
+        offset = _align(offset, 4)
+        self.doc_lengths = view[offset:offset + 2 * n_docs].cast("H")
+        offset = _align(offset + 2 * n_docs, 4)
+        self.doc_ids = view[offset:offset + 4 * n_postings].cast("I")
+        offset += 4 * n_postings
+        self.term_freqs = view[offset:offset + 2 * n_postings].cast("H")
+        self._views = (view, self.doc_lengths, self.doc_ids, self.term_freqs)
+
+    def postings(self, term: str):
+        entry = self.terms.get(term)
+        if entry is None:
+            return (), ()
+        start, count = entry
+        return self.doc_ids[start:start + count], self.term_freqs[start:start + count]
+
+    def close(self):
+        for view in getattr(self, "_views", ()):
+            view.release()
+        self._mm.close()
+        self._file.close()
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+class _LanguageIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.segment: Optional[_Segment] = None
+        self.docs: List[Tuple[str, int, str]] = []
+        self.doc_lengths = array("H")
+        self.total_length = 0
+        self.chapters: Set[Tuple[str, int]] = set()
+        # Postings added since the segment was written: term -> ([doc ids], [tfs])
+        self.delta: Dict[str, Tuple[array, array]] = {}
+        # Doc ids of re-stored chapters' old verses, filtered out until the next save
+        self.removed: Set[int] = set()
+
+        if os.path.exists(path):
+            try:
+                self.segment = _Segment(path)
+            except Exception as e:
+                logger.error(f"Discarding unreadable search index {path}: {e}")
+                self.segment = None
+        if self.segment is not None:
+            self.docs = list(self.segment.docs)
+            self.doc_lengths = array("H", self.segment.doc_lengths)
+            self.total_length = sum(self.doc_lengths)
+            self.chapters = {(book_id, chapter_num) for book_id, chapter_num, _ in self.docs}
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.delta or self.removed)
+
+    @property
+    def live_docs(self) -> int:
+        return len(self.docs) - len(self.removed)
+
+    def postings(self, term: str):
+        base_ids, base_tfs = self.segment.postings(term) if self.segment else ((), ())
+        delta = self.delta.get(term)
+        if delta is None:
+            doc_ids, term_freqs = base_ids, base_tfs
+        elif not len(base_ids):
+            doc_ids, term_freqs = delta
+        else:
+            doc_ids, term_freqs = list(base_ids) + list(delta[0]), list(base_tfs) + list(delta[1])
+        if not self.removed:
+            return doc_ids, term_freqs
+        live = [(doc_id, tf) for doc_id, tf in zip(doc_ids, term_freqs) if doc_id not in self.removed]
+        return [doc_id for doc_id, _ in live], [tf for _, tf in live]
+
+    def _remove_chapter(self, book_id: str, chapter_num: int):
+        for doc_id, (doc_book, doc_chapter, _) in enumerate(self.docs):
+            if doc_book == book_id and doc_chapter == chapter_num and doc_id not in self.removed:
+                self.removed.add(doc_id)
+                self.total_length -= self.doc_lengths[doc_id]
+
+    def add_chapter(self, lang: str, book_id: str, chapter_num: int, verses: List[Dict]):
+        """Index a chapter, replacing its verses if it was indexed before"""
+        if (book_id, chapter_num) in self.chapters:
+            self._remove_chapter(book_id, chapter_num)
+        self.chapters.add((book_id, chapter_num))
+        for verse in verses:
+            tokens = tokenize(verse.get("text", ""), lang)
+            if not tokens:
+                continue
+            doc_id = len(self.docs)
+            self.docs.append((book_id, chapter_num, str(verse.get("verse", ""))))
+            self.doc_lengths.append(min(len(tokens), 0xFFFF))
+            self.total_length += self.doc_lengths[-1]
+            for term, tf in Counter(tokens).items():
+                ids, tfs = self.delta.setdefault(term, (array("I"), array("H")))
+                ids.append(doc_id)
+                tfs.append(min(tf, 0xFFFF))
+
+    def _merge_postings(
+        self, terms: List[str], renumber: Optional[Dict[int, int]]
+    ) -> Tuple[array, array, Dict[str, Tuple[int, int]]]:
+        doc_ids = array("I")
+        term_freqs = array("H")
+        term_offsets = {}
+        for term in terms:
+            ids, tfs = self.postings(term)
+            if not len(ids):
+                continue
+            term_offsets[term] = (len(doc_ids), len(ids))
+            doc_ids.extend(ids if renumber is None else [renumber[doc_id] for doc_id in ids])
+            term_freqs.extend(tfs)
+        # No views into the old segment may outlive this call, it is closed next
+        return doc_ids, term_freqs, term_offsets
+
+    def save(self):
+        """Merge the segment and the delta into a new file and map it, dropping removed verses"""
+        terms = set(self.delta)
+        if self.segment is not None:
+            terms.update(self.segment.terms)
+
+        renumber = None
+        docs, doc_lengths = self.docs, self.doc_lengths
+        if self.removed:
+            live = [doc_id for doc_id in range(len(self.docs)) if doc_id not in self.removed]
+            renumber = {doc_id: new_id for new_id, doc_id in enumerate(live)}
+            docs = [self.docs[doc_id] for doc_id in live]
+            doc_lengths = array("H", (self.doc_lengths[doc_id] for doc_id in live))
+        doc_ids, term_freqs, term_offsets = self._merge_postings(sorted(terms), renumber)
+
+        header = json.dumps(
+            {"docs": docs, "terms": term_offsets, "postings": len(doc_ids)},
+            ensure_ascii=False,
+            separators=(",", ":")
+        ).encode("utf-8")
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(b"\0" * (_align(f.tell(), 4) - f.tell()))
+            doc_lengths.tofile(f)
+            f.write(b"\0" * (_align(f.tell(), 4) - f.tell()))
+            doc_ids.tofile(f)
+            term_freqs.tofile(f)
+
+        if self.segment is not None:
+            self.segment.close()
+        os.replace(tmp_path, self.path)
+        self.segment = _Segment(self.path)
+        self.docs, self.doc_lengths = docs, doc_lengths
+        self.delta = {}
+        self.removed = set()
+
+    def close(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+class BibleSearchIndex:
+    """
+    Inverted verse index over the locally stored chapters, one file per
+    language. The file holds a JSON header (verse refs, term -> postings
+    range) followed by packed postings which are memory-mapped on load, so
+    opening it costs one header parse. Chapters stored after that are indexed
+    into an in-memory delta (via the Bible store listener) that is merged
+    into the file on save; a re-stored chapter's old verses are filtered out
+    until then. Hits are ranked with BM25.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._indexes: Dict[str, _LanguageIndex] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, lang: str) -> str:
+        return os.path.join(self.directory, f"search_{lang}.idx")
+
+    def _index(self, lang: str) -> _LanguageIndex:
+        index = self._indexes.get(lang)
+        if index is None:
+            index = self._indexes[lang] = _LanguageIndex(self._path(lang))
+        return index
+
+    def add_chapter(self, lang: str, book_id: str, chapter_num: int, data: Dict):
+        verses = data.get("verses") or []
+        if not verses:
+            return
+        with self._lock:
+            self._index(lang).add_chapter(lang, book_id, chapter_num, verses)
+
+    def load(self, lang: str) -> int:
+        """Map the index file and index chapters stored since it was written"""
+        with self._lock:
+            index = self._index(lang)
+            up_to_date = len(index.chapters) >= bible_store.count(lang)
+        if not up_to_date:
+            for book_id, chapter_num, data in bible_store.iter_chapters(lang):
+                # Only the missing ones: re-adding would replace unchanged chapters
+                if (book_id, chapter_num) not in index.chapters:
+                    self.add_chapter(lang, book_id, chapter_num, data)
+            self.save(lang)
+        return self._index(lang).live_docs
+
+    def save(self, lang: str):
+        with self._lock:
+            index = self._index(lang)
+            if index.dirty:
+                index.save()
+                logger.info(f"Bible search index ({lang}) saved: {len(index.docs)} verses")
+
+    def save_all(self):
+        for lang in list(self._indexes):
+            try:
+                self.save(lang)
+            except Exception as e:
+                logger.error(f"Failed to save Bible search index ({lang}): {e}")
+
+    def close(self):
+        with self._lock:
+            for index in self._indexes.values():
+                index.close()
+            self._indexes.clear()
+
+    def search(self, query: str, lang: str, skip: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[float, str, int, str]]]:
+        """Returns (total hits, [(score, book_id, chapter_num, verse)]) for one page"""
+        terms = list(dict.fromkeys(tokenize(query, lang)))
+        if not terms:
+            return 0, []
+
+        with self._lock:
+            index = self._index(lang)
+            n_docs = index.live_docs
+            if not n_docs:
+                return 0, []
+            avg_length = index.total_length / n_docs
+            doc_lengths = index.doc_lengths
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                doc_ids, term_freqs = index.postings(term)
+                df = len(doc_ids)
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in zip(doc_ids, term_freqs):
+                    norm = _K1 * (1 - _B + _B * doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(skip + limit, scores.items(), key=lambda item: (item[1], -item[0]))[skip:]
+            hits = [(score, *index.docs[doc_id]) for doc_id, score in top]
+        return len(scores), hits
+
+    def stats(self) -> Dict:
+        return {
+            lang: {"verses": index.live_docs, "chapters": len(index.chapters), "pending": index.dirty}
+            for lang, index in self._indexes.items()
+        }
+
+bible_search = BibleSearchIndex(settings.BIBLE_STORE_DIR)
+bible_store.add_listener(bible_search.add_chapter)
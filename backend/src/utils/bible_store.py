@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Translation served by each upstream (used to name the store files)
+TRANSLATIONS = {
+    "en": "web",
+    "pl": "bw",
+    "es": "rv"
+}
+
+class BibleStore:
+    """
+    Local Bible corpus: one SQLite file per language/translation with chapters
+    keyed by (book, chapter) and stored as the JSON returned by get_chapter.
+    Reads are a primary-key lookup on a local file, so chapters are served
+    without any network access once imported or fetched once.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        # Re-entrant: writes hold it while _connection may open the file
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str, str, int, Dict], None]] = []
+
+    def add_listener(self, callback: Callable[[str, str, int, Dict], None]):
+        """Register callback(lang, book_id, chapter_num, data) invoked after each stored chapter"""
+        self._listeners.append(callback)
+
+    def _notify(self, lang: str, book_id: str, chapter_num: int, data: Dict):
+        for callback in self._listeners:
+            try:
+                callback(lang, book_id, chapter_num, data)
+            except Exception as e:
+                logger.error(f"Bible store listener failed for {lang} {book_id} {chapter_num}: {e}")
+
+    def _path(self, lang: str) -> str:
+        return os.path.join(self.directory, f"{lang}_{TRANSLATIONS.get(lang, 'default')}.sqlite3")
+
+    def _connection(self, lang: str) -> sqlite3.Connection:
+        conn = self._connections.get(lang)
+        if conn is not None:
+            return conn
+
+        with self._lock:
+            if lang not in self._connections:
+                os.makedirs(self.directory, exist_ok=True)
+                conn = sqlite3.connect(self._path(lang), check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chapters ("
+                    " book TEXT NOT NULL,"
+                    " chapter INTEGER NOT NULL,"
+                    " data TEXT NOT NULL,"
+                    " fetched_at REAL NOT NULL,"
+                    " PRIMARY KEY (book, chapter)"
+                    ") WITHOUT ROWID"
+                )
+                self._connections[lang] = conn
+            return self._connections[lang]
+
+    def get(self, lang: str, book_id: str, chapter_num: int) -> Optional[Dict]:
+        row = self._connection(lang).execute(
+            "SELECT data FROM chapters WHERE book = ? AND chapter = ?",
+            (book_id, chapter_num)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, lang: str, book_id: str, chapter_num: int, data: Dict):
+        with self._lock:
+            self._connection(lang).execute(
+                "INSERT OR REPLACE INTO chapters (book, chapter, data, fetched_at) VALUES (?, ?, ?, ?)",
+                (book_id, chapter_num, json.dumps(data, ensure_ascii=False), time.time())
+            )
+        self._notify(lang, book_id, chapter_num, data)
+
+    def put_many(self, lang: str, records) -> int:
+        """Bulk insert of (book_id, chapter_num, data) in one transaction"""
+        records = list(records)
+        now = time.time()
+        rows = [
+            (book_id, chapter_num, json.dumps(data, ensure_ascii=False), now)
+            for book_id, chapter_num, data in records
+        ]
+        with self._lock:
+            conn = self._connection(lang)
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO chapters (book, chapter, data, fetched_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        for book_id, chapter_num, data in records:
+            self._notify(lang, book_id, chapter_num, data)
+        return len(rows)
+
+    def has(self, lang: str, book_id: str, chapter_num: int) -> bool:
+        return self._connection(lang).execute(
+            "SELECT 1 FROM chapters WHERE book = ? AND chapter = ?",
+            (book_id, chapter_num)
+        ).fetchone() is not None
+
+    def count(self, lang: str) -> int:
+        return self._connection(lang).execute("SELECT COUNT(*) FROM chapters").fetchone()[0]
+
+    def iter_chapters(self, lang: str) -> Iterator[Tuple[str, int, Dict]]:
+        cursor = self._connection(lang).execute("SELECT book, chapter, data FROM chapters")
+        for book_id, chapter_num, data in cursor:
+            yield book_id, chapter_num, json.loads(data)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+bible_store = BibleStore(settings.BIBLE_STORE_DIR)
+
+def _import(lang: str, path: str, batch_size: int = 500) -> int:
+    """
+    Import chapters from NDJSON (one chapter per line) or a JSON array.
+    Each record is a get_chapter() payload plus a "book" key with the English book id.
+    """
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        f.seek(0)
+        records = json.load(f) if first == "[" else (json.loads(line) for line in f if line.strip())
+
+        imported = 0
+        batch = []
+        for record in records:
+            record = dict(record)
+            book_id = record.pop("book")
+            batch.append((book_id, int(record["chapter"]), record))
+            if len(batch) >= batch_size:
+                imported += bible_store.put_many(lang, batch)
+                batch = []
+        if batch:
+            imported += bible_store.put_many(lang, batch)
+    return imported
+
+def _export(lang: str, out) -> int:
+    exported = 0
+    for book_id, _, data in bible_store.iter_chapters(lang):
+        out.write(json.dumps({"book": book_id, **data}, ensure_ascii=False) + "\n")
+        exported += 1
+    return exported
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local Bible corpus store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="Import chapters from NDJSON/JSON")
+    import_cmd.add_argument("--lang", required=True, choices=sorted(TRANSLATIONS))
+    import_cmd.add_argument("--file", required=True)
+
+    export_cmd = commands.add_parser("export", help="Export chapters as NDJSON to stdout")
+    export_cmd.add_argument("--lang", required=True, choices=sorted(TRANSLATIONS))
+
+    commands.add_parser("stats", help="Show chapter counts per language")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        count = _import(args.lang, args.file)
+        print(f"Imported {count} chapters into {bible_store._path(args.lang)}")
+    elif args.command == "export":
+        _export(args.lang, sys.stdout)
+    else:
+        for lang in sorted(TRANSLATIONS):
+            print(f"{lang}: {bible_store.count(lang)} chapters ({bible_store._path(lang)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from src.config import settings
+from src.utils.bible_api import bible_api
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("en", "pl", "es")
+
+def pick_daily_chapter(day: date, lang: str) -> Tuple[Dict, int]:
+    """
+    Deterministic (book, chapter) for a given day.
+    Uses a private Random seeded by the date, which yields the same sequence
+    the endpoint used to get by reseeding the global `random` module.
+    """
+    rng = random.Random(int(day.strftime('%Y%m%d')))
+    books = bible_api.get_books(lang)
+    book = rng.choice(books)
+
+    max_chapter = book.get("chapters", 30)
+    chapter_num = rng.randint(1, min(max_chapter, 30))
+    return book, chapter_num
+
+class DailyReadingScheduler:
+    """
+    Precomputes the daily reading plan for today and the next
+    DAILY_READING_DAYS_AHEAD days per language, prefetching each chapter
+    (which also persists it in the Bible store). Refreshed at startup and
+    shortly after every midnight, so /daily-reading is a dict lookup.
+    """
+
+    def __init__(self):
+        self._plan: Dict[Tuple[str, str], Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def build(self, lang: str, day: date) -> Dict:
+        book, chapter_num = pick_daily_chapter(day, lang)
+        chapter_data = await bible_api.get_chapter(book["id"], chapter_num, lang)
+        reading = {
+            **chapter_data,
+            "date": day.isoformat()
+        }
+        self._plan[(lang, day.isoformat())] = reading
+        return reading
+
+    def get(self, lang: str, day: date) -> Optional[Dict]:
+        return self._plan.get((lang, day.isoformat()))
+
+    async def refresh(self) -> int:
+        """Fill missing plan entries; returns the number of failed prefetches"""
+        today = datetime.now().date()
+
+        # Drop days that have passed
+        for key in [k for k in self._plan if k[1] < today.isoformat()]:
+            del self._plan[key]
+
+        planned = 0
+        failed = 0
+        for offset in range(settings.DAILY_READING_DAYS_AHEAD + 1):
+            day = today + timedelta(days=offset)
+            for lang in LANGUAGES:
+                if self.get(lang, day) is not None:
+                    continue
+                try:
+                    await self.build(lang, day)
+                    planned += 1
+                except Exception as e:
+                    logger.error(f"Failed to prefetch daily reading {lang} {day}: {e}")
+                    failed += 1
+
+        if planned:
+            logger.info(f"Daily reading plan: {planned} readings prefetched ({len(self._plan)} planned)")
+        return failed
+
+    async def _run_forever(self):
+        while True:
+            failed = 0
+            try:
+                failed = await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Daily reading refresh failed: {e}")
+                failed = 1
+
+            now = datetime.now()
+            next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) + timedelta(minutes=1)
+            delay = (next_run - now).total_seconds()
+            if failed:
+                delay = min(delay, settings.DAILY_READING_RETRY_SECONDS)
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+daily_reading_scheduler = DailyReadingScheduler()
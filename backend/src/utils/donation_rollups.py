@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rollup documents in `donation_rollups`, one per charity and one per user:
+#   {"_id": "charity:<id>", "charity_id", "total_donations", "total_raised", "last_donation_at"}
+#   {"_id": "user:<id>", "user_id", "total_donations", "total_tokens_donated", "charities", "last_donation_at"}
+# plus one marker document tracking rebuilds:
+#   {"_id": "meta:rebuild", "state": "rebuilding" | "complete", "rebuild_id", "backfilled"}
+#
+# Rollups are only trusted (and only incremented) once a rebuild has completed
+# ("backfilled"); before that reads aggregate and writes are skipped, since a
+# rollup upserted by one donation would hold only that donation. Donations
+# made while a rebuild runs are tagged with its id (`rollup_pending`): the
+# rebuild's scan skips every tagged donation, and each one is applied exactly
+# once by whoever claims it (atomically unsetting the tag) after the rollups
+# were replaced: the rebuild's catch-up, or the writer itself when its
+# donation lands after the rebuild completed. A later rebuild's catch-up
+# sweeps any tag left behind by a writer that failed in between.
+MARKER_ID = "meta:rebuild"
+STATE_REBUILDING = "rebuilding"
+STATE_COMPLETE = "complete"
+
+def charity_key(charity_id: str) -> str:
+    return f"charity:{charity_id}"
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def _rollup_updates(donation: Dict):
+    tokens = donation.get("tokens_spent", 0)
+    created_at = donation.get("created_at")
+    return [
+        UpdateOne(
+            {"_id": charity_key(donation["charity_id"])},
+            {
+                "$set": {"charity_id": donation["charity_id"]},
+                "$inc": {"total_donations": 1, "total_raised": tokens},
+                "$max": {"last_donation_at": created_at}
+            },
+            upsert=True
+        ),
+        UpdateOne(
+            {"_id": user_key(donation["user_id"])},
+            {
+                "$set": {"user_id": donation["user_id"]},
+                "$inc": {"total_donations": 1, "total_tokens_donated": tokens},
+                "$addToSet": {"charities": donation["charity_id"]},
+                "$max": {"last_donation_at": created_at}
+            },
+            upsert=True
+        )
+    ]
+
+async def _marker(db, session=None) -> Dict:
+    return await db.donation_rollups.find_one({"_id": MARKER_ID}, session=session) or {}
+
+async def prepare_donation(db, donation: Dict, session=None) -> Dict:
+    """
+    Call before inserting a donation: tags it if a rebuild is running.
+    Returns the marker, to hand to record_donation() for the same donation.
+    """
+    donation.pop("rollup_pending", None)  # transaction retries call this again
+    marker = await _marker(db, session)
+    if marker.get("state") == STATE_REBUILDING:
+        donation["rollup_pending"] = marker["rebuild_id"]
+    return marker
+
+async def _claim(db, query: Dict, session=None) -> Optional[Dict]:
+    """Untag one pending donation matching `query`; returns it if this call won it"""
+    return await db.charity_donations.find_one_and_update(
+        {**query, "rollup_pending": {"$exists": True}},
+        {"$unset": {"rollup_pending": ""}},
+        session=session
+    )
+
+async def record_donation(db, donation: Dict, session=None, marker: Optional[Dict] = None):
+    """
+    Update the charity and user rollups for one donation in a single bulk
+    write. `marker` is what prepare_donation() returned, saving a read.
+    """
+    if donation.get("rollup_pending"):
+        # Tagged: once the rebuild has completed, its catch-up may already
+        # have run, so claim it here (the catch-up skips it if we win)
+        marker = await _marker(db, session)
+        if marker.get("state") != STATE_COMPLETE or await _claim(db, {"_id": donation["_id"]}, session) is None:
+            return
+        donation.pop("rollup_pending")
+    else:
+        if marker is None:
+            marker = await _marker(db, session)
+        # Not backfilled yet, or counted by the running rebuild's scan
+        if not marker.get("backfilled") or marker.get("state") != STATE_COMPLETE:
+            return
+    await db.donation_rollups.bulk_write(_rollup_updates(donation), ordered=False, session=session)
+
+async def _load_rollup(db, key: str, field: str, value: str) -> Dict:
+    """The rollup once backfilled (one round trip with the marker), otherwise an index-backed $group"""
+    docs = {doc["_id"]: doc async for doc in db.donation_rollups.find({"_id": {"$in": [MARKER_ID, key]}})}
+    rollup = docs.get(key) if docs.get(MARKER_ID, {}).get("backfilled") else None
+    if rollup is None:
+        rollup = await _aggregate(db, field, value) or {}
+    return rollup
+
+async def get_charity_rollup(db, charity_id: str) -> Dict:
+    rollup = await _load_rollup(db, charity_key(charity_id), "charity_id", charity_id)
+    return {
+        "total_donations": rollup.get("total_donations", 0),
+        "total_raised": rollup.get("total_raised", 0)
+    }
+
+async def get_user_rollup(db, user_id: str) -> Dict:
+    rollup = await _load_rollup(db, user_key(user_id), "user_id", user_id)
+    return {
+        "total_donations": rollup.get("total_donations", 0),
+        "total_tokens_donated": rollup.get("total_tokens_donated", 0),
+        "charities_supported": len(rollup.get("charities", []))
+    }
+
+async def _aggregate(db, field: str, value: str) -> Optional[Dict]:
+    pipeline = [
+        {"$match": {field: value}},
+        {
+            "$group": {
+                "_id": None,
+                "total_donations": {"$sum": 1},
+                "total_raised": {"$sum": "$tokens_spent"},
+                "total_tokens_donated": {"$sum": "$tokens_spent"},
+                "charities": {"$addToSet": "$charity_id"}
+            }
+        }
+    ]
+    result = await db.charity_donations.aggregate(pipeline).to_list(length=1)
+    return result[0] if result else None
+
+async def _catch_up(db) -> int:
+    """
+    Apply every tagged donation (this rebuild's, and any left by an earlier
+    one), claiming each atomically, until a pass finds none pending
+    """
+    applied = 0
+    while True:
+        donation = await _claim(db, {})
+        if donation is None:
+            return applied
+        await db.donation_rollups.bulk_write(_rollup_updates(donation), ordered=False)
+        applied += 1
+
+async def rebuild(db, batch_size: int = 1000, settle_seconds: float = 5.0) -> Dict[str, int]:
+    """
+    Recompute every rollup from `charity_donations`, streaming donations in
+    batches, then replace the rollup documents in bulk. Safe while donations
+    continue: see the module comment. `settle_seconds` is how long an
+    untagged donation that read the state just before the rebuild started
+    may take to be written (set it above the request timeout); tagged ones
+    need no wait. If interrupted, run it again (rollup writes stay paused
+    until it completes); do not run two rebuilds at once.
+    """
+    rebuild_id = uuid.uuid4().hex
+    await db.donation_rollups.update_one(
+        {"_id": MARKER_ID},
+        {"$set": {"state": STATE_REBUILDING, "rebuild_id": rebuild_id, "started_at": datetime.utcnow()}},
+        upsert=True
+    )
+    # Untagged donations that read the previous state are written before the scan starts
+    await asyncio.sleep(settle_seconds)
+
+    charities: Dict[str, Dict] = {}
+    users: Dict[str, Dict] = {}
+    scanned = 0
+
+    cursor = db.charity_donations.find(
+        {"rollup_pending": {"$exists": False}},
+        {"user_id": 1, "charity_id": 1, "tokens_spent": 1, "created_at": 1}
+    ).batch_size(batch_size)
+    async for donation in cursor:
+        scanned += 1
+        tokens = donation.get("tokens_spent", 0)
+        created_at = donation.get("created_at")
+
+        charity = charities.setdefault(donation["charity_id"], {
+            "charity_id": donation["charity_id"], "total_donations": 0, "total_raised": 0, "last_donation_at": None
+        })
+        charity["total_donations"] += 1
+        charity["total_raised"] += tokens
+
+        user = users.setdefault(donation["user_id"], {
+            "user_id": donation["user_id"], "total_donations": 0, "total_tokens_donated": 0,
+            "charities": set(), "last_donation_at": None
+        })
+        user["total_donations"] += 1
+        user["total_tokens_donated"] += tokens
+        user["charities"].add(donation["charity_id"])
+
+        if created_at is not None:
+            for rollup in (charity, user):
+                if rollup["last_donation_at"] is None or created_at > rollup["last_donation_at"]:
+                    rollup["last_donation_at"] = created_at
+
+        if scanned % (batch_size * 50) == 0:
+            logger.info(f"Donation rollups: scanned {scanned} donations")
+
+    writes = [ReplaceOne({"_id": charity_key(cid)}, doc, upsert=True) for cid, doc in charities.items()]
+    writes += [
+        ReplaceOne({"_id": user_key(uid)}, {**doc, "charities": sorted(doc["charities"])}, upsert=True)
+        for uid, doc in users.items()
+    ]
+    for start in range(0, len(writes), batch_size):
+        await db.donation_rollups.bulk_write(writes[start:start + batch_size], ordered=False)
+
+    await db.donation_rollups.update_one(
+        {"_id": MARKER_ID},
+        {"$set": {"state": STATE_COMPLETE, "backfilled": True, "completed_at": datetime.utcnow()}}
+    )
+    # Tagged donations inserted from here on are claimed by their writers
+    caught_up = await _catch_up(db)
+
+    return {"donations": scanned, "caught_up": caught_up, "charities": len(charities), "users": len(users)}
+
+async def _main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        result = await rebuild(client[settings.MONGO_DB_NAME], batch_size=args.batch_size, settle_seconds=args.settle)
+        print(f"Rebuilt rollups: {result}")
+    finally:
+        client.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Backfill/rebuild per-charity and per-user donation rollups")
+    parser.add_argument("command", choices=("rebuild",))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--settle", type=float, default=5.0, help="Seconds to let in-flight donations land before the scan")
+    asyncio.run(_main(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
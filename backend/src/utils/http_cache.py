@@ -0,0 +1,145 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.utils import metrics
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Per-route caching rules.
+    `memory_ttl` - seconds a 200 body is replayed from memory without calling
+    the route (None: until evicted, 0: always call the route and only add
+    ETag/Cache-Control).
+    """
+    cache_control: str
+    memory_ttl: Optional[float] = 0
+
+@dataclass
+class _CachedResponse:
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: bytes
+    expires_at: float
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a serialized body"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+def _compile(template: str) -> re.Pattern:
+    """'/api/bible/prayer/{prayer_id}' -> regex matching one path segment per parameter"""
+    pattern = re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(template))
+    return re.compile(f"^{pattern}$")
+
+class HTTPCacheMiddleware:
+    """
+    ASGI middleware for GET endpoints whose responses rarely change.
+
+    Successful responses of the configured routes get a strong ETag (the
+    route's own, or a hash of the body) and the route's Cache-Control;
+    If-None-Match is answered with 304 without a body. Bodies are kept in a
+    bounded in-memory LRU keyed by path and query string and, within the
+    policy's memory_ttl, served from there without running the route.
+    Add it before CORSMiddleware so CORS headers are applied to cached replies.
+    """
+
+    def __init__(self, app, policies: Dict[str, CachePolicy], max_entries: int = 1024):
+        self.app = app
+        self.routes = [(_compile(template), policy) for template, policy in policies.items()]
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, bytes], _CachedResponse]" = OrderedDict()
+
+    def _policy(self, path: str) -> Optional[CachePolicy]:
+        for pattern, policy in self.routes:
+            if pattern.match(path):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        policy = self._policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope.get("query_string", b""))
+        if_none_match = ""
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            metrics.counter("http_cache.hit").inc()
+            await self._reply(send, scope, entry, if_none_match)
+            return
+
+        metrics.counter("http_cache.miss").inc()
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        body = b"".join(chunks)
+        if start is None or start["status"] != 200:
+            if start is not None:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = None
+        headers = []
+        for name, value in start.get("headers", []):
+            if name == b"etag":
+                etag = value
+            elif name not in (b"cache-control", b"content-length"):
+                headers.append((name, value))
+        if etag is None:
+            etag = make_etag(body).encode("latin-1")
+        headers.append((b"etag", etag))
+        headers.append((b"cache-control", policy.cache_control.encode("latin-1")))
+
+        expires_at = float("inf") if policy.memory_ttl is None else time.monotonic() + policy.memory_ttl
+        entry = _CachedResponse(headers, body, etag, expires_at)
+        if policy.memory_ttl != 0:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        await self._reply(send, scope, entry, if_none_match)
+
+    async def _reply(self, send, scope, entry: _CachedResponse, if_none_match: str):
+        if etag_matches(if_none_match, entry.etag.decode("latin-1")):
+            metrics.counter("http_cache.not_modified").inc()
+            headers = [(name, value) for name, value in entry.headers if name != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = entry.headers + [(b"content-length", str(len(entry.body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else entry.body})
@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_left, insort
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("daily", "weekly", "all_time")
+METRICS = ("tokens", "donations")
+
+def period_start(period: str, when: datetime) -> Optional[datetime]:
+    """Start of the (UTC) period containing `when`; None for all-time"""
+    if period == "all_time":
+        return None
+    day = datetime.combine(when.date(), time.min)
+    if period == "daily":
+        return day
+    if period == "weekly":
+        return day - timedelta(days=when.weekday())
+    raise ValueError(f"Unknown leaderboard period: {period}")
+
+class Leaderboard:
+    """
+    Scores kept in a sorted array of (-score, user_id): rank lookups are a
+    bisect (O(log n)), updates a bisect + list insert/delete (a memmove,
+    fast for the user counts we have). Ties share the best rank (1, 2, 2, 4).
+    """
+
+    def __init__(self, started_at: Optional[datetime] = None):
+        self.started_at = started_at
+        self._scores: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+        self._order: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def count(self, user_id: str) -> int:
+        return self._counts.get(user_id, 0)
+
+    def set(self, user_id: str, score: int, count: int = 0):
+        old = self._scores.get(user_id)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, user_id))]
+        self._scores[user_id] = score
+        self._counts[user_id] = count
+        insort(self._order, (-score, user_id))
+
+    def add(self, user_id: str, delta: int, count: int = 1):
+        self.set(user_id, self._scores.get(user_id, 0) + delta, self.count(user_id) + count)
+
+    def _rank_of_score(self, score: int) -> int:
+        # (-score,) sorts before every (-score, user_id): first position with this score
+        return bisect_left(self._order, (-score,)) + 1
+
+    def rank(self, user_id: str) -> Optional[int]:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._rank_of_score(score)
+
+    def _entries(self, start: int, stop: int) -> List[Dict]:
+        return [
+            {"rank": self._rank_of_score(-neg_score), "user_id": user_id, "score": -neg_score, "count": self.count(user_id)}
+            for neg_score, user_id in self._order[start:stop]
+        ]
+
+    def top(self, limit: int, offset: int = 0) -> List[Dict]:
+        return self._entries(offset, offset + limit)
+
+    def around(self, user_id: str, window: int) -> List[Dict]:
+        """Entries up to `window` places above and below the user (empty if unranked)"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return []
+        position = bisect_left(self._order, (-score, user_id))
+        return self._entries(max(0, position - window), position + window + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "scores": {user_id: [score, self._counts.get(user_id, 0)] for user_id, score in self._scores.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Leaderboard":
+        started_at = data.get("started_at")
+        board = cls(datetime.fromisoformat(started_at) if started_at else None)
+        board._scores = {user_id: score for user_id, (score, _) in data["scores"].items()}
+        board._counts = {user_id: count for user_id, (_, count) in data["scores"].items()}
+        board._order = sorted((-score, user_id) for user_id, score in board._scores.items())
+        return board
+
+class LeaderboardService:
+    """
+    In-memory token and donation leaderboards (daily, weekly, all-time).
+
+    Loaded at startup from the last snapshot plus the ledger entries written
+    since (or rebuilt from Mongo when there is no usable snapshot), then
+    kept current by record_tokens()/record_donation() on every award and
+    donation. Daily/weekly boards roll over at UTC midnight / Monday.
+    Snapshots are written periodically and at shutdown. An entry may be
+    recorded a little after its created_at, so the catch-up starts an
+    overlap before the snapshot was taken and skips the ids the snapshot
+    lists as already counted in that window. State is per
+    process: with several workers each one only sees its own updates until
+    the next load.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path or settings.LEADERBOARD_SNAPSHOT_PATH
+        self._boards: Dict[Tuple[str, str], Leaderboard] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # "<metric>:<entry id>" -> created_at of recently recorded entries, for the snapshot's overlap window
+        self._recent: Dict[str, datetime] = {}
+
+    def board(self, metric: str, period: str, now: Optional[datetime] = None) -> Leaderboard:
+        started_at = period_start(period, now or datetime.utcnow())
+        board = self._boards.get((metric, period))
+        if board is None or board.started_at != started_at:
+            # New period (or first use): start empty
+            board = self._boards[(metric, period)] = Leaderboard(started_at)
+        return board
+
+    def _record(self, metric: str, user_id: str, amount: int, when: Optional[datetime], entry_id: Optional[str]):
+        if amount <= 0:
+            return
+        when = when or datetime.utcnow()
+        now = datetime.utcnow()
+        if entry_id is not None:
+            self._recent[f"{metric}:{entry_id}"] = when
+        for period in PERIODS:
+            board = self.board(metric, period, now)
+            if board.started_at is None or when >= board.started_at:
+                board.add(user_id, amount)
+        metrics.counter(f"leaderboards.{metric}.updates").inc()
+
+    def record_tokens(self, user_id: str, amount: int, when: Optional[datetime] = None, entry_id: Optional[str] = None):
+        """`entry_id` (the ledger entry's _id) lets a snapshot catch-up skip it"""
+        self._record("tokens", user_id, amount, when, entry_id)
+
+    def record_donation(
+        self, user_id: str, tokens_spent: int, when: Optional[datetime] = None, entry_id: Optional[str] = None
+    ):
+        """`entry_id` (the donation's _id) lets a snapshot catch-up skip it"""
+        self._record("donations", user_id, tokens_spent, when, entry_id)
+
+    async def _sum_by_user(self, collection, match: Dict, amount_field: str) -> List[Dict]:
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": "$user_id", "score": {"$sum": f"${amount_field}"}, "count": {"$sum": 1}}}
+        ]
+        return await collection.aggregate(pipeline).to_list(length=None)
+
+    async def rebuild(self, db) -> Dict[str, int]:
+        """Recompute every board from Mongo"""
+        now = datetime.utcnow()
+        boards: Dict[Tuple[str, str], Leaderboard] = {}
+
+        # All-time tokens: token_balances.total_earned, as the old endpoint used
+        tokens_all = boards[("tokens", "all_time")] = Leaderboard()
+        async for balance in db.token_balances.find({}, {"user_id": 1, "total_earned": 1}):
+            if balance.get("total_earned", 0) > 0:
+                tokens_all.set(balance["user_id"], balance["total_earned"])
+
+        for metric, collection, match, amount_field in (
+            ("tokens", db.token_transactions, {"type": "earn"}, "amount"),
+            ("donations", db.charity_donations, {}, "tokens_spent"),
+        ):
+            for period in PERIODS:
+                if (metric, period) in boards:
+                    continue
+                started_at = period_start(period, now)
+                period_match = dict(match)
+                if started_at is not None:
+                    period_match["created_at"] = {"$gte": started_at}
+                board = boards[(metric, period)] = Leaderboard(started_at)
+                for row in await self._sum_by_user(collection, period_match, amount_field):
+                    if row["_id"] is not None and row["score"] > 0:
+                        board.set(row["_id"], row["score"], row["count"])
+
+        self._boards = boards
+        # The aggregates counted these: a snapshot's catch-up must skip them too
+        since = now - timedelta(seconds=settings.LEADERBOARD_CATCH_UP_OVERLAP_SECONDS)
+        self._recent = {}
+        for metric, collection, match in (
+            ("tokens", db.token_transactions, {"type": "earn"}),
+            ("donations", db.charity_donations, {}),
+        ):
+            async for entry in collection.find({**match, "created_at": {"$gte": since}}, {"created_at": 1}):
+                self._recent[f"{metric}:{entry['_id']}"] = entry["created_at"]
+        return {f"{metric}:{period}": len(board) for (metric, period), board in boards.items()}
+
+    def _snapshot_payload(self) -> Dict:
+        # Stamped before the boards are copied: everything recorded so far is in them
+        taken_at = datetime.utcnow()
+        overlap_start = taken_at - timedelta(seconds=settings.LEADERBOARD_CATCH_UP_OVERLAP_SECONDS)
+        self._recent = {key: when for key, when in self._recent.items() if when >= overlap_start}
+        return {
+            "taken_at": taken_at.isoformat(),
+            "boards": {f"{metric}:{period}": board.to_dict() for (metric, period), board in self._boards.items()},
+            "recent": list(self._recent)
+        }
+
+    def _write_snapshot(self, payload: Dict):
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def save_snapshot(self):
+        if self._loaded:
+            self._write_snapshot(self._snapshot_payload())
+
+    def _read_snapshot(self) -> Optional[Tuple[datetime, Set[str]]]:
+        """Load boards from the snapshot; returns when it was taken and the recent entries it counted, or None if unusable"""
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                payload = json.load(f)
+            taken_at = datetime.fromisoformat(payload["taken_at"])
+            counted = set(payload.get("recent", []))
+            boards = {}
+            for key, data in payload["boards"].items():
+                metric, period = key.split(":", 1)
+                boards[(metric, period)] = Leaderboard.from_dict(data)
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable leaderboard snapshot {self.snapshot_path}: {e}")
+            return None
+
+        if (datetime.utcnow() - taken_at).total_seconds() > settings.LEADERBOARD_SNAPSHOT_MAX_AGE_SECONDS:
+            return None
+        self._boards = boards
+        return taken_at, counted
+
+    async def _catch_up(self, db, taken_at: datetime, counted: Set[str]) -> int:
+        """Replay entries from the overlap before the snapshot on, except those it already counted"""
+        since = taken_at - timedelta(seconds=settings.LEADERBOARD_CATCH_UP_OVERLAP_SECONDS)
+        replayed = 0
+        async for transaction in db.token_transactions.find(
+            {"type": "earn", "created_at": {"$gte": since}}, {"user_id": 1, "amount": 1, "created_at": 1}
+        ):
+            if f"tokens:{transaction['_id']}" in counted:
+                continue
+            self.record_tokens(
+                transaction["user_id"], transaction.get("amount", 0), transaction["created_at"], transaction["_id"]
+            )
+            replayed += 1
+        async for donation in db.charity_donations.find(
+            {"created_at": {"$gte": since}}, {"user_id": 1, "tokens_spent": 1, "created_at": 1}
+        ):
+            if f"donations:{donation['_id']}" in counted:
+                continue
+            self.record_donation(
+                donation["user_id"], donation.get("tokens_spent", 0), donation["created_at"], donation["_id"]
+            )
+            replayed += 1
+        return replayed
+
+    async def load(self, db):
+        """Snapshot + ledger catch-up when possible, full rebuild otherwise"""
+        async with self._load_lock:
+            snapshot = await asyncio.to_thread(self._read_snapshot)
+            if snapshot is not None:
+                taken_at, counted = snapshot
+                replayed = await self._catch_up(db, taken_at, counted)
+                logger.info(f"Leaderboards loaded from snapshot ({taken_at.isoformat()}), {replayed} entries replayed")
+            else:
+                sizes = await self.rebuild(db)
+                logger.info(f"Leaderboards rebuilt from MongoDB: {sizes}")
+            self._loaded = True
+
+    async def ensure_loaded(self, db):
+        if not self._loaded:
+            await self.load(db)
+
+    async def _run_snapshots(self):
+        while True:
+            await asyncio.sleep(settings.LEADERBOARD_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                # Serialize on the loop (boards are not thread-safe), write off it
+                await asyncio.to_thread(self._write_snapshot, self._snapshot_payload())
+            except Exception as e:
+                logger.error(f"Failed to write leaderboard snapshot: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_snapshots())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            self.save_snapshot()
+        except Exception as e:
+            logger.error(f"Failed to write leaderboard snapshot: {e}")
+
+leaderboards = LeaderboardService()
+
+async def _main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        sizes = await leaderboards.rebuild(client[settings.MONGO_DB_NAME])
+        leaderboards._loaded = True
+        leaderboards.save_snapshot()
+        print(f"Rebuilt leaderboards {sizes} -> {leaderboards.snapshot_path}")
+    finally:
+        client.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Rebuild the leaderboards from MongoDB and write a fresh snapshot")
+    parser.add_argument("command", choices=("rebuild",))
+    parser.parse_args()
+    asyncio.run(_main())
+
+if __name__ == "__main__":
+    main()
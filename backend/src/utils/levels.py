@@ -0,0 +1,32 @@
+from bisect import bisect_right
+from typing import Dict, List
+
+BASE_XP = 100
+MULTIPLIER = 1.5
+# Totals beyond this are clamped to the last level
+MAX_TOTAL_EARNED = 2 ** 63
+
+def _build_thresholds() -> List[int]:
+    """Total earned tokens needed to reach level i + 1 (thresholds[0] == 0 is level 1)"""
+    thresholds = [0, BASE_XP]
+    level = 2
+    while thresholds[-1] <= MAX_TOTAL_EARNED:
+        thresholds.append(thresholds[-1] + int(BASE_XP * MULTIPLIER ** (level - 1)))
+        level += 1
+    return thresholds
+
+LEVEL_THRESHOLDS = _build_thresholds()
+
+def calculate_level(total_earned: int) -> Dict[str, int]:
+    """
+    Level for a total of earned tokens: each level needs BASE_XP *
+    MULTIPLIER^(level - 1) more than the previous one. One bisect over the
+    precomputed thresholds instead of stepping through the levels.
+    """
+    level = max(1, min(bisect_right(LEVEL_THRESHOLDS, total_earned), len(LEVEL_THRESHOLDS) - 1))
+    current = LEVEL_THRESHOLDS[level - 1]
+    return {
+        "level": level,
+        "experience": total_earned - current,
+        "experience_to_next_level": LEVEL_THRESHOLDS[level] - current
+    }
@@ -0,0 +1,86 @@
+import bisect
+import threading
+from typing import Dict, Tuple
+
+# Upper bounds (seconds) of latency histogram buckets
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative counts exported like Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[f"le_{bound}"] = cumulative
+        buckets["le_inf"] = count
+
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "avg": round(total / count, 6) if count else 0.0,
+            "buckets": buckets
+        }
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_counters: Dict[str, Counter] = {}
+_registry_lock = threading.Lock()
+
+def histogram(name: str) -> LatencyHistogram:
+    """Get (or create) a named latency histogram"""
+    with _registry_lock:
+        if name not in _histograms:
+            _histograms[name] = LatencyHistogram()
+        return _histograms[name]
+
+def counter(name: str) -> Counter:
+    """Get (or create) a named counter"""
+    with _registry_lock:
+        if name not in _counters:
+            _counters[name] = Counter()
+        return _counters[name]
+
+def snapshot() -> Dict:
+    """All registered metrics as a JSON-serializable dict"""
+    with _registry_lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+
+    return {
+        "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())},
+        "counters": {name: c.value for name, c in sorted(counters.items())}
+    }
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from src.config import settings
+from src.utils.pagination import SORT, after_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection -> indexes. Applied idempotently at startup.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "token_balances": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("total_earned", DESCENDING)], name="total_earned"),
+    ],
+    "token_transactions": [
+        # (created_at, _id) is the keyset pagination order
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+        # Leaderboard period ranges and exports in (created_at, _id) order
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+    ],
+    "charity_actions": [
+        IndexModel([("is_active", ASCENDING), ("total_supported", DESCENDING)], name="is_active_total_supported"),
+    ],
+    "charity_donations": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+        IndexModel([("charity_id", ASCENDING), ("created_at", DESCENDING)], name="charity_id_created_at"),
+        IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name="created_at_id"),
+    ],
+    "transcriptions": [
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    ],
+    "analyses": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    ],
+    "fraud_logs": [
+        # fraud_logs are stamped with `timestamp`, not created_at
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp"),
+        IndexModel([("timestamp", ASCENDING), ("_id", ASCENDING)], name="timestamp_id"),
+    ],
+}
+
+def _next_page(query: Dict, time_field: str = "created_at", descending: bool = True) -> Dict:
+    """`query` as fetch_page / exports send it once a cursor is passed"""
+    token = encode_cursor({"_id": "plan-check", time_field: datetime(2000, 1, 1)}, time_field)
+    return after_cursor(query, token, time_field=time_field, descending=descending)
+
+_EXPORT_SORT = [("created_at", ASCENDING), ("_id", ASCENDING)]
+
+# Representative router queries (collection, filter, sort) that must be index-backed
+QUERY_PLAN_CHECKS: List[Tuple[str, Dict, Optional[List[Tuple[str, int]]]]] = [
+    ("users", {"email": "plan-check@example.com"}, None),
+    ("token_balances", {"user_id": "plan-check"}, None),
+    ("token_balances", {}, [("total_earned", DESCENDING)]),
+    ("token_balances", {"user_id": {"$in": ["plan-check"]}}, None),
+    # Listings (fetch_page): first page and keyset pages
+    ("token_transactions", {"user_id": "plan-check"}, SORT),
+    ("token_transactions", _next_page({"user_id": "plan-check"}), SORT),
+    ("charity_actions", {"is_active": True}, None),
+    ("charity_actions", {"is_active": True}, [("total_supported", DESCENDING)]),
+    ("charity_donations", {"user_id": "plan-check"}, SORT),
+    ("charity_donations", _next_page({"user_id": "plan-check"}), SORT),
+    ("charity_donations", {"charity_id": "plan-check"}, None),
+    ("transcriptions", {"created_at": {"$lt": 0}}, None),
+    ("transcriptions", {}, SORT),
+    ("transcriptions", _next_page({}), SORT),
+    ("analyses", {}, SORT),
+    ("analyses", _next_page({}), SORT),
+    # Balance reconciler streams the ledger in user order
+    ("token_transactions", {}, [("user_id", ASCENDING)]),
+    # Streaming exports: time range in (time field, _id) order, and resumed
+    ("token_transactions", {"created_at": {"$type": "date", "$gte": 0}}, _EXPORT_SORT),
+    ("token_transactions", _next_page({"created_at": {"$type": "date"}}, descending=False), _EXPORT_SORT),
+    ("analyses", {"created_at": {"$type": "date", "$gte": 0}}, _EXPORT_SORT),
+    ("analyses", _next_page({"created_at": {"$type": "date"}}, descending=False), _EXPORT_SORT),
+    ("charity_donations", {"created_at": {"$type": "date", "$gte": 0}}, _EXPORT_SORT),
+    ("charity_donations", _next_page({"created_at": {"$type": "date"}}, descending=False), _EXPORT_SORT),
+    ("fraud_logs", {"timestamp": {"$type": "date", "$gte": 0}}, [("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    ("fraud_logs", _next_page({"timestamp": {"$type": "date"}}, "timestamp", descending=False),
+     [("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    # Leaderboard period rebuilds and snapshot catch-up
+    ("token_transactions", {"type": "earn", "created_at": {"$gt": 0}}, None),
+    ("charity_donations", {"created_at": {"$gt": 0}}, None),
+]
+
+async def ensure_indexes(db) -> int:
+    """Create every registered index (no-op for existing ones); returns the number of failed collections"""
+    failed = 0
+    for position, (collection, indexes) in enumerate(INDEXES.items()):
+        try:
+            await db[collection].create_indexes(indexes)
+        except ConnectionFailure as e:
+            # Server unreachable (e.g. ServerSelectionTimeoutError): the rest would time out too
+            failed += len(INDEXES) - position
+            logger.error(f"Skipping index creation, MongoDB unreachable: {e}")
+            break
+        except PyMongoError as e:
+            # e.g. duplicate emails blocking a unique index; keep serving
+            failed += 1
+            logger.error(f"Failed to create indexes on {collection}: {e}")
+    logger.info(f"MongoDB indexes ensured on {len(INDEXES) - failed}/{len(INDEXES)} collections")
+    return failed
+
+def plan_stages(plan: Dict) -> Iterator[str]:
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+async def check_query_plans(db) -> List[str]:
+    """explain() every QUERY_PLAN_CHECKS query; returns descriptions of the ones planned as COLLSCAN"""
+    offenders = []
+    for collection, query, sort in QUERY_PLAN_CHECKS:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in plan_stages(winning_plan):
+            offenders.append(f"{collection} {query} sort={sort}")
+    return offenders
+
+async def _main(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[args.db or settings.MONGO_DB_NAME]
+    try:
+        if args.command == "ensure":
+            return 1 if await ensure_indexes(db) else 0
+        offenders = await check_query_plans(db)
+        for offender in offenders:
+            print(f"COLLSCAN: {offender}")
+        print(f"{len(QUERY_PLAN_CHECKS) - len(offenders)}/{len(QUERY_PLAN_CHECKS)} queries index-backed")
+        return 1 if offenders else 0
+    finally:
+        client.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="MongoDB index registry")
+    parser.add_argument("command", choices=("ensure", "check"), help="Create indexes, or explain() router queries and fail on COLLSCAN")
+    parser.add_argument("--db", default=None, help="Database name (default: MONGO_DB_NAME)")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from src.config import settings
+from src.utils.mongo_indexes import ensure_indexes, check_query_plans
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,13 @@ async def connect_to_mongo():
         
         await mongodb_client.admin.command('ping')
         logger.info("MongoDB connection successful")
+        
+        if settings.MONGO_ENSURE_INDEXES:
+            await ensure_indexes(database)
+        if settings.MONGO_QUERY_PLAN_GUARD:
+            offenders = await check_query_plans(database)
+            if offenders:
+                raise RuntimeError(f"Queries planned as COLLSCAN: {'; '.join(offenders)}")
     except Exception as e:
         logger.error(f"MongoDB connection failed: {e}")
         raise
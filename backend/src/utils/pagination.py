@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+# Listings are ordered newest first on (created_at, _id); _id breaks ties
+SORT = [("created_at", -1), ("_id", -1)]
+
+def encode_cursor(doc: Dict, time_field: str = "created_at") -> str:
+    """Opaque continuation token pointing just after `doc`"""
+    doc_id = doc["_id"]
+    payload = {"c": doc[time_field].isoformat(), "i": str(doc_id)}
+    if isinstance(doc_id, ObjectId):
+        payload["o"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(token: str) -> Tuple[datetime, Any]:
+    """(timestamp, _id) from a token; ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload["c"])
+        doc_id = ObjectId(payload["i"]) if payload.get("o") else payload["i"]
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    return created_at, doc_id
+
+def after_cursor(query: Dict, token: str, time_field: str = "created_at", descending: bool = True) -> Dict:
+    """Restrict `query` to documents sorted after the cursor"""
+    timestamp, doc_id = decode_cursor(token)
+    op = "$lt" if descending else "$gt"
+    branches = [
+        {time_field: {op: timestamp}},
+        {time_field: timestamp, "_id": {op: doc_id}}
+    ]
+    # $lt/$gt only match _ids of the cursor's BSON type, and collections with
+    # both kinds (analyses) order every string before every ObjectId: on a
+    # tie, the ids of the other type that sort after the cursor come next
+    if descending and isinstance(doc_id, ObjectId):
+        branches.append({time_field: timestamp, "_id": {"$type": "string"}})
+    elif not descending and not isinstance(doc_id, ObjectId):
+        branches.append({time_field: timestamp, "_id": {"$type": "objectId"}})
+    keyset = {"$or": branches}
+    return {"$and": [query, keyset]} if query else keyset
+
+async def fetch_page(
+    collection,
+    query: Dict,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of `collection` newest first plus the token for the next page
+    (None on the last page). With a cursor the page is an index seek, so its
+    cost does not grow with depth; `skip` is only honoured without a cursor,
+    for old clients.
+    """
+    if cursor:
+        query = after_cursor(query, cursor)
+        skip = 0
+    # One extra document tells whether there is a next page
+    docs = await collection.find(query, projection).sort(SORT).skip(skip).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+async def count_total(collection, query: Dict) -> int:
+    """Total for listing headers: collection metadata when unfiltered, otherwise an (index-backed) count"""
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query)
@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+from src.config import settings
+from src.utils.async_cache import AsyncTTLCache
+from src.utils.levels import calculate_level
+
+# user_id -> profile payload (None for unknown users); invalidated on every
+# write that changes it, the TTL bounds staleness across worker processes
+_profiles = AsyncTTLCache(
+    "user_profiles",
+    maxsize=settings.PROFILE_CACHE_MAX_ENTRIES,
+    ttl=settings.PROFILE_CACHE_TTL_SECONDS
+)
+# email -> user_id; ids are derived from the email at registration and never change
+_email_ids: Dict[str, str] = {}
+
+def build_profile(user: Dict) -> Dict:
+    total_earned = user.get("total_earned", 0)
+    level_data = calculate_level(total_earned)
+    return {
+        "id": user["_id"],
+        "username": user.get("username"),
+        "email": user.get("email"),
+        "wallet_address": user.get("wallet_address"),
+        "created_at": user.get("created_at"),
+        "updated_at": user.get("updated_at"),
+        "is_active": user.get("is_active", True),
+        "tokens_balance": user.get("tokens_balance", 0),
+        "total_earned": total_earned,
+        "total_donated": user.get("total_donated", 0),
+        "prayers_count": user.get("prayers_count", 0),
+        "streak_days": user.get("streak_days", 0),
+        "level": level_data["level"],
+        "experience": level_data["experience"],
+        "experience_to_next_level": level_data["experience_to_next_level"]
+    }
+
+async def _load(db, user_id: str) -> Optional[Dict]:
+    user = await db.users.find_one({"_id": user_id})
+    return build_profile(user) if user else None
+
+async def get_profile(db, user_id: str) -> Optional[Dict]:
+    """Profile with computed level, None if the user does not exist"""
+    return await _profiles.get_or_load(user_id, lambda: _load(db, user_id))
+
+async def get_profile_by_email(db, email: str) -> Optional[Dict]:
+    user_id = _email_ids.get(email)
+    if user_id is not None:
+        return await get_profile(db, user_id)
+
+    user = await db.users.find_one({"email": email})
+    if not user:
+        return None
+    if len(_email_ids) >= settings.PROFILE_CACHE_MAX_ENTRIES:
+        _email_ids.clear()
+    _email_ids[email] = user["_id"]
+    profile = build_profile(user)
+    _profiles.set(user["_id"], profile)
+    return profile
+
+def invalidate(user_id: str):
+    _profiles.invalidate(user_id)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, up to `capacity` banked.
+    acquire() waits until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: grows by ~1 per window of successes and halves
+    when the upstream pushes back (429, timeouts, 5xx).
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = None):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(initial)
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def release(self, success: Optional[bool]):
+        """Free a slot; success=None gives it back without adjusting the limit"""
+        async with self._condition:
+            self._in_flight -= 1
+            if success:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif success is not None:
+                self.limit = max(self.minimum, self.limit / 2)
+            self._condition.notify_all()
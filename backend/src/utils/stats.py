@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Documents in the `stats` collection, maintained with $inc when STATS_DOCUMENTS_ENABLED.
+# A document is only trusted once `rebuild` has stamped it "backfilled"; until
+# a rebuild has created it, increments are no-ops (no upsert), since an
+# upserted document would only count the writes made after it appeared.
+# While a rebuild runs the document carries its `rebuild_cutoff`; records
+# created at or after it are also added to `since_cutoff`, and the rebuild
+# $sets the counters to its aggregate of older records plus `since_cutoff`.
+PRAYER_STATS_ID = "prayers"
+CHARITY_STATS_ID = "charity"
+
+PRAYER_FIELDS = ("total_prayers", "total_tokens_earned", "sum_focus_score", "sum_engagement_score")
+CHARITY_FIELDS = ("total_donations", "total_tokens_donated")
+
+def prayer_tokens(analysis: Dict) -> int:
+    """Token estimate per analysis used by /api/prayer/stats"""
+    return (
+        10 + int(analysis.get("focus_score", 0) * 20) + int(analysis.get("engagement_score", 0) * 15) +
+        (5 if analysis.get("sentiment") == "positive" else 0)
+    )
+
+# Server-side equivalent of prayer_tokens() (int() truncates like $trunc)
+_PRAYER_TOKENS_EXPR = {
+    "$add": [
+        10,
+        {"$trunc": {"$multiply": [{"$ifNull": ["$focus_score", 0]}, 20]}},
+        {"$trunc": {"$multiply": [{"$ifNull": ["$engagement_score", 0]}, 15]}},
+        {"$cond": [{"$eq": ["$sentiment", "positive"]}, 5, 0]}
+    ]
+}
+
+def _created_before(cutoff: Optional[datetime]) -> List[Dict]:
+    # Records without created_at count as old ones
+    return [{"$match": {"created_at": {"$not": {"$gte": cutoff}}}}] if cutoff else []
+
+async def aggregate_prayer_stats(db, cutoff: Optional[datetime] = None) -> Dict:
+    """Raw prayer counters computed with one $group over `analyses` (created before `cutoff`, if given)"""
+    pipeline = _created_before(cutoff) + [
+        {
+            "$group": {
+                "_id": None,
+                "total_prayers": {"$sum": 1},
+                "total_tokens_earned": {"$sum": _PRAYER_TOKENS_EXPR},
+                "sum_focus_score": {"$sum": {"$ifNull": ["$focus_score", 0]}},
+                "sum_engagement_score": {"$sum": {"$ifNull": ["$engagement_score", 0]}}
+            }
+        }
+    ]
+    result = await db.analyses.aggregate(pipeline).to_list(length=1)
+    totals = result[0] if result else {}
+    return {
+        "total_prayers": totals.get("total_prayers", 0),
+        "total_tokens_earned": totals.get("total_tokens_earned", 0),
+        "sum_focus_score": totals.get("sum_focus_score", 0.0),
+        "sum_engagement_score": totals.get("sum_engagement_score", 0.0)
+    }
+
+async def aggregate_charity_stats(db, cutoff: Optional[datetime] = None) -> Dict:
+    """Raw donation counters computed with one $group over `charity_donations` (created before `cutoff`, if given)"""
+    pipeline = _created_before(cutoff) + [
+        {
+            "$group": {
+                "_id": None,
+                "total_donations": {"$sum": 1},
+                "total_tokens_donated": {"$sum": {"$ifNull": ["$tokens_spent", 0]}}
+            }
+        }
+    ]
+    result = await db.charity_donations.aggregate(pipeline).to_list(length=1)
+    totals = result[0] if result else {}
+    return {
+        "total_donations": totals.get("total_donations", 0),
+        "total_tokens_donated": totals.get("total_tokens_donated", 0)
+    }
+
+async def get_prayer_stats(db) -> Dict:
+    """Counters from the stats document once backfilled, otherwise aggregated"""
+    totals = None
+    if settings.STATS_DOCUMENTS_ENABLED:
+        totals = await db.stats.find_one({"_id": PRAYER_STATS_ID, "backfilled": True})
+    if totals is None:
+        totals = await aggregate_prayer_stats(db)
+    return totals
+
+async def get_charity_stats(db) -> Dict:
+    totals = None
+    if settings.STATS_DOCUMENTS_ENABLED:
+        totals = await db.stats.find_one({"_id": CHARITY_STATS_ID, "backfilled": True})
+    if totals is None:
+        totals = await aggregate_charity_stats(db)
+    return totals
+
+def _increment(amounts: Dict[str, float], created_at: datetime) -> List[Dict]:
+    """
+    Pipeline update adding `amounts` to the counters, and to `since_cutoff`
+    as well when a rebuild is running and the record is not older than its cutoff
+    """
+    after_cutoff = {
+        "$and": [{"$eq": [{"$type": "$rebuild_cutoff"}, "date"]}, {"$gte": [created_at, "$rebuild_cutoff"]}]
+    }
+    return [{
+        "$set": {
+            **{field: {"$add": [{"$ifNull": [f"${field}", 0]}, value]} for field, value in amounts.items()},
+            "since_cutoff": {
+                "$cond": [
+                    after_cutoff,
+                    {
+                        field: {"$add": [{"$ifNull": [f"$since_cutoff.{field}", 0]}, value]}
+                        for field, value in amounts.items()
+                    },
+                    "$since_cutoff"
+                ]
+            }
+        }
+    }]
+
+async def record_analysis(db, analysis: Dict):
+    """Add one inserted analysis to the prayer stats document"""
+    if not settings.STATS_DOCUMENTS_ENABLED:
+        return
+    try:
+        await db.stats.update_one(
+            {"_id": PRAYER_STATS_ID},
+            _increment(
+                {
+                    "total_prayers": 1,
+                    "total_tokens_earned": prayer_tokens(analysis),
+                    "sum_focus_score": analysis.get("focus_score", 0),
+                    "sum_engagement_score": analysis.get("engagement_score", 0)
+                },
+                analysis["created_at"]
+            )
+        )
+    except Exception as e:
+        logger.error(f"Failed to update prayer stats: {e}")
+
+async def record_donation(db, tokens_spent: int, created_at: datetime):
+    """Add one donation to the charity stats document"""
+    if not settings.STATS_DOCUMENTS_ENABLED:
+        return
+    try:
+        await db.stats.update_one(
+            {"_id": CHARITY_STATS_ID},
+            _increment({"total_donations": 1, "total_tokens_donated": tokens_spent}, created_at)
+        )
+    except Exception as e:
+        logger.error(f"Failed to update charity stats: {e}")
+
+async def _rebuild_document(db, stats_id: str, fields: Tuple[str, ...], aggregate) -> Dict:
+    cutoff = datetime.utcnow()
+    # Creates the document if missing; increments keep landing on it from here on
+    await db.stats.update_one(
+        {"_id": stats_id},
+        {"$set": {"rebuild_cutoff": cutoff, "since_cutoff": {}}},
+        upsert=True
+    )
+    totals = await aggregate(db, cutoff)
+    result = await db.stats.update_one(
+        {"_id": stats_id, "rebuild_cutoff": cutoff},
+        [
+            {
+                "$set": {
+                    **{
+                        field: {"$add": [totals[field], {"$ifNull": [f"$since_cutoff.{field}", 0]}]}
+                        for field in fields
+                    },
+                    "backfilled": True
+                }
+            },
+            {"$unset": ["rebuild_cutoff", "since_cutoff"]}
+        ]
+    )
+    if not result.matched_count:
+        logger.warning(f"Stats rebuild of {stats_id} superseded by a newer one")
+    return totals
+
+async def rebuild(db):
+    """
+    Recompute both stats documents from the source collections without
+    pausing increments (see the module comment). Records created just before
+    the cutoff but inserted after the aggregate ran are missed; run it when
+    writes are quiet to be exact.
+    """
+    prayer = await _rebuild_document(db, PRAYER_STATS_ID, PRAYER_FIELDS, aggregate_prayer_stats)
+    charity = await _rebuild_document(db, CHARITY_STATS_ID, CHARITY_FIELDS, aggregate_charity_stats)
+    return prayer, charity
+
+async def _main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        prayer, charity = await rebuild(client[settings.MONGO_DB_NAME])
+        print(f"prayers: {prayer}")
+        print(f"charity: {charity}")
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the incrementally maintained stats documents")
+    parser.add_argument("command", choices=("rebuild",))
+    parser.parse_args()
+    asyncio.run(_main())
+
+if __name__ == "__main__":
+    main()
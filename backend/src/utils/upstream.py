@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import settings
+from src.utils import metrics
+from src.utils.rate_limit import AdaptiveLimiter, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "slow down / try again later" rather than a bad request
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as delay-seconds or HTTP-date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamFetcher:
+    """
+    Polite GET for one upstream host: a token bucket caps the request rate,
+    an AIMD limiter adapts concurrency to how the host responds, and 429/5xx
+    and transport errors are retried with backoff, honouring Retry-After.
+    A Retry-After also pauses every other request to the host until it
+    expires. Waits longer than `max_retry_after` are not taken in the request
+    path; the error is raised so the caller can fall back instead.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float,
+        max_concurrency: int,
+        max_attempts: int = None,
+        max_retry_after: float = None
+    ):
+        self.host = host
+        self.bucket = TokenBucket(rate, capacity=max(1.0, rate * 2))
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.max_attempts = max_attempts or settings.BIBLE_UPSTREAM_MAX_ATTEMPTS
+        self.max_retry_after = max_retry_after if max_retry_after is not None else settings.BIBLE_UPSTREAM_MAX_RETRY_AFTER
+        self._paused_until = 0.0
+
+    def _metric(self, event: str) -> str:
+        return f"upstream.{self.host}.{event}"
+
+    def _pause(self, delay: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    async def _admit(self):
+        """Wait out any Retry-After pause, then take a rate token and a concurrency slot"""
+        while True:
+            paused = self._paused_until - time.monotonic()
+            if paused > self.max_retry_after:
+                metrics.counter(self._metric("paused_reject")).inc()
+                raise httpx.HTTPError(f"{self.host} is rate limiting us for another {paused:.0f}s")
+            if paused > 0:
+                await asyncio.sleep(paused)
+
+            await self.bucket.acquire()
+            await self.limiter.acquire()
+            if self._paused_until <= time.monotonic():
+                return
+            # A Retry-After arrived while we were queued: give the slot back and wait again
+            await self.limiter.release(None)
+
+    async def get(self, client: httpx.AsyncClient, url: str) -> httpx.Response:
+        """Response for the first non-retryable outcome; raises after the last attempt"""
+        for attempt in range(1, self.max_attempts + 1):
+            await self._admit()
+            started = time.perf_counter()
+            success = False
+            transport_error = None
+            try:
+                response = await client.get(url)
+                success = response.status_code not in RETRYABLE_STATUSES
+            except httpx.TransportError as e:
+                metrics.counter(self._metric("transport_error")).inc()
+                if attempt == self.max_attempts:
+                    raise
+                transport_error = e
+            finally:
+                await self.limiter.release(success)
+                metrics.histogram(self._metric("latency")).observe(time.perf_counter() - started)
+
+            if transport_error is not None:
+                # Backoff outside the slot, so it does not hold back other requests
+                delay = self._backoff(attempt)
+                logger.warning(f"{self.host}: {type(transport_error).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if success:
+                return response
+
+            metrics.counter(self._metric(f"status_{response.status_code}")).inc()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if retry_after is not None:
+                self._pause(retry_after)
+            if attempt == self.max_attempts or delay > self.max_retry_after:
+                response.raise_for_status()
+            logger.warning(f"{self.host}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        raise httpx.HTTPError(f"{self.host}: no attempts made")
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(8.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random())
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 1))
+        }
+
+_fetchers: Dict[str, UpstreamFetcher] = {}
+
+def fetcher_for(url: str, rate: float, max_concurrency: int) -> UpstreamFetcher:
+    """Shared fetcher per upstream host (created on first use)"""
+    host = urlsplit(url).netloc
+    fetcher = _fetchers.get(host)
+    if fetcher is None:
+        fetcher = _fetchers[host] = UpstreamFetcher(host, rate, max_concurrency)
+    return fetcher
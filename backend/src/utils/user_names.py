@@ -0,0 +1,36 @@
+from typing import Dict, Iterable
+
+from src.config import settings
+from src.utils.async_cache import AsyncTTLCache
+
+DEFAULT_NAME = "Anonymous"
+
+# user_id -> display name; usernames are set once at registration
+_names = AsyncTTLCache(
+    "user_names",
+    maxsize=settings.USER_NAME_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_NAME_CACHE_TTL_SECONDS
+)
+
+async def get_display_names(db, user_ids: Iterable[str]) -> Dict[str, str]:
+    """Display names for many users with at most one query (cached ids cost none)"""
+    names = {}
+    missing = []
+    for user_id in user_ids:
+        name = _names.get(user_id)
+        if name is None:
+            missing.append(user_id)
+        else:
+            names[user_id] = name
+
+    if missing:
+        found = {}
+        async for user in db.users.find({"_id": {"$in": missing}}, {"username": 1}):
+            found[user["_id"]] = user.get("username") or DEFAULT_NAME
+        for user_id in missing:
+            name = found.get(user_id, DEFAULT_NAME)
+            # Unknown users are not cached so they show up once registered
+            if user_id in found:
+                _names.set(user_id, name)
+            names[user_id] = name
+    return names
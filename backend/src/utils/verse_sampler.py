@@ -0,0 +1,89 @@
+import logging
+import random
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.bible_store import bible_store
+
+logger = logging.getLogger(__name__)
+
+# Packed entry: chapter index in the high bits, verse offset in the low 16 bits
+_VERSE_BITS = 16
+_VERSE_MASK = (1 << _VERSE_BITS) - 1
+
+class VerseSampler:
+    """
+    Uniform random verse over the locally stored corpus.
+
+    Per language it keeps the list of stored (book_id, chapter) keys and a
+    flat array with one packed (chapter index, verse offset) entry per verse,
+    so a draw is a single randrange + array lookup. The index is built from
+    the Bible store at startup and extended as new chapters are stored; a
+    chapter re-stored with a different verse count rebuilds the array.
+    """
+
+    def __init__(self):
+        self._chapters: Dict[str, List[Tuple[str, int]]] = {}
+        self._chapter_ids: Dict[str, Dict[Tuple[str, int], int]] = {}
+        self._verse_counts: Dict[str, List[int]] = {}
+        self._entries: Dict[str, array] = {}
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_entries(verse_counts: List[int]) -> array:
+        return array("Q", (
+            (chapter_index << _VERSE_BITS) | offset
+            for chapter_index, count in enumerate(verse_counts)
+            for offset in range(count)
+        ))
+
+    def add_chapter(self, lang: str, book_id: str, chapter_num: int, data: Dict):
+        verses = data.get("verses") or []
+        key = (book_id, chapter_num)
+        with self._lock:
+            chapter_ids = self._chapter_ids.setdefault(lang, {})
+            chapter_index = chapter_ids.get(key)
+            if chapter_index is not None:
+                verse_counts = self._verse_counts[lang]
+                if verse_counts[chapter_index] != len(verses):
+                    # Swapped in whole, so concurrent sample() never sees stale offsets
+                    verse_counts[chapter_index] = len(verses)
+                    self._entries[lang] = self._build_entries(verse_counts)
+                return
+            if not verses:
+                return
+
+            chapters = self._chapters.setdefault(lang, [])
+            chapter_index = len(chapters)
+            chapters.append(key)
+            chapter_ids[key] = chapter_index
+            self._verse_counts.setdefault(lang, []).append(len(verses))
+
+            entries = self._entries.setdefault(lang, array("Q"))
+            entries.extend((chapter_index << _VERSE_BITS) | offset for offset in range(len(verses)))
+
+    def load(self, lang: str) -> int:
+        """(Re)build the index for one language from the Bible store"""
+        for book_id, chapter_num, data in bible_store.iter_chapters(lang):
+            self.add_chapter(lang, book_id, chapter_num, data)
+        return self.chapter_count(lang)
+
+    def chapter_count(self, lang: str) -> int:
+        return len(self._chapters.get(lang, ()))
+
+    def verse_count(self, lang: str) -> int:
+        return len(self._entries.get(lang, ()))
+
+    def sample(self, lang: str) -> Optional[Tuple[str, int, int]]:
+        """Random (book_id, chapter_num, verse offset) or None if nothing is stored"""
+        entries = self._entries.get(lang)
+        if not entries:
+            return None
+        packed = entries[self._rng.randrange(len(entries))]
+        book_id, chapter_num = self._chapters[lang][packed >> _VERSE_BITS]
+        return book_id, chapter_num, packed & _VERSE_MASK
+
+verse_sampler = VerseSampler()
+bible_store.add_listener(verse_sampler.add_chapter)
@@ -1,15 +1,201 @@
+import asyncio
 import logging
+import os
+import time
 import httpx
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from src.config import settings
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
+class CircuitOpenError(Exception):
+    """Raised when the voice service circuit breaker rejects a call"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` failures; open -> half-open after
+    `reset_timeout` seconds, where a single trial call decides whether to close.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_success(self):
+        self.state = "closed"
+        self._failures = 0
+        self._trial_in_flight = False
+    
+    def release(self):
+        """Give up an allowed call without a verdict (e.g. cancelled); lets another trial through"""
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Voice service circuit opened after {self._failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+class VoiceServiceClient:
+    """
+    Application-scoped HTTP client for the voice service.
+    Keeps a keep-alive connection pool, hedges slow requests and fails fast
+    through a circuit breaker when the service is saturated or down.
+    """
+    
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.VOICE_SERVICE_BREAKER_FAILURES,
+            reset_timeout=settings.VOICE_SERVICE_BREAKER_RESET
+        )
+    
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=settings.VOICE_SERVICE_URL,
+            timeout=httpx.Timeout(
+                settings.VOICE_SERVICE_READ_TIMEOUT,
+                connect=settings.VOICE_SERVICE_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.VOICE_SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.VOICE_SERVICE_MAX_KEEPALIVE,
+                keepalive_expiry=60.0
+            )
+        )
+        logger.info(f"Voice service client started ({settings.VOICE_SERVICE_URL})")
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Voice service client closed")
+    
+    async def _post(self, path: str, data: Dict, files: Dict) -> Dict:
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(path, data=data, files=files)
+            response.raise_for_status()
+            return response.json()
+        finally:
+            metrics.histogram("voice_service.attempt_seconds").observe(time.perf_counter() - started)
+    
+    async def _hedged_post(self, path: str, data: Dict, files: Dict) -> Dict:
+        """
+        Send the request; if it has not answered within the hedge delay (or it
+        failed with a retryable error) send another, up to the attempt limit.
+        The first successful response wins and the rest are cancelled.
+        """
+        max_attempts = max(1, settings.VOICE_SERVICE_MAX_ATTEMPTS)
+        pending = set()
+        attempts = 0
+        last_error: Optional[Exception] = None
+        
+        def launch():
+            nonlocal attempts
+            attempts += 1
+            pending.add(asyncio.create_task(self._post(path, data, files)))
+        
+        launch()
+        try:
+            while pending:
+                timeout = settings.VOICE_SERVICE_HEDGE_DELAY if attempts < max_attempts else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    metrics.counter("voice_service.hedged").inc()
+                    launch()
+                    continue
+                
+                for task in done:
+                    pending.discard(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    last_error = error
+                    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500 \
+                            and error.response.status_code != 429:
+                        raise error
+                
+                if not pending and attempts < max_attempts:
+                    metrics.counter("voice_service.retried").inc()
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        raise last_error
+    
+    async def verify(self, data: Dict, files: Dict) -> Dict:
+        """
+        POST /verify as multipart: `data` are the form fields, `files` maps
+        field name to (filename, bytes, content type). Contents are bytes so
+        hedged attempts can resend them.
+        """
+        if not self.breaker.allow():
+            metrics.counter("voice_service.circuit_rejected").inc()
+            raise CircuitOpenError("Voice service unavailable (circuit open)")
+        
+        started = time.perf_counter()
+        try:
+            if self._client is None:
+                await self.start()
+            result = await self._hedged_post("/verify", data, files)
+        except httpx.HTTPStatusError as e:
+            metrics.counter("voice_service.errors").inc()
+            if e.response.status_code >= 500 or e.response.status_code == 429:
+                self.breaker.record_failure()
+            else:
+                # The service answered; a rejected request says nothing about its health
+                self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            metrics.counter("voice_service.errors").inc()
+            raise
+        except BaseException:
+            # Cancelled with the caller: no verdict, but the half-open trial must not stay taken
+            self.breaker.release()
+            raise
+        finally:
+            metrics.histogram("voice_service.verify_seconds").observe(time.perf_counter() - started)
+        
+        self.breaker.record_success()
+        return result
+
+voice_client = VoiceServiceClient()
+
+def _read_audio(path: str) -> Tuple[str, bytes, str]:
+    with open(path, "rb") as f:
+        return os.path.basename(path), f.read(), "application/octet-stream"
+
 async def verify_recording_session(
     prayer_transcription_id: str,
     captcha_transcription_id: str,
-    min_similarity: float = None
+    min_similarity: float = None,
+    user_id: str = None
 ) -> Dict:
     """
     Voice verification using external voice-service (if enabled)
@@ -66,43 +252,51 @@ async def verify_recording_session(
         logger.info(f"Verifying voice: {prayer_path} vs {captcha_path}")
         logger.info(f"Using voice service at: {settings.VOICE_SERVICE_URL}")
         
-        # Call voice-service
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{settings.VOICE_SERVICE_URL}/verify",
-                json={
-                    "audio_path_1": prayer_path,
-                    "audio_path_2": captcha_path,
-                    "threshold": min_similarity
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Voice service error: {response.status_code} - {response.text}")
-            
-            result = response.json()
-            
-            similarity_score = result["similarity_score"]
-            is_same_speaker = result["is_same_speaker"]
-            
-            logger.info(f"Voice verification result: {similarity_score:.4f}, Same: {is_same_speaker}")
-            
-            return {
-                "passed": is_same_speaker,
-                "voice_match": is_same_speaker,
-                "similarity_score": similarity_score,
-                "is_human": is_same_speaker,
-                "human_confidence": 1.0,
-                "details": {
-                    "failure_reasons": [] if is_same_speaker else ["Voice mismatch"],
-                    "ai_detection_model": "Implicit (voice similarity)",
-                    "voice_matching_model": "speechbrain/spkrec-ecapa-voxceleb",
-                    "threshold": min_similarity,
-                    "confidence": result.get("confidence", 0.0),
-                    "service_url": settings.VOICE_SERVICE_URL
-                }
+        # Call voice-service: it takes the recordings as uploads, not paths
+        audio_1, audio_2 = await asyncio.gather(
+            asyncio.to_thread(_read_audio, prayer_path),
+            asyncio.to_thread(_read_audio, captcha_path)
+        )
+        form = {"threshold": str(min_similarity), "session_id": prayer_transcription_id}
+        if user_id:
+            form["user_id"] = user_id
+        try:
+            result = await voice_client.verify(form, {"audio_file_1": audio_1, "audio_file_2": audio_2})
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Voice service error: {e.response.status_code} - {e.response.text}")
+        
+        similarity_score = result["similarity_score"]
+        is_same_speaker = result["is_same_speaker"]
+        cross_account_matches = result.get("cross_account_matches", [])
+        replay_detected = result.get("replay_detected", False)
+        
+        logger.info(f"Voice verification result: {similarity_score:.4f}, Same: {is_same_speaker}")
+        
+        failure_reasons = [] if is_same_speaker else ["Voice mismatch"]
+        if cross_account_matches:
+            failure_reasons.append("Voice matches another account")
+        if replay_detected:
+            failure_reasons.append("Replayed recording")
+        passed = not failure_reasons
+        
+        return {
+            "passed": passed,
+            "voice_match": is_same_speaker,
+            "similarity_score": similarity_score,
+            "is_human": is_same_speaker,
+            "human_confidence": 1.0,
+            "details": {
+                "failure_reasons": failure_reasons,
+                "cross_account_matches": cross_account_matches,
+                "replay_detected": replay_detected,
+                "ai_detection_model": "Implicit (voice similarity)",
+                "voice_matching_model": "speechbrain/spkrec-ecapa-voxceleb",
+                "threshold": min_similarity,
+                "confidence": result.get("confidence", 0.0),
+                "service_url": settings.VOICE_SERVICE_URL
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Voice verification failed: {str(e)}")
         return {
@@ -239,7 +239,7 @@ export const usePrayerRecording = () => {
         name: 'prayer.wav',
       } as any);
 
-      const response = await apiFetch(`${API_CONFIG.BASE_URL}/api/transcribe?audio_type=prayer&lang=${language}`, {
+      const response = await apiFetch(`${API_CONFIG.BASE_URL}/api/transcribe?audio_type=prayer&lang=${language}&user_id=${encodeURIComponent(userId)}`, {
         method: 'POST',
         body: formData,
       });
@@ -322,7 +322,7 @@ export const usePrayerRecording = () => {
         name: 'captcha.wav',
       } as any);
 
-      const response = await apiFetch(`${API_CONFIG.BASE_URL}/api/transcribe?audio_type=captcha&lang=${language}`, {
+      const response = await apiFetch(`${API_CONFIG.BASE_URL}/api/transcribe?audio_type=captcha&lang=${language}&user_id=${encodeURIComponent(userId)}`, {
         method: 'POST',
         body: formData,
       });
@@ -0,0 +1,93 @@
+"""
+Speaker index benchmark.
+
+Builds an index of synthetic speaker embeddings (clusters of sessions around
+per-speaker centres, like Resemblyzer's 256-d output) and measures top-k query
+latency and recall against an exact brute-force scan.
+
+    poetry run python benchmarks/speaker_index_benchmark.py --size 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from speaker_index import SpeakerIndex  # noqa: E402
+
+
+def synthetic_embeddings(size: int, dim: int, sessions_per_speaker: int, rng):
+    speakers = max(1, size // sessions_per_speaker)
+    centres = rng.standard_normal((speakers, dim), dtype=np.float32)
+    owners = rng.integers(0, speakers, size)
+    vectors = np.empty((size, dim), dtype=np.float32)
+    chunk = 100_000
+    for start in range(0, size, chunk):
+        end = min(size, start + chunk)
+        noise = rng.standard_normal((end - start, dim), dtype=np.float32)
+        vectors[start:end] = centres[owners[start:end]] + 0.35 * noise
+    return vectors, owners, centres
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--sessions-per-speaker", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(f"Generating {args.size:,} embeddings (dim={args.dim})...")
+    vectors, owners, centres = synthetic_embeddings(args.size, args.dim, args.sessions_per_speaker, rng)
+
+    index = SpeakerIndex(dim=args.dim, nprobe=args.nprobe)
+    started = time.perf_counter()
+    index.add_batch(vectors, [f"user_{o}" for o in owners], [str(i) for i in range(args.size)])
+    print(f"Build: {time.perf_counter() - started:.1f}s  {index.stats()}")
+
+    query_owners = rng.integers(0, len(centres), args.queries)
+    queries = centres[query_owners] + 0.35 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(index.search(query, k=args.k))
+        latencies.append(time.perf_counter() - started)
+
+    latencies_ms = np.asarray(latencies) * 1000
+    print(
+        f"Query latency (k={args.k}, nprobe={args.nprobe}): "
+        f"p50={np.percentile(latencies_ms, 50):.3f}ms "
+        f"p95={np.percentile(latencies_ms, 95):.3f}ms "
+        f"p99={np.percentile(latencies_ms, 99):.3f}ms"
+    )
+
+    # Recall@k against exact search on a subset of queries
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    recall_queries = min(100, args.queries)
+    hits = 0
+    for query, approx in zip(queries[:recall_queries], results[:recall_queries]):
+        query = query / np.linalg.norm(query)
+        exact = np.argpartition(-(normalized @ query), args.k - 1)[:args.k]
+        exact_sessions = {str(i) for i in exact}
+        hits += len(exact_sessions & {m.session_id for m in approx})
+    print(f"Recall@{args.k}: {hits / (recall_queries * args.k):.3f}")
+
+    # Cross-account detection: does the top hit belong to the queried speaker?
+    same_owner = sum(
+        1 for owner, approx in zip(query_owners, results)
+        if approx and approx[0].user_id == f"user_{owner}"
+    )
+    print(f"Top-1 speaker match rate: {same_owner / args.queries:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,59 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
 from resemblyzer import VoiceEncoder, preprocess_wav
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import List, Optional
 import numpy as np
+import asyncio
 import logging
 import os
 import tempfile
 import shutil
 
+from speaker_index import load_or_create
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Voice Verification Service")
+SPEAKER_INDEX_PATH = os.getenv("SPEAKER_INDEX_PATH", "uploads/speaker_index.npz")
+SPEAKER_INDEX_TOP_K = int(os.getenv("SPEAKER_INDEX_TOP_K", "10"))
+# Tail size (scanned exhaustively on every search) at which it is folded into the lists
+SPEAKER_INDEX_COMPACT_EVERY = int(os.getenv("SPEAKER_INDEX_COMPACT_EVERY", "4096"))
+# Cosine similarity above which another account's voice counts as the same speaker.
+# Always kept CROSS_ACCOUNT_MARGIN above the request's same-speaker threshold, so
+# a voice that only just passes verification does not flag other accounts.
+CROSS_ACCOUNT_THRESHOLD = float(os.getenv("CROSS_ACCOUNT_THRESHOLD", "0.9"))
+CROSS_ACCOUNT_MARGIN = float(os.getenv("CROSS_ACCOUNT_MARGIN", "0.05"))
+# Near-identical embeddings from a different session indicate a replayed recording
+REPLAY_THRESHOLD = float(os.getenv("REPLAY_THRESHOLD", "0.995"))
+
+speaker_index = load_or_create(SPEAKER_INDEX_PATH, compact_every=SPEAKER_INDEX_COMPACT_EVERY)
+# Background compaction in flight, if any: at most one is scheduled at a time
+_compaction: Optional[asyncio.Future] = None
+
+def _compaction_done(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Speaker index compaction failed: {future.exception()}")
+
+def schedule_compaction():
+    global _compaction
+    if not speaker_index.needs_compaction or (_compaction is not None and not _compaction.done()):
+        return
+    _compaction = asyncio.get_running_loop().run_in_executor(None, speaker_index.compact)
+    _compaction.add_done_callback(_compaction_done)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Shutdown
+    try:
+        os.makedirs(os.path.dirname(SPEAKER_INDEX_PATH) or ".", exist_ok=True)
+        speaker_index.save(SPEAKER_INDEX_PATH)
+    except Exception as e:
+        logger.error(f"Failed to save speaker index: {e}")
+
+app = FastAPI(title="Voice Verification Service", lifespan=lifespan)
 
 # Load Resemblyzer encoder (CPU-friendly)
 logger.info("Loading Resemblyzer voice encoder...")
@@ -22,14 +64,21 @@ except Exception as e:
     logger.error(f"Failed to load encoder: {e}")
     encoder = None
 
+class SpeakerIndexMatch(BaseModel):
+    user_id: str
+    session_id: str
+    score: float
+
 class VoiceComparisonResponse(BaseModel):
     similarity_score: float
     is_same_speaker: bool
     confidence: float
+    cross_account_matches: List[SpeakerIndexMatch] = []
+    replay_detected: bool = False
 
-def compute_similarity(wav1_path: str, wav2_path: str) -> float:
+def compute_embeddings(wav1_path: str, wav2_path: str):
     """
-    Compute cosine similarity between two voice embeddings
+    Compute voice embeddings for both recordings
     """
     if encoder is None:
         raise Exception("Encoder not loaded")
@@ -39,28 +88,58 @@ def compute_similarity(wav1_path: str, wav2_path: str) -> float:
     wav2 = preprocess_wav(Path(wav2_path))
     
     # Generate embeddings
-    embed1 = encoder.embed_utterance(wav1)
-    embed2 = encoder.embed_utterance(wav2)
-    
-    # Compute cosine similarity
+    return encoder.embed_utterance(wav1), encoder.embed_utterance(wav2)
+
+def compute_similarity(embed1: np.ndarray, embed2: np.ndarray) -> float:
+    """
+    Compute cosine similarity between two voice embeddings
+    """
     similarity = np.dot(embed1, embed2) / (np.linalg.norm(embed1) * np.linalg.norm(embed2))
     
     return float(similarity)
 
+def check_speaker_index(embeddings: List[np.ndarray], user_id: str, session_id: str, threshold: float):
+    """
+    Look up embeddings in the speaker index.
+    Returns (cross-account matches, replay detected).
+    """
+    cross_account_threshold = max(CROSS_ACCOUNT_THRESHOLD, threshold + CROSS_ACCOUNT_MARGIN)
+    cross_account = {}
+    replay_detected = False
+    
+    for embedding in embeddings:
+        for match in speaker_index.search(embedding, k=SPEAKER_INDEX_TOP_K):
+            if match.session_id == session_id:
+                continue
+            if match.score >= REPLAY_THRESHOLD:
+                replay_detected = True
+            if match.user_id != user_id and match.score >= cross_account_threshold:
+                best = cross_account.get(match.user_id)
+                if best is None or match.score > best.score:
+                    cross_account[match.user_id] = match
+    
+    matches = sorted(cross_account.values(), key=lambda m: m.score, reverse=True)
+    return [
+        SpeakerIndexMatch(user_id=m.user_id, session_id=m.session_id, score=round(m.score, 4))
+        for m in matches
+    ], replay_detected
+
 @app.post("/verify", response_model=VoiceComparisonResponse)
 async def verify_voice(
     audio_file_1: UploadFile = File(...),
     audio_file_2: UploadFile = File(...),
-    threshold: float = Form(0.75)
+    threshold: float = Form(0.75),
+    user_id: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None)
 ):
     temp_dir = None
     try:
         # Create temporary directory
         temp_dir = tempfile.mkdtemp()
         
-        # Save uploaded files
-        file1_path = os.path.join(temp_dir, "audio1.wav")
-        file2_path = os.path.join(temp_dir, "audio2.wav")
+        # Save uploaded files (keeping the extension: stored audio may be Opus)
+        file1_path = os.path.join(temp_dir, "audio1" + (Path(audio_file_1.filename or "").suffix or ".wav"))
+        file2_path = os.path.join(temp_dir, "audio2" + (Path(audio_file_2.filename or "").suffix or ".wav"))
         
         with open(file1_path, "wb") as f:
             shutil.copyfileobj(audio_file_1.file, f)
@@ -71,7 +150,8 @@ async def verify_voice(
         logger.info(f"Comparing uploaded audio files")
         
         # Compute similarity
-        similarity_score = compute_similarity(file1_path, file2_path)
+        embed1, embed2 = compute_embeddings(file1_path, file2_path)
+        similarity_score = compute_similarity(embed1, embed2)
         
         is_same_speaker = similarity_score >= threshold
         confidence = abs(similarity_score - threshold)
@@ -82,10 +162,33 @@ async def verify_voice(
             f"Confidence: {confidence:.4f}"
         )
         
+        # Cross-account / replay lookup against previously seen speakers
+        cross_account_matches, replay_detected = [], False
+        if user_id:
+            session = session_id or user_id
+            cross_account_matches, replay_detected = check_speaker_index(
+                [embed1, embed2], user_id, session, threshold
+            )
+            if cross_account_matches or replay_detected:
+                logger.warning(
+                    f"Speaker index flagged user {user_id}: "
+                    f"cross-account={[m.user_id for m in cross_account_matches]}, "
+                    f"replay={replay_detected}"
+                )
+            
+            # Only index voices verified as this user's, so a failed attempt
+            # with someone else's voice is not attributed to the account
+            if is_same_speaker:
+                speaker_index.add(embed1, user_id, session)
+                speaker_index.add(embed2, user_id, session)
+                schedule_compaction()
+        
         return VoiceComparisonResponse(
             similarity_score=round(similarity_score, 4),
             is_same_speaker=is_same_speaker,
-            confidence=round(confidence, 4)
+            confidence=round(confidence, 4),
+            cross_account_matches=cross_account_matches,
+            replay_detected=replay_detected
         )
         
     except Exception as e:
@@ -102,5 +205,6 @@ async def health_check():
     return {
         "status": "healthy" if encoder else "unhealthy",
         "model": "Resemblyzer (GE2E)",
-        "device": "CPU"
+        "device": "CPU",
+        "speaker_index": speaker_index.stats()
     }
\ No newline at end of file
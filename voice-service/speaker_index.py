@@ -0,0 +1,296 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeakerMatch:
+    user_id: str
+    session_id: str
+    score: float
+
+
+class SpeakerIndex:
+    """
+    Approximate nearest-neighbour index over speaker embeddings (IVF-flat).
+
+    Embeddings are L2-normalised, so inner product == cosine similarity.
+    Compacted vectors are grouped by their nearest k-means centroid and stored
+    as contiguous slices; a query scores the centroids and scans only the
+    `nprobe` closest slices. New embeddings go to an append-only tail that is
+    scanned exhaustively until the next compaction folds it into the lists.
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        nprobe: int = 8,
+        compact_every: int = 4_096,
+        train_sample: int = 50_000,
+        kmeans_iters: int = 8,
+    ):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.compact_every = compact_every
+        self.train_sample = train_sample
+        self.kmeans_iters = kmeans_iters
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+
+        # Compacted storage, ordered by inverted list
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._user_codes = np.empty(0, dtype=np.int32)
+        self._session_ids: List[str] = []
+        self._centroids = np.empty((0, dim), dtype=np.float32)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._trained_size = 0
+
+        # Append-only tail (not yet assigned to a list), grown by doubling
+        self._tail_buffer = np.empty((1024, dim), dtype=np.float32)
+        self._tail_count = 0
+        self._tail_user_codes: List[int] = []
+        self._tail_session_ids: List[str] = []
+
+        self._users: List[str] = []
+        self._user_lookup = {}
+
+    def __len__(self) -> int:
+        return len(self._session_ids) + len(self._tail_session_ids)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _user_code(self, user_id: str) -> int:
+        code = self._user_lookup.get(user_id)
+        if code is None:
+            code = len(self._users)
+            self._users.append(user_id)
+            self._user_lookup[user_id] = code
+        return code
+
+    def _append_tail(self, vectors: np.ndarray):
+        needed = self._tail_count + len(vectors)
+        if needed > len(self._tail_buffer):
+            capacity = max(needed, 2 * len(self._tail_buffer))
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[:self._tail_count] = self._tail_buffer[:self._tail_count]
+            self._tail_buffer = grown
+        self._tail_buffer[self._tail_count:needed] = vectors
+        self._tail_count = needed
+
+    def add(self, embedding: np.ndarray, user_id: str, session_id: str):
+        """Add one embedding to the tail; call compact() once needs_compaction is set"""
+        vector = self._normalize(embedding).reshape(1, self.dim)
+        with self._lock:
+            self._append_tail(vector)
+            self._tail_user_codes.append(self._user_code(user_id))
+            self._tail_session_ids.append(session_id)
+
+    def add_batch(self, embeddings: np.ndarray, user_ids: List[str], session_ids: List[str]):
+        """Bulk insert used by the benchmark and by index rebuilds"""
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            self._append_tail(vectors)
+            self._tail_user_codes.extend(self._user_code(u) for u in user_ids)
+            self._tail_session_ids.extend(session_ids)
+        self.compact()
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a sample; nlist ~ 4 * sqrt(N)"""
+        n = len(vectors)
+        nlist = max(1, min(int(4 * np.sqrt(n)), n))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(n, size=min(n, self.train_sample), replace=False)]
+        nlist = min(nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = self._normalize(sums)
+
+        logger.info(f"Speaker index trained: {nlist} lists over {n} embeddings")
+        return centroids
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            assign[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._tail_count >= self.compact_every
+
+    def compact(self):
+        """
+        Fold the tail into the inverted lists, re-training when the index doubled.
+        The new layout is built from a snapshot and swapped in under the lock, so
+        searches and inserts are only blocked for the swap itself.
+        """
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            tail_size = self._tail_count
+            if not tail_size:
+                return
+            centroids = self._centroids
+            trained_size = self._trained_size
+            old_vectors = self._vectors
+            old_user_codes = self._user_codes
+            old_session_ids = self._session_ids
+            old_offsets = self._list_offsets
+            tail_vectors = self._tail_buffer[:tail_size].copy()
+            tail_user_codes = np.asarray(self._tail_user_codes[:tail_size], dtype=np.int32)
+            tail_session_ids = self._tail_session_ids[:tail_size]
+
+        vectors = np.concatenate([old_vectors, tail_vectors])
+        user_codes = np.concatenate([old_user_codes, tail_user_codes])
+        session_ids = old_session_ids + tail_session_ids
+
+        if len(centroids) == 0 or len(vectors) >= 2 * trained_size:
+            centroids = self._train(vectors)
+            trained_size = len(vectors)
+            assign = self._assign(vectors, centroids)
+        else:
+            old_assign = np.repeat(np.arange(len(centroids)), np.diff(old_offsets))
+            assign = np.concatenate([old_assign, self._assign(tail_vectors, centroids)])
+
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=len(centroids))
+
+        new_vectors = np.ascontiguousarray(vectors[order])
+        new_user_codes = user_codes[order]
+        new_session_ids = [session_ids[i] for i in order]
+        new_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        with self._lock:
+            self._centroids = centroids
+            self._trained_size = trained_size
+            self._vectors = new_vectors
+            self._user_codes = new_user_codes
+            self._session_ids = new_session_ids
+            self._list_offsets = new_offsets
+            remaining = self._tail_count - tail_size
+            self._tail_buffer[:remaining] = self._tail_buffer[tail_size:self._tail_count].copy()
+            self._tail_count = remaining
+            del self._tail_user_codes[:tail_size]
+            del self._tail_session_ids[:tail_size]
+
+    def search(self, embedding: np.ndarray, k: int = 10) -> List[SpeakerMatch]:
+        """Top-k most similar stored embeddings (cosine similarity)"""
+        query = self._normalize(embedding).reshape(self.dim)
+
+        with self._lock:
+            scores_parts = []
+            index_parts = []
+
+            if len(self._centroids):
+                centroid_scores = self._centroids @ query
+                nprobe = min(self.nprobe, len(self._centroids))
+                probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+                for list_id in probe:
+                    start, end = self._list_offsets[list_id], self._list_offsets[list_id + 1]
+                    if end > start:
+                        scores_parts.append(self._vectors[start:end] @ query)
+                        index_parts.append(np.arange(start, end))
+
+            tail_size = self._tail_count
+            if tail_size:
+                scores_parts.append(self._tail_buffer[:tail_size] @ query)
+                index_parts.append(-1 - np.arange(tail_size))
+
+            if not scores_parts:
+                return []
+
+            scores = np.concatenate(scores_parts)
+            indices = np.concatenate(index_parts)
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            matches = []
+            for position in top:
+                idx = int(indices[position])
+                if idx >= 0:
+                    user_code = self._user_codes[idx]
+                    session_id = self._session_ids[idx]
+                else:
+                    user_code = self._tail_user_codes[-1 - idx]
+                    session_id = self._tail_session_ids[-1 - idx]
+                matches.append(SpeakerMatch(
+                    user_id=self._users[user_code],
+                    session_id=session_id,
+                    score=float(scores[position])
+                ))
+            return matches
+
+    def save(self, path: str):
+        """Persist compacted index to a single .npz file"""
+        self.compact()
+        with self._lock:
+            tmp_path = f"{path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                vectors=self._vectors,
+                user_codes=self._user_codes,
+                session_ids=np.asarray(self._session_ids, dtype=object),
+                centroids=self._centroids,
+                list_offsets=self._list_offsets,
+                users=np.asarray(self._users, dtype=object),
+                trained_size=np.asarray(self._trained_size),
+            )
+            os.replace(tmp_path, path)
+            logger.info(f"Speaker index saved: {len(self)} embeddings -> {path}")
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "SpeakerIndex":
+        kwargs.pop("dim", None)
+        data = np.load(path, allow_pickle=True)
+        index = cls(dim=data["vectors"].shape[1], **kwargs)
+        index._vectors = np.ascontiguousarray(data["vectors"], dtype=np.float32)
+        index._user_codes = data["user_codes"].astype(np.int32)
+        index._session_ids = data["session_ids"].tolist()
+        index._centroids = data["centroids"].astype(np.float32)
+        index._list_offsets = data["list_offsets"].astype(np.int64)
+        index._users = data["users"].tolist()
+        index._user_lookup = {u: i for i, u in enumerate(index._users)}
+        index._trained_size = int(data["trained_size"])
+        logger.info(f"Speaker index loaded: {len(index)} embeddings from {path}")
+        return index
+
+    def stats(self) -> dict:
+        return {
+            "embeddings": len(self),
+            "users": len(self._users),
+            "lists": len(self._centroids),
+            "tail": self._tail_count,
+            "nprobe": self.nprobe,
+        }
+
+
+def load_or_create(path: Optional[str], **kwargs) -> SpeakerIndex:
+    if path and os.path.exists(path):
+        try:
+            return SpeakerIndex.load(path, **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to load speaker index from {path}: {e}")
+    return SpeakerIndex(**kwargs)